@@ -1,188 +1,513 @@
 import sys
 import os
 import json
-import shutil
 import time
-from tqdm import tqdm
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from threading import Lock
 from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, \
-    QListWidget, QListWidgetItem, QAbstractItemView, QFileDialog, QLineEdit, QSizePolicy, QTextEdit, QMessageBox
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QObject, QRect
+    QTableView, QHeaderView, QAbstractItemView, QFileDialog, QLineEdit, QSizePolicy, QPlainTextEdit, QMessageBox, QComboBox, QCheckBox, \
+    QProgressBar, QSpinBox
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QObject, QRect, QAbstractTableModel, QModelIndex, QTimer
 from PyQt5.QtGui import QFont
+from ollama_organizer.scheduler import SOURCE_WORKERS, TARGET_WORKERS
+from ollama_organizer.utils import format_size, format_duration, format_count
+from ollama_organizer.catalog import ModelCatalog
+from ollama_organizer.progress import ProgressChannel, LOG_LIMIT
+from ollama_organizer.throttle import TokenBucket
+from ollama_organizer.metrics import MB
+from ollama_organizer.watcher import ManifestWatcher
 
 CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')
-MAX_THREADS = 3
-
-def make_dir(path):
-    if not os.path.exists(path):
-        os.makedirs(path)
-
-def copy_model_files_and_verify(model_name, model_version, target_dir, source_dir, blob_cache_dir):
-    try:
-        source_models_dir = os.path.join(source_dir, 'models')
-        manifests_dir = os.path.join(source_models_dir, f'manifests/registry.ollama.ai/library/{model_name}')
-        relative_model_dir = f'manifests/registry.ollama.ai/library/{model_name}'
-        new_models_dir = os.path.join(target_dir, model_version, 'models')
-        new_blobs_dir = os.path.join(new_models_dir, 'blobs')
-        new_model_dir = os.path.join(new_models_dir, relative_model_dir)
-        model_config_path = os.path.join(manifests_dir, model_version)
-        new_model_config_path = os.path.join(new_model_dir, model_version)
-        make_dir(new_model_dir)
-        make_dir(new_blobs_dir)
-        shutil.copy(model_config_path, new_model_config_path)
-        with open(model_config_path, 'r', encoding='utf-8') as f:
-            content = json.load(f)
-        config_digest = content['config']['digest'].replace('sha256:', 'sha256-')
-        digest_src = os.path.join(blob_cache_dir, config_digest)
-        digest_dst = os.path.join(new_blobs_dir, config_digest)
-        shutil.copy(digest_src, digest_dst)
-        if not os.path.exists(digest_dst):
-            raise RuntimeError(f"Missing config digest file: {digest_dst}")
-        layer_digests = []
-        for layer in content['layers']:
-            digest = layer['digest'].replace('sha256:', 'sha256-')
-            src = os.path.join(blob_cache_dir, digest)
-            dst = os.path.join(new_blobs_dir, digest)
-            shutil.copy(src, dst)
-            if not os.path.exists(dst):
-                raise RuntimeError(f"Missing layer digest file: {dst}")
-            layer_digests.append(layer['digest'])
-        return True, config_digest, layer_digests
-    except Exception as e:
-        return False, f"{model_name}/{model_version} -> {e}", None
+CATALOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalog_cache.json')
+FLUSH_INTERVAL_MS = 100
+PROGRESS_INTERVAL = 0.2
 
 class WorkerSignals(QObject):
-    progress = pyqtSignal(str)
     result = pyqtSignal(dict)
     finished = pyqtSignal()
 
+class ManifestSignals(QObject):
+    changed = pyqtSignal(list)
+
 class OrganizeThread(QThread):
-    def __init__(self, tasks, source_dir, target_dir, record_file, error_log_file):
+    def __init__(self, tasks, source_dir, target_dir, record_file, error_log_file, link_mode='copy',
+                 source_workers=SOURCE_WORKERS, target_workers=TARGET_WORKERS, dry_run=False, verify_existing=False,
+                 bundle=False, bandwidth_limit=0, low_io_priority=False, mirror_dirs=(), adaptive=False,
+                 device_workers=None, shared_output=False):
         super().__init__()
         self.tasks = tasks
         self.source_dir = source_dir
         self.target_dir = target_dir
         self.record_file = record_file
         self.error_log_file = error_log_file
+        self.link_mode = link_mode
+        self.source_workers = source_workers
+        self.target_workers = target_workers
+        self.dry_run = dry_run
+        self.verify_existing = verify_existing
+        self.bundle = bundle
+        self.throttle = TokenBucket(bandwidth_limit * MB)
+        self.low_io_priority = low_io_priority
+        self.mirror_dirs = list(mirror_dirs)
+        self.adaptive = adaptive
+        self.device_workers = dict(device_workers or {})
+        self.shared_output = shared_output
         self.signals = WorkerSignals()
+        self.channel = ProgressChannel()
 
-    def run(self):
-        processed_records = {}
-        if os.path.exists(self.record_file):
-            with open(self.record_file, 'r', encoding='utf-8') as f:
-                processed_records = json.load(f)
-        blob_cache_dir = os.path.join(self.source_dir, 'models', 'blobs')
-
-        success_count = 0
-        failure_count = 0
-        total_digests = 0
-        failed_list = []
-        skipped = 0
-        total_tasks = len(self.tasks)
+    def on_event(self, event):
+        kind = event["event"]
+        where = f" -> {event['target']}" if event.get("target") else ""
+        if kind == "start":
+            self.channel.log(f"Total model versions to process: {event['total']}")
+            if event.get("targets"):
+                self.channel.log("Output directories: " + ", ".join(event["targets"]))
+            self.channel.log(f"Blob storage mode: {event['link_mode']}\n")
+        elif kind == "bundle_start":
+            self.channel.log(f"Total model versions to export: {event['total']}")
+            self.channel.log(f"Metadata compression: {event['codec']}\n")
+        elif kind == "bundle_summary":
+            self.channel.log(
+                f"\n====== Export Completed ======\n"
+                f"Total model versions: {event['total']}\n"
+                f"Unchanged: {event['skipped']}\n"
+                f"Success: {event['success']}\n"
+                f"Failed: {event['failed']}\n"
+                f"Data written: {format_size(event['bytes'])}\n"
+                f"Bundles written to: {self.bundle_dir}\n"
+                f"Elapsed time: {event['elapsed']:.2f} seconds"
+            )
+        elif kind == "skipped":
+            self.channel.log(f"[Skipped] Model: {event['model']}, Version: {event['version']}{where}")
+        elif kind == "stale":
+            self.channel.log(f"[Stale] Model: {event['model']}, Version: {event['version']} (manifest changed){where}")
+        elif kind == "plan":
+            self.channel.log(
+                f"Blob files to copy: {event['blobs']} ({format_size(event['bytes'])}), "
+                f"already in output: {event['present_blobs']} ({format_size(event['present_bytes'])})"
+            )
+        elif kind == "done":
+            self.channel.log(f"[Done] Model: {event['model']}, Version: {event['version']}{where}")
+        elif kind == "error":
+            self.channel.log(f"[Error] {event['error']}{where}")
+        elif kind == "progress":
+            self.channel.progress(event['finished'], event['total'])
+        elif kind == "throughput":
+            self.channel.throughput(event)
+        elif kind == "blob":
+            self.channel.blob_finished(event['blob'])
+        elif kind == "summary" and event["dry_run"]:
+            self.channel.log(
+                f"\n====== Dry Run ======\n"
+                f"Up to date: {event['up_to_date']}\n"
+                f"Stale: {event['stale']}\n"
+                f"To organize: {event['to_organize']}\n"
+                f"Bytes to transfer: {format_size(event['bytes_to_copy'])}\n"
+                f"No files were written."
+            )
+        elif kind == "summary":
+            msg = (
+                f"\n====== Organizing Completed ======\n"
+                f"Total model versions: {event['total']}\n"
+                f"Skipped: {event['skipped']}\n"
+                f"Success: {event['success']}\n"
+                f"Failed: {event['failed']}\n"
+                f"Total blob files copied: {event['blob_files']}\n"
+                f"Data transferred: {format_size(event['bytes_copied'])}\n"
+                f"Average speed: {event['average_mb_s'] or 0:.1f} MB/s"
+            )
+            if event['failed'] > 0:
+                msg += f"\nFailed details written to: {event['error_log_file']}"
+            msg += f"\nRun report written to: {event['run_report_file']}"
+            if self.adaptive and event['device_workers']:
+                msg += "\nCopy threads per device: " + ", ".join(f"{name}: {n}" for name, n in sorted(event['device_workers'].items()))
+            msg += f"\nElapsed time: {event['elapsed']:.2f} seconds"
+            self.channel.log(msg)
 
-        start_time = time.time()
-        self.signals.progress.emit(f"Total model versions to process: {total_tasks}\n")
-
-        with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-            futures = {}
-            for model_name, model_version in self.tasks:
-                if model_name in processed_records and model_version in processed_records[model_name]:
-                    skipped += 1
-                    self.signals.progress.emit(f"[Skipped] Model: {model_name}, Version: {model_version}")
-                    continue
-                processed_records.setdefault(model_name, {})
-                new_model_dir = os.path.join(self.target_dir, model_name)
-                future = executor.submit(copy_model_files_and_verify, model_name, model_version, new_model_dir, self.source_dir, blob_cache_dir)
-                futures[future] = (model_name, model_version)
-
-            finished = skipped
-            for future in as_completed(futures):
-                model_name, model_version = futures[future]
-                try:
-                    success, result, layers = future.result()
-                    if success:
-                        processed_records[model_name][model_version] = {
-                            "config_digest": result,
-                            "layers_digest": layers
-                        }
-                        with open(self.record_file, 'w', encoding='utf-8') as f:
-                            json.dump(processed_records, f, indent=2, ensure_ascii=False)
-                        success_count += 1
-                        total_digests += 1 + len(layers)
-                        self.signals.progress.emit(f"[Done] Model: {model_name}, Version: {model_version}")
-                    else:
-                        failure_count += 1
-                        failed_list.append({"model": model_name, "version": model_version, "error": result})
-                        self.signals.progress.emit(f"[Error] {result}")
-                except Exception as e:
-                    failure_count += 1
-                    failed_list.append({"model": model_name, "version": model_version, "error": str(e)})
-                    self.signals.progress.emit(f"[Thread Error] {model_name}/{model_version} -> {e}")
-                finally:
-                    finished += 1
-                    self.signals.progress.emit(f"Progress: {finished}/{total_tasks}")
-
-        if failed_list:
-            with open(self.error_log_file, 'w', encoding='utf-8') as f:
-                json.dump(failed_list, f, indent=2, ensure_ascii=False)
+    @property
+    def bundle_dir(self):
+        return os.path.join(self.target_dir, 'bundles')
 
-        elapsed = time.time() - start_time
-        msg = (
-            f"\n====== Organizing Completed ======\n"
-            f"Total model versions: {total_tasks}\n"
-            f"Skipped: {skipped}\n"
-            f"Success: {success_count}\n"
-            f"Failed: {failure_count}\n"
-            f"Total blob files copied: {total_digests}"
-        )
-        if failure_count > 0:
-            msg += f"\nFailed details written to: {self.error_log_file}"
-        msg += f"\nElapsed time: {elapsed:.2f} seconds"
-        self.signals.progress.emit(msg)
+    @property
+    def output_dirs(self):
+        return [self.target_dir] + self.mirror_dirs if self.mirror_dirs else self.target_dir
+
+    def run(self):
+        if self.bundle:
+            self.run_export()
+            return
+        from ollama_organizer.engine import organize
+        try:
+            summary = organize(self.tasks, self.source_dir, self.output_dirs, self.record_file, self.error_log_file,
+                               self.link_mode, self.source_workers, self.target_workers, self.dry_run, self.verify_existing,
+                               self.on_event, progress_interval=PROGRESS_INTERVAL,
+                               throttle=self.throttle, low_io_priority=self.low_io_priority,
+                               adaptive=self.adaptive, device_workers=self.device_workers,
+                               shared=self.shared_output)
+            self.device_workers = summary["device_workers"]
+        except Exception as e:
+            self.channel.log(f"[Error] Organize failed -> {e}")
+        self.signals.finished.emit()
+
+    def run_export(self):
+        from ollama_organizer.bundle import export_bundles
+        try:
+            os.makedirs(self.bundle_dir, exist_ok=True)
+            export_bundles(self.tasks, self.source_dir, self.bundle_dir, on_event=self.on_event)
+        except Exception as e:
+            self.channel.log(f"[Error] Export failed -> {e}")
         self.signals.finished.emit()
 
 class DeleteFilesThread(QThread):
-    progress = pyqtSignal(str)
+    planned = pyqtSignal()
     finished = pyqtSignal()
 
-    def __init__(self, tasks, base_dir):
+    def __init__(self, source_dir, tasks=None, plan=None):
         super().__init__()
+        self.channel = ProgressChannel()
+        self.source_dir = source_dir
         self.tasks = tasks
-        self.base_dir = base_dir
+        self.plan = plan
+        self.error = None
+
+    def on_event(self, event):
+        kind = event["event"]
+        if kind == "missing":
+            self.channel.log(f"[Skipped] Not found: {event['model']} - {event['version']}")
+        elif kind == "deleted_manifest":
+            self.channel.log(f"[Deleted] {event['path']}")
+        elif kind == "deleted_blob":
+            self.channel.log(f"[Deleted] {os.path.basename(event['path'])} ({format_size(event['size'])})")
+        elif kind == "error":
+            self.channel.log(f"[Error] Delete failed: {event['path'] or ''} -> {event['error']}")
+        elif kind == "summary":
+            self.channel.log(
+                f"\nDeleted {event['manifests']} manifests and {event['blobs']} blob files, "
+                f"freed {format_size(event['bytes'])}"
+            )
+
+    def run(self):
+        from ollama_organizer.blobgc import plan_gc, execute_gc
+        if self.plan is None:
+            # Planning reads every manifest and stats every blob; the window asks for confirmation before deleting
+            try:
+                self.plan = plan_gc(self.source_dir, self.tasks or (), sweep_orphans=self.tasks is None)
+            except Exception as e:
+                self.error = e
+            self.planned.emit()
+            return
+        try:
+            execute_gc(self.plan, self.on_event)
+        except Exception as e:
+            self.channel.log(f"[Error] Delete failed -> {e}")
+        self.finished.emit()
+
+class RestoreThread(QThread):
+    planned = pyqtSignal()
+    finished = pyqtSignal()
+
+    def __init__(self, archive_dir, store_dir, dry_run=False):
+        super().__init__()
+        self.channel = ProgressChannel()
+        self.archive_dir = archive_dir
+        self.store_dir = store_dir
+        self.dry_run = dry_run
+        self.plan = None
+        self.error = None
+
+    def on_event(self, event):
+        kind = event["event"]
+        if kind == "restore_start":
+            self.channel.log(f"Total model versions to restore: {event['total']}\n")
+        elif kind == "skipped":
+            self.channel.log(f"[Skipped] Model: {event['model']}, Version: {event['version']} (already installed)")
+        elif kind == "conflict":
+            self.channel.log(f"[Conflict] Model: {event['model']}, Version: {event['version']} (the Ollama root has a different manifest, not replaced)")
+        elif kind == "restore_plan":
+            self.channel.log(
+                f"Blob files to transfer: {event['blobs']} ({format_size(event['bytes'])}), "
+                f"already in Ollama root: {event['present_blobs']} ({format_size(event['present_bytes'])})\n"
+            )
+        elif kind == "done":
+            self.channel.log(f"[Done] Model: {event['model']}, Version: {event['version']}")
+        elif kind == "error":
+            self.channel.log(f"[Error] {event['error']}")
+        elif kind == "progress":
+            self.channel.progress(event['finished'], event['total'])
+        elif kind == "throughput":
+            self.channel.throughput(event)
+        elif kind == "blob":
+            self.channel.blob_finished(event['blob'])
+        elif kind == "restore_summary":
+            methods = ", ".join(f"{count} by {method}" for method, count in sorted(event["methods"].items()))
+            self.channel.log(
+                f"\nRestored {event['success']}/{event['total']} (already installed {event['skipped']}, "
+                f"conflicts {event['conflicts']}, failed {event['failed']}) in {event['elapsed']:.2f} seconds, "
+                f"{event['blob_files']} blob files transferred" + (f" ({methods})" if methods else "")
+            )
 
     def run(self):
-        total = len(self.tasks)
-        done = 0
-        for model_name, model_version in self.tasks:
-            version_dir = os.path.join(self.base_dir, model_name, model_version)
+        from ollama_organizer.restore import restore
+        if self.dry_run:
+            # The dry run compares the whole archive with the store, so it runs here as well
             try:
-                if os.path.isdir(version_dir):
-                    shutil.rmtree(version_dir)
-                    self.progress.emit(f"[Deleted] {model_name} - {model_version}")
-                else:
-                    self.progress.emit(f"[Skipped] Not found: {model_name} - {model_version}")
+                self.plan = restore(self.archive_dir, self.store_dir, dry_run=True)
             except Exception as e:
-                self.progress.emit(f"[Error] Delete failed: {model_name} - {model_version} -> {str(e)}")
-            done += 1
-            self.progress.emit(f"Progress: {done}/{total}")
+                self.error = e
+            self.planned.emit()
+            return
+        try:
+            restore(self.archive_dir, self.store_dir, on_event=self.on_event, progress_interval=PROGRESS_INTERVAL)
+        except Exception as e:
+            self.channel.log(f"[Error] Restore failed -> {e}")
+        self.finished.emit()
+
+class VerifyArchiveThread(QThread):
+    finished = pyqtSignal()
+
+    def __init__(self, target_dir, verify_log_file, workers=None):
+        super().__init__()
+        self.channel = ProgressChannel()
+        self.target_dir = target_dir
+        self.verify_log_file = verify_log_file
+        self.workers = workers
+
+    def on_blob_checked(self, path, ok, done, total):
+        if not ok:
+            self.channel.log(f"[Corrupted] {path}")
+        self.channel.progress(done, total)
+
+    def run(self):
+        from ollama_organizer.integrity import verify_archive
+        start_time = time.time()
+        self.channel.log(f"Verifying archive: {self.target_dir}\n")
+        try:
+            report = verify_archive(self.target_dir, self.workers, self.on_blob_checked)
+        except Exception as e:
+            self.channel.log(f"[Error] Verify failed -> {e}")
+            self.finished.emit()
+            return
+        for path in report['missing']:
+            self.channel.log(f"[Missing] {path}")
+        failed = len(report['corrupted']) + len(report['missing'])
+        if failed:
+            with open(self.verify_log_file, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+
+        elapsed = time.time() - start_time
+        msg = (
+            f"\n====== Verification Completed ======\n"
+            f"Blob files checked: {report['checked']}\n"
+            f"Corrupted: {len(report['corrupted'])}\n"
+            f"Missing: {len(report['missing'])}"
+        )
+        if failed:
+            msg += f"\nFailed details written to: {self.verify_log_file}"
+        msg += f"\nElapsed time: {elapsed:.2f} seconds"
+        self.channel.log(msg)
         self.finished.emit()
 
-class MyListWidget(QListWidget):
+class CatalogScanThread(QThread):
+    loaded = pyqtSignal(list)
+
+    def __init__(self, catalog, source_dir):
+        super().__init__()
+        self.catalog = catalog
+        self.source_dir = source_dir
+        self.error = None
+
+    def run(self):
+        try:
+            entries = self.catalog.refresh(self.source_dir)
+        except Exception as e:
+            self.error = e
+            entries = []
+        self.loaded.emit(entries)
+
+class ModelTableModel(QAbstractTableModel):
+    HEADERS = ["Model", "Version", "Architecture", "Quant", "Params", "Context", "Size", "Shared", "Frees", "Modified"]
+    FETCH_BATCH = 200
+    SORT_KEYS = [
+        lambda e: (e['model'], e['version']),
+        lambda e: (e['version'], e['model']),
+        lambda e: (e['architecture'] or '', e['model']),
+        lambda e: (e['quantization'] or '', e['model']),
+        lambda e: e['parameters'] or 0,
+        lambda e: e['context_length'] or 0,
+        lambda e: e['total_size'],
+        lambda e: e['shared_bytes'],
+        lambda e: e['freed_bytes'],
+        lambda e: e['mtime_ns'],
+    ]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.all_entries = []
+        self.entries = []
+        self.loaded = 0
+        self.checked = set()
+        self.filter_tokens = []
+        self.sort_column = 0
+        self.sort_order = Qt.AscendingOrder
+
+    @staticmethod
+    def model_ref(entry):
+        return entry['model'], entry['version']
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self.loaded < len(self.entries)
+
+    def fetchMore(self, parent):
+        count = min(self.FETCH_BATCH, len(self.entries) - self.loaded)
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.entries[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return entry['model']
+            if column == 1:
+                return entry['version']
+            if column == 2:
+                return entry['architecture'] or ''
+            if column == 3:
+                return entry['quantization'] or ''
+            if column == 4:
+                return format_count(entry['parameters']) if entry['parameters'] else ''
+            if column == 5:
+                return str(entry['context_length']) if entry['context_length'] else ''
+            if column == 6:
+                return format_size(entry['total_size'])
+            if column == 7:
+                return format_size(entry['shared_bytes']) if entry['shared_blobs'] else ''
+            if column == 8:
+                return format_size(entry['freed_bytes'])
+            return time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['mtime_ns'] / 1e9))
+        if role == Qt.CheckStateRole and column == 0:
+            return Qt.Checked if self.model_ref(entry) in self.checked else Qt.Unchecked
+        if role == Qt.TextAlignmentRole and column in (4, 5, 6, 7, 8):
+            return Qt.AlignRight | Qt.AlignVCenter
+        if role == Qt.ToolTipRole and entry.get('error'):
+            return entry['error']
+        if role == Qt.UserRole:
+            return self.model_ref(entry)
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() == 0:
+            flags |= Qt.ItemIsUserCheckable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.CheckStateRole or index.column() != 0:
+            return False
+        ref = self.model_ref(self.entries[index.row()])
+        if value == Qt.Checked:
+            self.checked.add(ref)
+        else:
+            self.checked.discard(ref)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        return True
+
+    def toggle(self, row):
+        index = self.index(row, 0)
+        checked = self.model_ref(self.entries[row]) in self.checked
+        self.setData(index, Qt.Unchecked if checked else Qt.Checked, Qt.CheckStateRole)
+
+    def _sort_entries(self):
+        self.entries.sort(key=self.SORT_KEYS[self.sort_column], reverse=self.sort_order == Qt.DescendingOrder)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sort_column, self.sort_order = column, order
+        self.beginResetModel()
+        self._sort_entries()
+        self.endResetModel()
+
+    def _matches(self, entry):
+        text = ' '.join([f"{entry['model']}:{entry['version']}", entry['architecture'] or '',
+                         entry['quantization'] or '', entry['size_label'] or '']).lower()
+        return all(token in text for token in self.filter_tokens)
+
+    def _reset(self):
+        self.beginResetModel()
+        self.entries = [e for e in self.all_entries if self._matches(e)]
+        self._sort_entries()
+        self.loaded = min(max(self.loaded, self.FETCH_BATCH), len(self.entries))
+        self.endResetModel()
+
+    def set_entries(self, entries):
+        self.all_entries = list(entries)
+        self.checked &= {self.model_ref(e) for e in self.all_entries}
+        self._reset()
+
+    def set_filter(self, text):
+        self.filter_tokens = text.lower().split()
+        self._reset()
+
+    def checked_refs(self):
+        return [self.model_ref(e) for e in self.entries if self.model_ref(e) in self.checked]
+
+class MyTableView(QTableView):
     def mousePressEvent(self, event):
-        item = self.itemAt(event.pos())
-        if item is not None:
-            rect = self.visualItemRect(item)
+        index = self.indexAt(event.pos())
+        if index.isValid() and event.button() == Qt.LeftButton:
+            rect = self.visualRect(self.model().index(index.row(), 0))
             check_rect = QRect(rect.left() + 4, rect.top() + (rect.height() - 16) // 2, 20, 20)
-            if not check_rect.contains(event.pos()):
-                if item.checkState() == Qt.Checked:
-                    item.setCheckState(Qt.Unchecked)
-                else:
-                    item.setCheckState(Qt.Checked)
+            if index.column() != 0 or not check_rect.contains(event.pos()):
+                self.model().toggle(index.row())
                 return
         super().mousePressEvent(event)
 
 
+class LogView(QPlainTextEdit):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setMaximumBlockCount(LOG_LIMIT)
+
+    def append(self, text):
+        self.appendPlainText(text)
+
+class BlobProgressPanel(QWidget):
+    # One bar per blob being copied; bars are reused instead of created per blob
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.bar_layout = QVBoxLayout(self)
+        self.bar_layout.setContentsMargins(0, 0, 0, 0)
+        self.bars = []
+        self.hide()
+
+    def update_blobs(self, blobs):
+        items = sorted(blobs.items())
+        while len(self.bars) < len(items):
+            bar = QProgressBar(self)
+            bar.setRange(0, 1000)
+            self.bar_layout.addWidget(bar)
+            self.bars.append(bar)
+        for bar, (blob_name, (done, size)) in zip(self.bars, items):
+            bar.setValue(int(done * 1000 / size) if size else 1000)
+            bar.setFormat(f"{blob_name[:19]}  {format_size(done)} / {format_size(size)}")
+            bar.show()
+        for bar in self.bars[len(items):]:
+            bar.hide()
+        self.setVisible(bool(items))
+
+
 class OllamaManager(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -190,15 +515,36 @@ class OllamaManager(QMainWindow):
         self.setGeometry(100, 100, 900, 700)
         self.font = QFont("Arial", 14)
         self.config_file = CONFIG_FILE
+        self.catalog = ModelCatalog(CATALOG_FILE)
+        self.scan_thread = None
+        self.organize_thread = None
+        self.scan_pending = False
+        self.channels = []
         self.root_dir_Ollama = r"C:\Users\xxx\.ollama"
         self.root_dir_Ollama_new = r"L:\Backup\Ollama_Backup\2025.08.01"
+        self.blob_store_mode = 'copy'
+        self.verify_workers = os.cpu_count()
+        self.source_workers = SOURCE_WORKERS
+        self.target_workers = TARGET_WORKERS
+        self.verify_existing = False
+        self.mirror_dirs = []
+        self.bandwidth_limit = 0
+        self.low_io_priority = False
+        self.adaptive_workers = False
+        self.shared_output = False
+        self.device_workers = {}
+        self.watch_new_models = False
+        self.manifest_watcher = None
+        self.auto_queue = {}
+        self.manifest_signals = ManifestSignals()
+        self.manifest_signals.changed.connect(self.on_manifests_changed)
         self.load_config()
-        self.model_base_dir = os.path.join(self.root_dir_Ollama, r'models\manifests\registry.ollama.ai\library')
-        self.model_name_list = os.listdir(self.model_base_dir) if os.path.exists(self.model_base_dir) else []
         self.processed_record_file = os.path.join(self.root_dir_Ollama_new, 'processed_models.json')
         self.error_log_file = os.path.join(self.root_dir_Ollama_new, 'error_log.json')
         self.init_ui()
         self.load_models()
+        if self.watch_check.isChecked():
+            self.start_manifest_watcher()
 
     def init_ui(self):
         font = self.font
@@ -239,55 +585,157 @@ class OllamaManager(QMainWindow):
         path2_layout.addWidget(self.select_dir_button_2)
         path2_layout.addWidget(self.open_dir_button_2)
 
+        self.mirror_edit = QLineEdit(";".join(self.mirror_dirs), self)
+        self.mirror_edit.setFont(font)
+        self.mirror_edit.setPlaceholderText("More output directories, separated by ; (each blob is read once)")
+        self.mirror_edit.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.add_mirror_button = QPushButton("Add Mirror Directory", self)
+        self.add_mirror_button.setFont(font)
+        self.add_mirror_button.setFixedWidth(286)
+        self.add_mirror_button.clicked.connect(self.add_mirror_dir)
+
+        mirror_layout = QHBoxLayout()
+        mirror_layout.addWidget(self.mirror_edit)
+        mirror_layout.addWidget(self.add_mirror_button)
+
+        store_label = QLabel("Blob Storage:")
+        store_label.setFont(font)
+        self.store_mode_combo = QComboBox(self)
+        self.store_mode_combo.setFont(font)
+        self.store_mode_combo.addItem("Copy per version", 'copy')
+        self.store_mode_combo.addItem("Shared pool (hardlink)", 'hardlink')
+        self.store_mode_combo.addItem("Shared pool (reflink)", 'reflink')
+        self.store_mode_combo.addItem("Shared pool (symlink)", 'symlink')
+        self.store_mode_combo.setCurrentIndex(max(self.store_mode_combo.findData(self.blob_store_mode), 0))
+
+        self.dry_run_check = QCheckBox("Dry run (report only)", self)
+        self.dry_run_check.setFont(font)
+        self.bundle_check = QCheckBox("Export as .tar bundles", self)
+        self.bundle_check.setFont(font)
+        self.bundle_check.toggled.connect(lambda checked: self.dry_run_check.setEnabled(not checked))
+
+        store_layout = QHBoxLayout()
+        store_layout.addWidget(store_label)
+        store_layout.addWidget(self.store_mode_combo)
+        store_layout.addWidget(self.dry_run_check)
+        store_layout.addWidget(self.bundle_check)
+        store_layout.addStretch(1)
+
+        limit_label = QLabel("Bandwidth Limit:")
+        limit_label.setFont(font)
+        self.limit_spin = QSpinBox(self)
+        self.limit_spin.setFont(font)
+        self.limit_spin.setRange(0, 100000)
+        self.limit_spin.setSuffix(" MB/s")
+        self.limit_spin.setSpecialValueText("Unlimited")
+        self.limit_spin.setValue(self.bandwidth_limit)
+        self.limit_spin.valueChanged.connect(self.on_bandwidth_limit_changed)
+        self.low_priority_check = QCheckBox("Low I/O priority, drop copied files from page cache", self)
+        self.low_priority_check.setFont(font)
+        self.low_priority_check.setChecked(self.low_io_priority)
+        self.adaptive_check = QCheckBox("Auto-tune copy threads per disk", self)
+        self.adaptive_check.setFont(font)
+        self.adaptive_check.setChecked(self.adaptive_workers)
+        self.watch_check = QCheckBox("Auto-organize new pulls", self)
+        self.watch_check.setFont(font)
+        self.watch_check.setChecked(self.watch_new_models)
+        self.watch_check.toggled.connect(self.on_watch_toggled)
+
+        limit_layout = QHBoxLayout()
+        limit_layout.addWidget(limit_label)
+        limit_layout.addWidget(self.limit_spin)
+        limit_layout.addWidget(self.low_priority_check)
+        limit_layout.addWidget(self.adaptive_check)
+        limit_layout.addWidget(self.watch_check)
+        limit_layout.addStretch(1)
+
         path_layout = QVBoxLayout()
         path_layout.addLayout(path1_layout)
         path_layout.addLayout(path2_layout)
+        path_layout.addLayout(mirror_layout)
+        path_layout.addLayout(store_layout)
+        path_layout.addLayout(limit_layout)
 
-        self.model_list_widget = MyListWidget(self)
-        self.model_list_widget.setFont(font)
-        self.model_list_widget.setSelectionMode(QAbstractItemView.MultiSelection)
-        self.model_list_widget.itemChanged.connect(self.on_model_item_changed)
+        self.model_table = ModelTableModel(self)
+        self.model_view = MyTableView(self)
+        self.model_view.setFont(font)
+        self.model_view.setModel(self.model_table)
+        self.model_view.setSelectionMode(QAbstractItemView.NoSelection)
+        self.model_view.verticalHeader().setVisible(False)
+        self.model_view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.model_view.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.model_view.setSortingEnabled(True)
+        self.model_view.sortByColumn(0, Qt.AscendingOrder)
 
-        self.text_log = QTextEdit(self)
-        self.text_log.setReadOnly(True)
+        self.filter_edit = QLineEdit(self)
+        self.filter_edit.setFont(font)
+        self.filter_edit.setPlaceholderText('Filter by name, architecture, quant or size label, e.g. "llama q4_k"')
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_edit.textChanged.connect(self.model_table.set_filter)
+
+        self.text_log = LogView(self)
         self.text_log.setFont(font)
         self.text_log.setMinimumHeight(200)
 
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.hide()
+        self.blob_panel = BlobProgressPanel(self)
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setInterval(FLUSH_INTERVAL_MS)
+        self.flush_timer.timeout.connect(self.flush_progress)
+
         self.btn_refresh = QPushButton("Refresh", self)
         self.btn_organize = QPushButton("Organize", self)
+        self.btn_verify = QPushButton("Verify Archive", self)
         self.btn_delete = QPushButton("Delete", self)
+        self.btn_clean = QPushButton("Clean Up Blobs", self)
+        self.btn_restore = QPushButton("Restore to Ollama", self)
         self.btn_exit = QPushButton("Exit", self)
 
         self.btn_refresh.setStyleSheet("background-color: #2196F3; color: white;")
         self.btn_organize.setStyleSheet("background-color: #00FF00; color: black;")
+        self.btn_verify.setStyleSheet("background-color: #FF9800; color: black;")
         self.btn_delete.setStyleSheet("background-color: #FF0000; color: white;")
+        self.btn_clean.setStyleSheet("background-color: #9C27B0; color: white;")
+        self.btn_restore.setStyleSheet("background-color: #009688; color: white;")
         self.btn_exit.setStyleSheet("background-color: #000000; color: white;")
 
-        for btn in [self.btn_refresh, self.btn_organize, self.btn_delete, self.btn_exit]:
+        for btn in [self.btn_refresh, self.btn_organize, self.btn_verify, self.btn_delete, self.btn_clean, self.btn_restore,
+                    self.btn_exit]:
             btn.setFont(font)
 
         self.btn_refresh.clicked.connect(self.load_models)
         self.btn_organize.clicked.connect(self.on_organize)
+        self.btn_verify.clicked.connect(self.on_verify)
         self.btn_delete.clicked.connect(self.on_delete)
+        self.btn_clean.clicked.connect(self.on_clean_blobs)
+        self.btn_restore.clicked.connect(self.on_restore)
         self.btn_exit.clicked.connect(self.close)
 
         label = QLabel("Log / Progress:")
         label.setFont(font)
 
         btn_layout = QVBoxLayout()
-        for btn in [self.btn_refresh, self.btn_organize, self.btn_delete]:
+        for btn in [self.btn_refresh, self.btn_organize, self.btn_verify, self.btn_delete, self.btn_clean, self.btn_restore]:
             btn_layout.addWidget(btn)
         btn_layout.addStretch(1)
         btn_layout.addWidget(self.btn_exit)
 
+        list_layout = QVBoxLayout()
+        list_layout.addWidget(self.filter_edit)
+        list_layout.addWidget(self.model_view)
+
         center_layout = QHBoxLayout()
-        center_layout.addWidget(self.model_list_widget, stretch=2)
+        center_layout.addLayout(list_layout, stretch=2)
         center_layout.addLayout(btn_layout, stretch=1)
 
         main_layout = QVBoxLayout()
         main_layout.addLayout(path_layout)
         main_layout.addLayout(center_layout)
         main_layout.addWidget(label)
+        main_layout.addWidget(self.progress_bar)
+        main_layout.addWidget(self.blob_panel)
         main_layout.addWidget(self.text_log)
 
         main_widget.setLayout(main_layout)
@@ -312,10 +760,10 @@ class OllamaManager(QMainWindow):
         if dir_path:
             self.root_dir_Ollama = dir_path
             self.dir_edit_1.setText(self.root_dir_Ollama)
-            self.model_base_dir = os.path.join(self.root_dir_Ollama, r'models\manifests\registry.ollama.ai\library')
-            self.model_name_list = os.listdir(self.model_base_dir) if os.path.exists(self.model_base_dir) else []
             self.save_config()
             self.load_models()
+            if self.manifest_watcher is not None:
+                self.start_manifest_watcher()
 
     def select_dir_2(self):
         dir_path = QFileDialog.getExistingDirectory(self, "Select Output Directory", self.root_dir_Ollama_new)
@@ -324,27 +772,46 @@ class OllamaManager(QMainWindow):
             self.dir_edit_2.setText(self.root_dir_Ollama_new)
             self.save_config()
 
+    def add_mirror_dir(self):
+        dir_path = QFileDialog.getExistingDirectory(self, "Select Mirror Directory", self.root_dir_Ollama_new)
+        if dir_path and dir_path not in self.get_mirror_dirs():
+            self.mirror_edit.setText(";".join(self.get_mirror_dirs() + [dir_path]))
+            self.save_config()
+
+    def get_mirror_dirs(self):
+        return [path.strip() for path in self.mirror_edit.text().split(';') if path.strip()]
+
     def load_models(self):
-        self.model_list_widget.blockSignals(True)
-        self.model_list_widget.clear()
-        self.model_name_list = os.listdir(self.model_base_dir) if os.path.exists(self.model_base_dir) else []
-        for model_name in self.model_name_list:
-            version_dir = os.path.join(self.model_base_dir, model_name)
-            if not os.path.isdir(version_dir):
-                continue
-            for model_version in os.listdir(version_dir):
-                item = QListWidgetItem(f"{model_name} - {model_version}")
-                item.setCheckState(Qt.Unchecked)
-                self.model_list_widget.addItem(item)
-        self.model_list_widget.blockSignals(False)
-        self.text_log.append(f"[Refreshed] {self.model_list_widget.count()} models loaded.")
+        if self.scan_thread is not None and self.scan_thread.isRunning():
+            self.scan_pending = True
+            return
+        self.scan_pending = False
+        self.btn_refresh.setEnabled(False)
+        self.scan_thread = CatalogScanThread(self.catalog, self.root_dir_Ollama)
+        self.scan_thread.loaded.connect(self.on_models_loaded)
+        self.scan_thread.start()
 
-    def on_model_item_changed(self, item):
-        pass
+    def on_models_loaded(self, entries):
+        self.btn_refresh.setEnabled(True)
+        if self.scan_thread.error is not None:
+            # The table keeps the last list that loaded
+            self.text_log.append(f"[Error] Refresh failed -> {self.scan_thread.error}")
+        else:
+            self.model_table.set_entries(entries)
+            self.text_log.append(f"[Refreshed] {len(entries)} models loaded.")
+            stats = self.catalog.stats
+            if stats:
+                self.text_log.append(
+                    f"[Storage] {format_size(stats['stored_bytes'])} on disk for "
+                    f"{format_size(stats['logical_bytes'])} of model data, dedup ratio {stats['dedup_ratio']:.2f}x"
+                    + (f", {format_size(stats['unreferenced_bytes'])} in {stats['unreferenced_blobs']} "
+                       f"unreferenced blobs" if stats['unreferenced_blobs'] else ""))
+        if self.scan_pending:
+            self.load_models()
 
     def on_organize(self):
-        selected_items = [item for item in self.model_list_widget.findItems("", Qt.MatchContains) if item.checkState() == Qt.Checked]
-        if not selected_items:
+        tasks = self.model_table.checked_refs()
+        if not tasks:
             self.text_log.append("Warning: Please select models to organize.")
             return
 
@@ -354,57 +821,273 @@ class OllamaManager(QMainWindow):
         self.error_log_file = os.path.join(self.root_dir_Ollama_new, 'error_log.json')
         self.save_config()
 
-        tasks = []
-        for item in selected_items:
-            model_name, model_version = item.text().split(" - ")
-            tasks.append((model_name, model_version))
-
         self.text_log.clear()
         self.text_log.append("Organizing selected models...\n")
+        self.start_organize(tasks, self.dry_run_check.isChecked(), self.bundle_check.isChecked(),
+                            self.low_priority_check.isChecked())
+
+    def start_organize(self, tasks, dry_run, bundle, low_io_priority):
         self.btn_organize.setEnabled(False)
 
-        self.organize_thread = OrganizeThread(tasks, self.root_dir_Ollama, self.root_dir_Ollama_new, self.processed_record_file, self.error_log_file)
-        self.organize_thread.signals.progress.connect(self.on_progress)
+        self.organize_thread = OrganizeThread(tasks, self.root_dir_Ollama, self.root_dir_Ollama_new, self.processed_record_file, self.error_log_file, self.store_mode_combo.currentData(),
+                                              self.source_workers, self.target_workers,
+                                              dry_run, self.verify_existing,
+                                              bundle, self.limit_spin.value(),
+                                              low_io_priority, self.get_mirror_dirs(),
+                                              self.adaptive_check.isChecked(), self.device_workers, self.shared_output)
         self.organize_thread.signals.finished.connect(self.on_organize_finished)
+        self.watch(self.organize_thread.channel)
         self.organize_thread.start()
 
-    def on_progress(self, msg):
-        self.text_log.append(msg)
-        self.text_log.ensureCursorVisible()
+    def on_watch_toggled(self, checked):
+        self.save_config()
+        if checked:
+            self.start_manifest_watcher()
+        else:
+            self.stop_manifest_watcher()
+            self.text_log.append("[Watch] Stopped watching for new pulls.")
+
+    def start_manifest_watcher(self):
+        self.stop_manifest_watcher()
+        self.manifest_watcher = ManifestWatcher(os.path.join(self.root_dir_Ollama, 'models', 'manifests'),
+                                                self.manifest_signals.changed.emit)
+        self.manifest_watcher.start()
+        self.text_log.append(f"[Watch] Watching {self.manifest_watcher.manifests_dir} for new pulls ({self.manifest_watcher.mode})")
+
+    def stop_manifest_watcher(self):
+        if self.manifest_watcher is not None:
+            self.manifest_watcher.stop()
+            self.manifest_watcher = None
+
+    def on_manifests_changed(self, refs):
+        self.text_log.append("[Watch] New or updated: " + ", ".join(f"{m}:{v}" for m, v in refs))
+        for ref in refs:
+            self.auto_queue[tuple(ref)] = None
+        self.load_models()
+        self.run_auto_organize()
+
+    def run_auto_organize(self):
+        # Pulls seen during a run are organized after it, with low I/O priority so Ollama keeps the disk
+        if not self.auto_queue or (self.organize_thread is not None and self.organize_thread.isRunning()):
+            return
+        tasks = list(self.auto_queue)
+        self.auto_queue.clear()
+        self.root_dir_Ollama_new = self.dir_edit_2.text().strip()
+        self.processed_record_file = os.path.join(self.root_dir_Ollama_new, 'processed_models.json')
+        self.error_log_file = os.path.join(self.root_dir_Ollama_new, 'error_log.json')
+        self.text_log.append("Auto-organizing newly pulled models...\n")
+        self.start_organize(tasks, False, False, True)
+
+    def on_bandwidth_limit_changed(self, value):
+        self.bandwidth_limit = value
+        if self.organize_thread is not None and self.organize_thread.isRunning():
+            self.organize_thread.throttle.set_rate(value * MB)
+
+    def watch(self, channel):
+        self.channels.append(channel)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setFormat("")
+        self.flush_timer.start()
+
+    def unwatch(self, channel):
+        self.flush_progress()
+        self.channels.remove(channel)
+        if not self.channels:
+            self.flush_timer.stop()
+            self.progress_bar.hide()
+            self.blob_panel.update_blobs({})
+
+    def flush_progress(self):
+        for channel in self.channels:
+            update = channel.drain()
+            if update is None:
+                continue
+            if update["dropped"]:
+                self.text_log.append(f"... {update['dropped']} earlier log lines not shown ...")
+            if update["lines"]:
+                self.text_log.append("\n".join(update["lines"]))
+            self.show_progress(update)
+
+    def show_progress(self, update):
+        counts, throughput = update["counts"], update["throughput"]
+        if throughput and throughput["total_bytes"]:
+            done, total = throughput["done_bytes"], throughput["total_bytes"]
+            text = (f"{format_size(done)} / {format_size(total)}  {throughput['mb_s']:.1f} MB/s  "
+                    f"ETA {format_duration(throughput['eta_seconds'])}")
+            if counts:
+                text = f"{counts[0]}/{counts[1]}  {text}"
+        elif counts:
+            done, total = counts
+            text = f"{done}/{total}"
+        else:
+            return
+        self.progress_bar.setValue(int(done * 1000 / total) if total else 1000)
+        self.progress_bar.setFormat(text)
+        self.progress_bar.show()
+        self.blob_panel.update_blobs(update["blobs"])
 
     def on_organize_finished(self):
+        self.unwatch(self.organize_thread.channel)
+        if self.organize_thread.adaptive:
+            self.device_workers = self.organize_thread.device_workers
+            self.save_config()
         self.btn_organize.setEnabled(True)
         self.text_log.append("\nOrganizing complete.")
         self.load_models()
+        self.run_auto_organize()
+
+    def on_verify(self):
+        self.root_dir_Ollama_new = self.dir_edit_2.text().strip()
+        if not os.path.isdir(self.root_dir_Ollama_new):
+            QMessageBox.warning(self, "Path Not Found", f"Directory does not exist: {self.root_dir_Ollama_new}")
+            return
+        self.save_config()
+
+        self.text_log.clear()
+        self.btn_verify.setEnabled(False)
+        verify_log_file = os.path.join(self.root_dir_Ollama_new, 'verify_log.json')
+        self.verify_thread = VerifyArchiveThread(self.root_dir_Ollama_new, verify_log_file, self.verify_workers)
+        self.verify_thread.finished.connect(self.on_verify_finished)
+        self.watch(self.verify_thread.channel)
+        self.verify_thread.start()
+
+    def on_verify_finished(self):
+        self.unwatch(self.verify_thread.channel)
+        self.btn_verify.setEnabled(True)
+        self.text_log.append("\nVerification complete.")
 
     def on_delete(self):
-        selected_items = [item for item in self.model_list_widget.findItems("", Qt.MatchContains) if item.checkState() == Qt.Checked]
-        if not selected_items:
+        tasks = self.model_table.checked_refs()
+        if not tasks:
             self.text_log.append("Warning: Please select models to delete.")
             return
-        reply = QMessageBox.question(self, "Confirm Delete", "Are you sure to delete selected models? This cannot be undone.", QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        self.plan_delete(tasks)
+
+    def on_clean_blobs(self):
+        self.plan_delete(None)
+
+    def plan_delete(self, tasks):
+        # tasks=None looks for blob files no manifest references
+        self.btn_delete.setEnabled(False)
+        self.btn_clean.setEnabled(False)
+        self.text_log.append("Counting blob references...")
+        self.delete_thread = DeleteFilesThread(self.root_dir_Ollama, tasks)
+        self.delete_thread.planned.connect(self.on_delete_planned)
+        self.delete_thread.start()
+
+    def on_delete_planned(self):
+        self.delete_thread.wait()
+        self.btn_delete.setEnabled(True)
+        self.btn_clean.setEnabled(True)
+        plan = self.delete_thread.plan
+        if plan is None:
+            self.text_log.append(f"[Error] Delete failed -> {self.delete_thread.error}")
+            return
+        if self.delete_thread.tasks is None:
+            if plan.errors:
+                for error in plan.errors:
+                    self.text_log.append(f"[Error] {error}")
+                self.text_log.append("Unreadable manifests found, no blob files will be removed.")
+                return
+            if not plan.blobs:
+                self.text_log.append("No unreferenced blob files found.")
+                return
+            reply = QMessageBox.question(
+                self, "Confirm Clean Up",
+                f"Remove {len(plan.blobs)} blob files no model references, freeing {format_size(plan.reclaim_bytes)}?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        else:
+            message = (
+                f"Are you sure to delete {len(plan.manifests)} selected model versions? This cannot be undone.\n\n"
+                f"{len(plan.blobs)} blob files no other model uses will be removed, freeing {format_size(plan.reclaim_bytes)}."
+            )
+            if plan.errors:
+                message += f"\n\n{len(plan.errors)} manifests could not be read, so no blob files will be removed."
+            reply = QMessageBox.question(self, "Confirm Delete", message, QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply != QMessageBox.Yes:
             return
-        tasks = []
-        for item in selected_items:
-            model_name, model_version = item.text().split(" - ")
-            tasks.append((model_name, model_version))
+        self.start_delete(plan)
 
+    def start_delete(self, plan):
+        self.text_log.clear()
         self.btn_delete.setEnabled(False)
-        self.delete_thread = DeleteFilesThread(tasks, self.model_base_dir)
-        self.delete_thread.progress.connect(self.on_progress)
+        self.btn_clean.setEnabled(False)
+        self.delete_thread = DeleteFilesThread(self.root_dir_Ollama, plan=plan)
         self.delete_thread.finished.connect(self.on_delete_finished)
+        self.watch(self.delete_thread.channel)
         self.delete_thread.start()
 
     def on_delete_finished(self):
+        self.unwatch(self.delete_thread.channel)
         self.btn_delete.setEnabled(True)
+        self.btn_clean.setEnabled(True)
         self.text_log.append("\nDeletion complete.")
         self.load_models()
 
+    def on_restore(self):
+        self.root_dir_Ollama = self.dir_edit_1.text().strip()
+        self.root_dir_Ollama_new = self.dir_edit_2.text().strip()
+        if not os.path.isdir(self.root_dir_Ollama_new):
+            QMessageBox.warning(self, "Path Not Found", f"Directory does not exist: {self.root_dir_Ollama_new}")
+            return
+        self.save_config()
+        self.btn_restore.setEnabled(False)
+        self.restore_thread = RestoreThread(self.root_dir_Ollama_new, self.root_dir_Ollama, dry_run=True)
+        self.restore_thread.planned.connect(self.on_restore_planned)
+        self.restore_thread.start()
+
+    def on_restore_planned(self):
+        self.restore_thread.wait()
+        self.btn_restore.setEnabled(True)
+        plan = self.restore_thread.plan
+        if plan is None:
+            self.text_log.append(f"[Error] Restore failed -> {self.restore_thread.error}")
+            return
+        to_restore = plan["total"] - plan["skipped"] - plan["conflicts"] - plan["failed"]
+        if not to_restore:
+            self.text_log.append(f"Nothing to restore: {plan['skipped']} model versions already installed, "
+                                 f"{plan['conflicts']} conflicts, {plan['failed']} unreadable.")
+            return
+        message = (
+            f"Restore {to_restore} model versions from the output directory into the Ollama root?\n\n"
+            f"{format_size(plan['bytes_to_copy'])} of blob files will be linked or copied, "
+            f"{plan['skipped']} versions are already installed."
+        )
+        if plan["conflicts"]:
+            message += f"\n\n{plan['conflicts']} versions have a different manifest in the Ollama root and will not be replaced."
+        reply = QMessageBox.question(self, "Confirm Restore", message, QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+
+        self.text_log.clear()
+        self.btn_restore.setEnabled(False)
+        self.restore_thread = RestoreThread(self.root_dir_Ollama_new, self.root_dir_Ollama)
+        self.restore_thread.finished.connect(self.on_restore_finished)
+        self.watch(self.restore_thread.channel)
+        self.restore_thread.start()
+
+    def on_restore_finished(self):
+        self.unwatch(self.restore_thread.channel)
+        self.btn_restore.setEnabled(True)
+        self.text_log.append("\nRestore complete.")
+        self.load_models()
+
     def save_config(self):
         config = {
             'root_dir_Ollama': self.dir_edit_1.text().strip(),
-            'root_dir_Ollama_new': self.dir_edit_2.text().strip()
+            'root_dir_Ollama_new': self.dir_edit_2.text().strip(),
+            'mirror_dirs': self.get_mirror_dirs(),
+            'blob_store_mode': self.store_mode_combo.currentData(),
+            'verify_workers': self.verify_workers,
+            'source_workers': self.source_workers,
+            'target_workers': self.target_workers,
+            'verify_existing': self.verify_existing,
+            'bandwidth_limit_mb_s': self.limit_spin.value(),
+            'low_io_priority': self.low_priority_check.isChecked(),
+            'adaptive_workers': self.adaptive_check.isChecked(),
+            'shared_output': self.shared_output,
+            'device_workers': self.device_workers,
+            'watch_new_models': self.watch_check.isChecked()
         }
         try:
             with open(self.config_file, 'w', encoding='utf-8') as f:
@@ -419,9 +1102,25 @@ class OllamaManager(QMainWindow):
                     config = json.load(f)
                 self.root_dir_Ollama = config.get('root_dir_Ollama', self.root_dir_Ollama)
                 self.root_dir_Ollama_new = config.get('root_dir_Ollama_new', self.root_dir_Ollama_new)
+                self.mirror_dirs = config.get('mirror_dirs', self.mirror_dirs)
+                self.blob_store_mode = config.get('blob_store_mode', self.blob_store_mode)
+                self.verify_workers = config.get('verify_workers', self.verify_workers)
+                self.source_workers = config.get('source_workers', self.source_workers)
+                self.target_workers = config.get('target_workers', self.target_workers)
+                self.verify_existing = config.get('verify_existing', self.verify_existing)
+                self.bandwidth_limit = config.get('bandwidth_limit_mb_s', self.bandwidth_limit)
+                self.low_io_priority = config.get('low_io_priority', self.low_io_priority)
+                self.adaptive_workers = config.get('adaptive_workers', self.adaptive_workers)
+                self.shared_output = config.get('shared_output', self.shared_output)
+                self.device_workers = config.get('device_workers', self.device_workers)
+                self.watch_new_models = config.get('watch_new_models', self.watch_new_models)
             except Exception:
                 pass
 
+    def closeEvent(self, event):
+        self.stop_manifest_watcher()
+        super().closeEvent(event)
+
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
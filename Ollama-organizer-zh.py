@@ -1,188 +1,489 @@
 import sys
 import os
 import json
-import shutil
 import time
-from tqdm import tqdm
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from threading import Lock
 from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, \
-    QListWidget, QListWidgetItem, QAbstractItemView, QFileDialog, QLineEdit, QSizePolicy, QTextEdit, QMessageBox
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QObject, QRect
+    QTableView, QHeaderView, QAbstractItemView, QFileDialog, QLineEdit, QSizePolicy, QPlainTextEdit, QMessageBox, QComboBox, QCheckBox, \
+    QProgressBar, QSpinBox
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QObject, QRect, QAbstractTableModel, QModelIndex, QTimer
 from PyQt5.QtGui import QFont
+from ollama_organizer.scheduler import SOURCE_WORKERS, TARGET_WORKERS
+from ollama_organizer.utils import format_size, format_duration, format_count
+from ollama_organizer.catalog import ModelCatalog
+from ollama_organizer.progress import ProgressChannel, LOG_LIMIT
+from ollama_organizer.throttle import TokenBucket
+from ollama_organizer.metrics import MB
+from ollama_organizer.watcher import ManifestWatcher
 
 CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')
-MAX_THREADS = 3
-
-def make_dir(path):
-    if not os.path.exists(path):
-        os.makedirs(path)
-
-def copy_model_files_and_verify(model_name, model_version, root_dir_Ollama_new, root_dir_Ollama, blobs_dir_cache):
-    try:
-        root_dir_models = os.path.join(root_dir_Ollama, 'models')
-        manifests_dir = os.path.join(root_dir_models, f'manifests/registry.ollama.ai/library/{model_name}')
-        model_offer_rel_dir = f'manifests/registry.ollama.ai/library/{model_name}'
-        root_dir_new_models = os.path.join(root_dir_Ollama_new, model_version, 'models')
-        blobs_dir_new = os.path.join(root_dir_new_models, 'blobs')
-        model_dir_new = os.path.join(root_dir_new_models, model_offer_rel_dir)
-        model_config_path = os.path.join(manifests_dir, model_version)
-        model_config_path_new = os.path.join(model_dir_new, model_version)
-        make_dir(model_dir_new)
-        make_dir(blobs_dir_new)
-        shutil.copy(model_config_path, model_config_path_new)
-        with open(model_config_path, 'r', encoding='utf-8') as f:
-            content = json.load(f)
-        config_digest = content['config']['digest'].replace('sha256:', 'sha256-')
-        digest_src = os.path.join(blobs_dir_cache, config_digest)
-        digest_dst = os.path.join(blobs_dir_new, config_digest)
-        shutil.copy(digest_src, digest_dst)
-        if not os.path.exists(digest_dst):
-            raise RuntimeError(f"缺失 config digest 文件：{digest_dst}")
-        layer_digests = []
-        for layer in content['layers']:
-            digest = layer['digest'].replace('sha256:', 'sha256-')
-            src = os.path.join(blobs_dir_cache, digest)
-            dst = os.path.join(blobs_dir_new, digest)
-            shutil.copy(src, dst)
-            if not os.path.exists(dst):
-                raise RuntimeError(f"缺失 layer digest 文件：{dst}")
-            layer_digests.append(layer['digest'])
-        return True, config_digest, layer_digests
-    except Exception as e:
-        return False, f"{model_name}/{model_version} -> {e}", None
+CATALOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalog_cache.json')
+FLUSH_INTERVAL_MS = 100
+PROGRESS_INTERVAL = 0.2
 
 class WorkerSignals(QObject):
-    progress = pyqtSignal(str)
     result = pyqtSignal(dict)
     finished = pyqtSignal()
 
+class ManifestSignals(QObject):
+    changed = pyqtSignal(list)
+
 class OrganizeThread(QThread):
-    def __init__(self, tasks, root_dir_Ollama, root_dir_Ollama_new, processed_record_file, error_log_file):
+    def __init__(self, tasks, root_dir_Ollama, root_dir_Ollama_new, processed_record_file, error_log_file, link_mode='copy',
+                 source_workers=SOURCE_WORKERS, target_workers=TARGET_WORKERS, dry_run=False, verify_existing=False,
+                 bundle=False, bandwidth_limit=0, low_io_priority=False, mirror_dirs=(), adaptive=False,
+                 device_workers=None, shared_output=False):
         super().__init__()
         self.tasks = tasks
         self.root_dir_Ollama = root_dir_Ollama
         self.root_dir_Ollama_new = root_dir_Ollama_new
         self.processed_record_file = processed_record_file
         self.error_log_file = error_log_file
+        self.link_mode = link_mode
+        self.source_workers = source_workers
+        self.target_workers = target_workers
+        self.dry_run = dry_run
+        self.verify_existing = verify_existing
+        self.bundle = bundle
+        self.throttle = TokenBucket(bandwidth_limit * MB)
+        self.low_io_priority = low_io_priority
+        self.mirror_dirs = list(mirror_dirs)
+        self.adaptive = adaptive
+        self.device_workers = dict(device_workers or {})
+        self.shared_output = shared_output
         self.signals = WorkerSignals()
+        self.channel = ProgressChannel()
 
-    def run(self):
-        processed_records = {}
-        if os.path.exists(self.processed_record_file):
-            with open(self.processed_record_file, 'r', encoding='utf-8') as f:
-                processed_records = json.load(f)
-        blobs_dir_cache = os.path.join(self.root_dir_Ollama, 'models', 'blobs')
-
-        success_models = 0
-        failed_models = 0
-        total_digests = 0
-        failed_list = []
-        total_models = len(self.tasks)
-        skipped_models = 0
+    def on_event(self, event):
+        kind = event["event"]
+        where = f" -> {event['target']}" if event.get("target") else ""
+        if kind == "start":
+            self.channel.log(f"本次任务总共 {event['total']} 个模型版本")
+            if event.get("targets"):
+                self.channel.log("输出目录：" + "，".join(event["targets"]))
+            self.channel.log(f"Blob 存储方式：{event['link_mode']}\n")
+        elif kind == "bundle_start":
+            self.channel.log(f"本次任务总共导出 {event['total']} 个模型版本")
+            self.channel.log(f"元数据压缩方式：{event['codec']}\n")
+        elif kind == "bundle_summary":
+            msg = f"\n====== 导出完成 ======\n总共模型版本数：{event['total']}\n未变化的模型数：{event['skipped']}\n成功导出模型数：{event['success']}\n失败模型数：{event['failed']}\n写入数据量：{format_size(event['bytes'])}\n打包文件目录：{self.bundle_dir}\n总耗时：{event['elapsed']:.2f} 秒"
+            self.channel.log(msg)
+        elif kind == "skipped":
+            self.channel.log(f"[跳过] 模型：{event['model']} 版本：{event['version']}{where}")
+        elif kind == "stale":
+            self.channel.log(f"[已过期] 模型：{event['model']} 版本：{event['version']}（manifest 已变化）{where}")
+        elif kind == "plan":
+            self.channel.log(
+                f"需要复制的 blob 文件数：{event['blobs']}（{format_size(event['bytes'])}），"
+                f"目标目录已存在：{event['present_blobs']}（{format_size(event['present_bytes'])}）"
+            )
+        elif kind == "done":
+            self.channel.log(f"[完成] 模型：{event['model']} 版本：{event['version']}{where}")
+        elif kind == "error":
+            self.channel.log(f"[错误] {event['error']}{where}")
+        elif kind == "progress":
+            self.channel.progress(event['finished'], event['total'])
+        elif kind == "throughput":
+            self.channel.throughput(event)
+        elif kind == "blob":
+            self.channel.blob_finished(event['blob'])
+        elif kind == "summary" and event["dry_run"]:
+            msg = f"\n====== 预演（不写入文件）======\n已是最新：{event['up_to_date']}\n已过期：{event['stale']}\n待整理：{event['to_organize']}\n预计传输数据量：{format_size(event['bytes_to_copy'])}"
+            self.channel.log(msg)
+        elif kind == "summary":
+            msg = f"\n====== 多线程整理完成 ======\n总共模型版本数：{event['total']}\n已跳过的模型数：{event['skipped']}\n成功整理模型数：{event['success']}\n失败模型数：{event['failed']}\n总共复制 blob 文件数：{event['blob_files']}\n传输数据量：{format_size(event['bytes_copied'])}\n平均速度：{event['average_mb_s'] or 0:.1f} MB/s"
+            if event['failed'] > 0:
+                msg += f"\n失败模型详情已写入：{event['error_log_file']}"
+            msg += f"\n运行报告已写入：{event['run_report_file']}"
+            if self.adaptive and event['device_workers']:
+                # 自动调整后每个磁盘的复制线程数，下次整理从这里开始
+                msg += "\n各磁盘复制线程数：" + "，".join(f"{name}: {n}" for name, n in sorted(event['device_workers'].items()))
+            msg += f"\n总耗时：{event['elapsed']:.2f} 秒"
+            self.channel.log(msg)
 
-        start_time = time.time()
-        self.signals.progress.emit(f"本次任务总共 {total_models} 个模型版本\n")
-
-        with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-            futures = {}
-            for model_name, model_version in self.tasks:
-                if model_name in processed_records and model_version in processed_records[model_name]:
-                    skipped_models += 1
-                    msg = f"[跳过] 模型：{model_name} 版本：{model_version}"
-                    self.signals.progress.emit(msg)
-                    continue
-                processed_records.setdefault(model_name, {})
-                new_model_dir = os.path.join(self.root_dir_Ollama_new, model_name)
-                future = executor.submit(
-                    copy_model_files_and_verify,
-                    model_name, model_version,
-                    new_model_dir, self.root_dir_Ollama,
-                    blobs_dir_cache
-                )
-                futures[future] = (model_name, model_version)
-
-            finished_count = skipped_models
-            for future in as_completed(futures):
-                model_name, model_version = futures[future]
-                try:
-                    success, result, layers = future.result()
-                    if success:
-                        processed_records[model_name][model_version] = {
-                            "config_digest": result,
-                            "layers_digest": layers
-                        }
-                        with open(self.processed_record_file, 'w', encoding='utf-8') as f:
-                            json.dump(processed_records, f, indent=2, ensure_ascii=False)
-                        success_models += 1
-                        total_digests += 1 + len(layers)
-                        msg = f"[完成] 模型：{model_name} 版本：{model_version}"
-                        self.signals.progress.emit(msg)
-                    else:
-                        failed_models += 1
-                        failed_list.append({"model": model_name, "version": model_version, "error": result})
-                        msg = f"[错误] {result}"
-                        self.signals.progress.emit(msg)
-                except Exception as e:
-                    failed_models += 1
-                    failed_list.append({"model": model_name, "version": model_version, "error": str(e)})
-                    msg = f"[线程错误] 模型：{model_name} 版本：{model_version} -> {e}"
-                    self.signals.progress.emit(msg)
-                finally:
-                    finished_count += 1
-                    self.signals.progress.emit(f"进度：{finished_count}/{total_models}")
-        if failed_list:
-            with open(self.error_log_file, 'w', encoding='utf-8') as f:
-                json.dump(failed_list, f, indent=2, ensure_ascii=False)
+    @property
+    def bundle_dir(self):
+        return os.path.join(self.root_dir_Ollama_new, 'bundles')
 
-        elapsed = time.time() - start_time
-        msg = f"\n====== 多线程整理完成 ======\n总共模型版本数：{total_models}\n已跳过的模型数：{skipped_models}\n成功整理模型数：{success_models}\n失败模型数：{failed_models}\n总共复制 blob 文件数：{total_digests}"
-        if failed_models > 0:
-            msg += f"\n失败模型详情已写入：{self.error_log_file}"
-        msg += f"\n总耗时：{elapsed:.2f} 秒"
-        self.signals.progress.emit(msg)
+    @property
+    def output_dirs(self):
+        return [self.root_dir_Ollama_new] + self.mirror_dirs if self.mirror_dirs else self.root_dir_Ollama_new
+
+    def run(self):
+        if self.bundle:
+            self.run_export()
+            return
+        # 整理引擎不依赖 Qt，延迟导入以加快界面启动
+        from ollama_organizer.engine import organize
+        try:
+            summary = organize(self.tasks, self.root_dir_Ollama, self.output_dirs, self.processed_record_file,
+                               self.error_log_file, self.link_mode, self.source_workers, self.target_workers, self.dry_run,
+                               self.verify_existing, self.on_event, progress_interval=PROGRESS_INTERVAL,
+                               throttle=self.throttle, low_io_priority=self.low_io_priority,
+                               adaptive=self.adaptive, device_workers=self.device_workers,
+                               shared=self.shared_output)
+            self.device_workers = summary["device_workers"]
+        except Exception as e:
+            self.channel.log(f"[错误] 整理失败 -> {e}")
+        self.signals.finished.emit()
+
+    def run_export(self):
+        # 每个模型版本打包成一个 tar 文件，写入输出目录下的 bundles 子目录
+        from ollama_organizer.bundle import export_bundles
+        try:
+            os.makedirs(self.bundle_dir, exist_ok=True)
+            export_bundles(self.tasks, self.root_dir_Ollama, self.bundle_dir, on_event=self.on_event)
+        except Exception as e:
+            self.channel.log(f"[错误] 导出失败 -> {e}")
         self.signals.finished.emit()
 
 class DeleteFilesThread(QThread):
-    progress = pyqtSignal(str)
+    planned = pyqtSignal()
     finished = pyqtSignal()
 
-    def __init__(self, tasks, model_base_dir):
+    def __init__(self, source_dir, tasks=None, gc_plan=None):
         super().__init__()
+        self.channel = ProgressChannel()
+        self.source_dir = source_dir
         self.tasks = tasks
-        self.model_base_dir = model_base_dir
+        self.gc_plan = gc_plan
+        self.error = None
+
+    def on_event(self, event):
+        kind = event["event"]
+        if kind == "missing":
+            self.channel.log(f"[跳过] 文件不存在: {event['model']} - {event['version']}")
+        elif kind == "deleted_manifest":
+            self.channel.log(f"[删除] {event['path']}")
+        elif kind == "deleted_blob":
+            self.channel.log(f"[删除] {os.path.basename(event['path'])} ({format_size(event['size'])})")
+        elif kind == "error":
+            self.channel.log(f"[错误] 删除失败: {event['path'] or ''} -> {event['error']}")
+        elif kind == "summary":
+            self.channel.log(
+                f"\n已删除 {event['manifests']} 个清单文件和 {event['blobs']} 个 blob 文件，"
+                f"释放空间 {format_size(event['bytes'])}"
+            )
+
+    def run(self):
+        from ollama_organizer.blobgc import plan_gc, execute_gc
+        if self.gc_plan is None:
+            # 统计引用需要读取所有清单并检查每个 blob，放在线程中进行；确认删除后再执行
+            try:
+                self.gc_plan = plan_gc(self.source_dir, self.tasks or (), sweep_orphans=self.tasks is None)
+            except Exception as e:
+                self.error = e
+            self.planned.emit()
+            return
+        try:
+            execute_gc(self.gc_plan, self.on_event)
+        except Exception as e:
+            self.channel.log(f"[错误] 删除失败 -> {e}")
+        self.finished.emit()
+
+class RestoreThread(QThread):
+    planned = pyqtSignal()
+    finished = pyqtSignal()
+
+    def __init__(self, root_dir_Ollama_new, root_dir_Ollama, dry_run=False):
+        super().__init__()
+        self.channel = ProgressChannel()
+        self.root_dir_Ollama_new = root_dir_Ollama_new
+        self.root_dir_Ollama = root_dir_Ollama
+        self.dry_run = dry_run
+        self.restore_plan = None
+        self.error = None
+
+    def on_event(self, event):
+        kind = event["event"]
+        if kind == "restore_start":
+            self.channel.log(f"需要还原的模型版本总数：{event['total']}\n")
+        elif kind == "skipped":
+            self.channel.log(f"[跳过] 模型：{event['model']} 版本：{event['version']}（已安装）")
+        elif kind == "conflict":
+            self.channel.log(f"[冲突] 模型：{event['model']} 版本：{event['version']}（Ollama 目录中的清单不同，未覆盖）")
+        elif kind == "restore_plan":
+            self.channel.log(
+                f"需要传输的 blob 文件：{event['blobs']} 个（{format_size(event['bytes'])}），"
+                f"Ollama 目录中已有：{event['present_blobs']} 个（{format_size(event['present_bytes'])}）\n"
+            )
+        elif kind == "done":
+            self.channel.log(f"[完成] 模型：{event['model']} 版本：{event['version']}")
+        elif kind == "error":
+            self.channel.log(f"[错误] {event['error']}")
+        elif kind == "progress":
+            self.channel.progress(event['finished'], event['total'])
+        elif kind == "throughput":
+            self.channel.throughput(event)
+        elif kind == "blob":
+            self.channel.blob_finished(event['blob'])
+        elif kind == "restore_summary":
+            methods = "，".join(f"{method} {count} 个" for method, count in sorted(event["methods"].items()))
+            msg = f"\n====== 还原完成 ======\n总共模型版本数：{event['total']}\n已安装（跳过）：{event['skipped']}\n冲突（未覆盖）：{event['conflicts']}\n成功还原：{event['success']}\n失败：{event['failed']}\n传输 blob 文件数：{event['blob_files']}"
+            if methods:
+                msg += f"（{methods}）"
+            msg += f"\n总耗时：{event['elapsed']:.2f} 秒"
+            self.channel.log(msg)
 
     def run(self):
-        total = len(self.tasks)
-        done = 0
-        for model_name, model_version in self.tasks:
-            model_version_dir = os.path.join(self.model_base_dir, model_name, model_version)
+        from ollama_organizer.restore import restore
+        if self.dry_run:
+            # 预演需要比较整个整理目录和 Ollama 目录，也放在线程中进行
             try:
-                if os.path.isdir(model_version_dir):
-                    shutil.rmtree(model_version_dir)
-                    self.progress.emit(f"[删除] {model_name} - {model_version}")
-                else:
-                    self.progress.emit(f"[跳过] 文件不存在: {model_name} - {model_version}")
+                self.restore_plan = restore(self.root_dir_Ollama_new, self.root_dir_Ollama, dry_run=True)
             except Exception as e:
-                self.progress.emit(f"[错误] 删除失败: {model_name} - {model_version} -> {str(e)}")
-            done += 1
-            self.progress.emit(f"进度：{done}/{total}")
+                self.error = e
+            self.planned.emit()
+            return
+        try:
+            restore(self.root_dir_Ollama_new, self.root_dir_Ollama, on_event=self.on_event, progress_interval=PROGRESS_INTERVAL)
+        except Exception as e:
+            self.channel.log(f"[错误] 还原失败 -> {e}")
         self.finished.emit()
 
-class MyListWidget(QListWidget):
+class VerifyArchiveThread(QThread):
+    finished = pyqtSignal()
+
+    def __init__(self, root_dir_Ollama_new, verify_log_file, workers=None):
+        super().__init__()
+        self.channel = ProgressChannel()
+        self.root_dir_Ollama_new = root_dir_Ollama_new
+        self.verify_log_file = verify_log_file
+        self.workers = workers
+
+    def on_blob_checked(self, path, ok, done, total):
+        if not ok:
+            self.channel.log(f"[损坏] {path}")
+        self.channel.progress(done, total)
+
+    def run(self):
+        from ollama_organizer.integrity import verify_archive
+        start_time = time.time()
+        self.channel.log(f"开始校验整理目录：{self.root_dir_Ollama_new}\n")
+        try:
+            report = verify_archive(self.root_dir_Ollama_new, self.workers, self.on_blob_checked)
+        except Exception as e:
+            self.channel.log(f"[错误] 校验失败 -> {e}")
+            self.finished.emit()
+            return
+        for path in report['missing']:
+            self.channel.log(f"[缺失] {path}")
+        failed_blobs = len(report['corrupted']) + len(report['missing'])
+        if failed_blobs:
+            with open(self.verify_log_file, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+
+        elapsed = time.time() - start_time
+        msg = f"\n====== 校验完成 ======\n已校验 blob 文件数：{report['checked']}\n损坏文件数：{len(report['corrupted'])}\n缺失文件数：{len(report['missing'])}"
+        if failed_blobs:
+            msg += f"\n校验失败详情已写入：{self.verify_log_file}"
+        msg += f"\n总耗时：{elapsed:.2f} 秒"
+        self.channel.log(msg)
+        self.finished.emit()
+
+# 后台扫描 manifest，避免模型很多时界面卡住
+class CatalogScanThread(QThread):
+    loaded = pyqtSignal(list)
+
+    def __init__(self, catalog, source_dir):
+        super().__init__()
+        self.catalog = catalog
+        self.source_dir = source_dir
+        self.error = None
+
+    def run(self):
+        try:
+            entries = self.catalog.refresh(self.source_dir)
+        except Exception as e:
+            self.error = e
+            entries = []
+        self.loaded.emit(entries)
+
+# 按需分批加载行，勾选状态按 (模型, 版本) 保存，不依赖显示文本
+class ModelTableModel(QAbstractTableModel):
+    HEADERS = ["模型", "版本", "架构", "量化", "参数量", "上下文", "大小", "共享", "删除可释放", "修改时间"]
+    FETCH_BATCH = 200
+    SORT_KEYS = [
+        lambda e: (e['model'], e['version']),
+        lambda e: (e['version'], e['model']),
+        lambda e: (e['architecture'] or '', e['model']),
+        lambda e: (e['quantization'] or '', e['model']),
+        lambda e: e['parameters'] or 0,
+        lambda e: e['context_length'] or 0,
+        lambda e: e['total_size'],
+        lambda e: e['shared_bytes'],
+        lambda e: e['freed_bytes'],
+        lambda e: e['mtime_ns'],
+    ]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.all_entries = []
+        self.entries = []
+        self.loaded = 0
+        self.checked = set()
+        self.filter_tokens = []
+        self.sort_column = 0
+        self.sort_order = Qt.AscendingOrder
+
+    @staticmethod
+    def model_ref(entry):
+        return entry['model'], entry['version']
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self.loaded < len(self.entries)
+
+    def fetchMore(self, parent):
+        count = min(self.FETCH_BATCH, len(self.entries) - self.loaded)
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.entries[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return entry['model']
+            if column == 1:
+                return entry['version']
+            if column == 2:
+                return entry['architecture'] or ''
+            if column == 3:
+                return entry['quantization'] or ''
+            if column == 4:
+                return format_count(entry['parameters']) if entry['parameters'] else ''
+            if column == 5:
+                return str(entry['context_length']) if entry['context_length'] else ''
+            if column == 6:
+                return format_size(entry['total_size'])
+            if column == 7:
+                return format_size(entry['shared_bytes']) if entry['shared_blobs'] else ''
+            if column == 8:
+                return format_size(entry['freed_bytes'])
+            return time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['mtime_ns'] / 1e9))
+        if role == Qt.CheckStateRole and column == 0:
+            return Qt.Checked if self.model_ref(entry) in self.checked else Qt.Unchecked
+        if role == Qt.TextAlignmentRole and column in (4, 5, 6, 7, 8):
+            return Qt.AlignRight | Qt.AlignVCenter
+        if role == Qt.ToolTipRole and entry.get('error'):
+            return entry['error']
+        if role == Qt.UserRole:
+            return self.model_ref(entry)
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() == 0:
+            flags |= Qt.ItemIsUserCheckable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.CheckStateRole or index.column() != 0:
+            return False
+        ref = self.model_ref(self.entries[index.row()])
+        if value == Qt.Checked:
+            self.checked.add(ref)
+        else:
+            self.checked.discard(ref)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        return True
+
+    def toggle(self, row):
+        index = self.index(row, 0)
+        checked = self.model_ref(self.entries[row]) in self.checked
+        self.setData(index, Qt.Unchecked if checked else Qt.Checked, Qt.CheckStateRole)
+
+    def _sort_entries(self):
+        self.entries.sort(key=self.SORT_KEYS[self.sort_column], reverse=self.sort_order == Qt.DescendingOrder)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sort_column, self.sort_order = column, order
+        self.beginResetModel()
+        self._sort_entries()
+        self.endResetModel()
+
+    def _matches(self, entry):
+        text = ' '.join([f"{entry['model']}:{entry['version']}", entry['architecture'] or '',
+                         entry['quantization'] or '', entry['size_label'] or '']).lower()
+        return all(token in text for token in self.filter_tokens)  # 所有关键词都需匹配
+
+    def _reset(self):
+        self.beginResetModel()
+        self.entries = [e for e in self.all_entries if self._matches(e)]
+        self._sort_entries()
+        self.loaded = min(max(self.loaded, self.FETCH_BATCH), len(self.entries))
+        self.endResetModel()
+
+    def set_entries(self, entries):
+        self.all_entries = list(entries)
+        self.checked &= {self.model_ref(e) for e in self.all_entries}
+        self._reset()
+
+    def set_filter(self, text):
+        self.filter_tokens = text.lower().split()
+        self._reset()
+
+    def checked_refs(self):
+        return [self.model_ref(e) for e in self.entries if self.model_ref(e) in self.checked]
+
+class MyTableView(QTableView):
     def mousePressEvent(self, event):
-        item = self.itemAt(event.pos())
-        if item is not None:
-            rect = self.visualItemRect(item)
+        index = self.indexAt(event.pos())
+        if index.isValid() and event.button() == Qt.LeftButton:
+            rect = self.visualRect(self.model().index(index.row(), 0))
             check_rect = QRect(rect.left() + 4, rect.top() + (rect.height() - 16) // 2, 20, 20)
-            if not check_rect.contains(event.pos()):
-                if item.checkState() == Qt.Checked:
-                    item.setCheckState(Qt.Unchecked)
-                else:
-                    item.setCheckState(Qt.Checked)
+            if index.column() != 0 or not check_rect.contains(event.pos()):
+                self.model().toggle(index.row())
                 return
         super().mousePressEvent(event)
 
+class LogView(QPlainTextEdit):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setMaximumBlockCount(LOG_LIMIT)
+
+    def append(self, text):
+        self.appendPlainText(text)
+
+class BlobProgressPanel(QWidget):
+    # 每个正在复制的 blob 一个进度条；进度条复用，不为每个 blob 新建
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.bar_layout = QVBoxLayout(self)
+        self.bar_layout.setContentsMargins(0, 0, 0, 0)
+        self.bars = []
+        self.hide()
+
+    def update_blobs(self, blobs):
+        items = sorted(blobs.items())
+        while len(self.bars) < len(items):
+            bar = QProgressBar(self)
+            bar.setRange(0, 1000)
+            self.bar_layout.addWidget(bar)
+            self.bars.append(bar)
+        for bar, (blob_name, (done, size)) in zip(self.bars, items):
+            bar.setValue(int(done * 1000 / size) if size else 1000)
+            bar.setFormat(f"{blob_name[:19]}  {format_size(done)} / {format_size(size)}")
+            bar.show()
+        for bar in self.bars[len(items):]:
+            bar.hide()
+        self.setVisible(bool(items))
+
+
 class OllamaManager(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -190,15 +491,36 @@ class OllamaManager(QMainWindow):
         self.setGeometry(100, 100, 900, 700)
         self.font = QFont("微软雅黑", 14)
         self.config_file = CONFIG_FILE
+        self.catalog = ModelCatalog(CATALOG_FILE)
+        self.scan_thread = None
+        self.organize_thread = None
+        self.scan_pending = False
+        self.channels = []
         self.root_dir_Ollama = r"C:\Users\xxx\.ollama"
         self.root_dir_Ollama_new = r"L:\备份\Ollama备份\2025.08.01"
+        self.blob_store_mode = 'copy'
+        self.verify_workers = os.cpu_count()
+        self.source_workers = SOURCE_WORKERS
+        self.target_workers = TARGET_WORKERS
+        self.verify_existing = False
+        self.mirror_dirs = []
+        self.bandwidth_limit = 0
+        self.low_io_priority = False
+        self.adaptive_workers = False
+        self.shared_output = False
+        self.device_workers = {}
+        self.watch_new_models = False
+        self.manifest_watcher = None
+        self.auto_queue = {}
+        self.manifest_signals = ManifestSignals()
+        self.manifest_signals.changed.connect(self.on_manifests_changed)
         self.load_config()  # 启动时优先覆盖默认值
-        self.model_base_dir = os.path.join(self.root_dir_Ollama, r'models\manifests\registry.ollama.ai\library')
-        self.model_name_list = os.listdir(self.model_base_dir) if os.path.exists(self.model_base_dir) else []
         self.processed_record_file = os.path.join(self.root_dir_Ollama_new, 'processed_models.json')
         self.error_log_file = os.path.join(self.root_dir_Ollama_new, 'error_log.json')
         self.init_ui()
         self.load_models()
+        if self.watch_check.isChecked():
+            self.start_manifest_watcher()
 
 
     def init_ui(self):
@@ -243,25 +565,115 @@ class OllamaManager(QMainWindow):
         path2_layout.addWidget(self.select_dir_button_2)
         path2_layout.addWidget(self.open_dir_button_2)
 
+        # 同步目录：整理时同时写入这些目录
+        self.mirror_edit = QLineEdit(";".join(self.mirror_dirs), self)
+        self.mirror_edit.setFont(font)
+        self.mirror_edit.setPlaceholderText("其他输出目录，可填多个，用 ; 分隔（每个 blob 只读取一次）")
+        self.mirror_edit.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.add_mirror_button = QPushButton("添加同步目录", self)
+        self.add_mirror_button.setFont(font)
+        self.add_mirror_button.setFixedWidth(286)
+        self.add_mirror_button.clicked.connect(self.add_mirror_dir)
+
+        mirror_layout = QHBoxLayout()
+        mirror_layout.addWidget(self.mirror_edit)
+        mirror_layout.addWidget(self.add_mirror_button)
+
+        # 设置 blob 存储方式
+        store_label = QLabel("Blob 存储方式：")
+        store_label.setFont(font)
+        self.store_mode_combo = QComboBox(self)
+        self.store_mode_combo.setFont(font)
+        self.store_mode_combo.addItem("每个版本独立复制", 'copy')
+        self.store_mode_combo.addItem("共享 blob 池（硬链接）", 'hardlink')
+        self.store_mode_combo.addItem("共享 blob 池（reflink）", 'reflink')
+        self.store_mode_combo.addItem("共享 blob 池（符号链接）", 'symlink')
+        self.store_mode_combo.setCurrentIndex(max(self.store_mode_combo.findData(self.blob_store_mode), 0))
+
+        self.dry_run_check = QCheckBox("预演（只报告不复制）", self)
+        self.dry_run_check.setFont(font)
+        # 打包导出时不支持预演
+        self.bundle_check = QCheckBox("导出为 .tar 打包文件", self)
+        self.bundle_check.setFont(font)
+        self.bundle_check.toggled.connect(lambda checked: self.dry_run_check.setEnabled(not checked))
+
+        store_layout = QHBoxLayout()
+        store_layout.addWidget(store_label)
+        store_layout.addWidget(self.store_mode_combo)
+        store_layout.addWidget(self.dry_run_check)
+        store_layout.addWidget(self.bundle_check)
+        store_layout.addStretch(1)
+
+        # 整理过程中修改限速会立即生效
+        limit_label = QLabel("带宽限制：")
+        limit_label.setFont(font)
+        self.limit_spin = QSpinBox(self)
+        self.limit_spin.setFont(font)
+        self.limit_spin.setRange(0, 100000)
+        self.limit_spin.setSuffix(" MB/s")
+        self.limit_spin.setSpecialValueText("不限速")
+        self.limit_spin.setValue(self.bandwidth_limit)
+        self.limit_spin.valueChanged.connect(self.on_bandwidth_limit_changed)
+        self.low_priority_check = QCheckBox("低 I/O 优先级，复制后释放页缓存", self)
+        self.low_priority_check.setFont(font)
+        self.low_priority_check.setChecked(self.low_io_priority)
+        self.adaptive_check = QCheckBox("按磁盘自动调整复制线程数", self)
+        self.adaptive_check.setFont(font)
+        self.adaptive_check.setChecked(self.adaptive_workers)
+        self.watch_check = QCheckBox("自动整理新拉取的模型", self)
+        self.watch_check.setFont(font)
+        self.watch_check.setChecked(self.watch_new_models)
+        self.watch_check.toggled.connect(self.on_watch_toggled)
+
+        limit_layout = QHBoxLayout()
+        limit_layout.addWidget(limit_label)
+        limit_layout.addWidget(self.limit_spin)
+        limit_layout.addWidget(self.low_priority_check)
+        limit_layout.addWidget(self.adaptive_check)
+        limit_layout.addWidget(self.watch_check)
+        limit_layout.addStretch(1)
+
         path_layout = QVBoxLayout()
         path_layout.addLayout(path1_layout)
         path_layout.addLayout(path2_layout)
+        path_layout.addLayout(mirror_layout)
+        path_layout.addLayout(store_layout)
+        path_layout.addLayout(limit_layout)
 
         self.select_dir_button_1.clicked.connect(self.select_dir_1)
         self.select_dir_button_2.clicked.connect(self.select_dir_2)
 
         # 设置模型列表控件
-        self.model_list_widget = MyListWidget(self)
-        self.model_list_widget.setFont(font)
-        self.model_list_widget.setSelectionMode(QAbstractItemView.MultiSelection)
-        self.model_list_widget.itemChanged.connect(self.on_model_item_changed)
+        self.model_table = ModelTableModel(self)
+        self.model_view = MyTableView(self)
+        self.model_view.setFont(font)
+        self.model_view.setModel(self.model_table)
+        self.model_view.setSelectionMode(QAbstractItemView.NoSelection)
+        self.model_view.verticalHeader().setVisible(False)
+        self.model_view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.model_view.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.model_view.setSortingEnabled(True)
+        self.model_view.sortByColumn(0, Qt.AscendingOrder)
+
+        self.filter_edit = QLineEdit(self)
+        self.filter_edit.setFont(font)
+        self.filter_edit.setPlaceholderText('按名称、架构、量化类型或规模筛选，例如 "llama q4_k"')
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_edit.textChanged.connect(self.model_table.set_filter)
 
         # 设置日志区
-        self.text_log = QTextEdit(self)
-        self.text_log.setReadOnly(True)
+        self.text_log = LogView(self)
         self.text_log.setFont(font)
         self.text_log.setMinimumHeight(200)
 
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.hide()
+        self.blob_panel = BlobProgressPanel(self)
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setInterval(FLUSH_INTERVAL_MS)
+        self.flush_timer.timeout.connect(self.flush_progress)
+
         # 设置刷新按钮
         self.btn_refresh = QPushButton("刷新", self)
         self.btn_refresh.setStyleSheet("background-color: #2196F3; color: white;")
@@ -274,12 +686,29 @@ class OllamaManager(QMainWindow):
         self.btn_organize.setFont(font)
         self.btn_organize.clicked.connect(self.on_organize)
 
+        # 设置校验按钮
+        self.btn_verify = QPushButton("校验整理目录", self)
+        self.btn_verify.setStyleSheet("background-color: #ff9800; color: black;")
+        self.btn_verify.setFont(font)
+        self.btn_verify.clicked.connect(self.on_verify)
+
         # 设置删除按钮
         self.btn_delete = QPushButton("删除", self)
         self.btn_delete.setStyleSheet("background-color: #ff0000; color: white;")
         self.btn_delete.setFont(font)
         self.btn_delete.clicked.connect(self.on_delete)
 
+        # 设置清理 blob 按钮
+        self.btn_clean = QPushButton("清理无用 blob", self)
+        self.btn_clean.setStyleSheet("background-color: #9c27b0; color: white;")
+        self.btn_clean.setFont(font)
+        self.btn_clean.clicked.connect(self.on_clean_blobs)
+
+        # 设置还原按钮
+        self.btn_restore = QPushButton("还原到 Ollama", self)
+        self.btn_restore.setStyleSheet("background-color: #009688; color: white;")
+        self.btn_restore.setFont(font)
+        self.btn_restore.clicked.connect(self.on_restore)
 
         # 设置退出按钮
         self.btn_exit = QPushButton("退出", self)
@@ -295,13 +724,20 @@ class OllamaManager(QMainWindow):
         btn_layout = QVBoxLayout()
         btn_layout.addWidget(self.btn_refresh)  # 按钮顺序：刷新
         btn_layout.addWidget(self.btn_organize)  # 然后是整理
-        btn_layout.addWidget(self.btn_delete)  # 最后是删除
+        btn_layout.addWidget(self.btn_verify)  # 校验
+        btn_layout.addWidget(self.btn_delete)  # 删除
+        btn_layout.addWidget(self.btn_clean)  # 清理无用 blob
+        btn_layout.addWidget(self.btn_restore)  # 最后是还原到 Ollama
         btn_layout.addStretch(1)
         btn_layout.addWidget(self.btn_exit)  # 退出按钮
 
         # 中间布局，包含模型列表和按钮
+        list_layout = QVBoxLayout()
+        list_layout.addWidget(self.filter_edit)
+        list_layout.addWidget(self.model_view)
+
         center_layout = QHBoxLayout()
-        center_layout.addWidget(self.model_list_widget, stretch=2)
+        center_layout.addLayout(list_layout, stretch=2)
         center_layout.addLayout(btn_layout, stretch=1)
 
         # 主布局
@@ -309,6 +745,8 @@ class OllamaManager(QMainWindow):
         main_layout.addLayout(path_layout)
         main_layout.addLayout(center_layout)
         main_layout.addWidget(label)
+        main_layout.addWidget(self.progress_bar)
+        main_layout.addWidget(self.blob_panel)
         main_layout.addWidget(self.text_log)
 
         # 设置主窗口的布局
@@ -335,10 +773,10 @@ class OllamaManager(QMainWindow):
         if dir_path:
             self.root_dir_Ollama = dir_path
             self.dir_edit_1.setText(f"{self.root_dir_Ollama}")
-            self.model_base_dir = os.path.join(self.root_dir_Ollama, r'models\manifests\registry.ollama.ai\library')
-            self.model_name_list = os.listdir(self.model_base_dir) if os.path.exists(self.model_base_dir) else []
             self.save_config()
             self.load_models()
+            if self.manifest_watcher is not None:
+                self.start_manifest_watcher()
 
     def select_dir_2(self):
         dir_path = QFileDialog.getExistingDirectory(self, "选择整理输出目录", self.root_dir_Ollama_new)
@@ -347,27 +785,48 @@ class OllamaManager(QMainWindow):
             self.dir_edit_2.setText(f"{self.root_dir_Ollama_new}")
             self.save_config()
 
+    def add_mirror_dir(self):
+        dir_path = QFileDialog.getExistingDirectory(self, "选择同步目录", self.root_dir_Ollama_new)
+        if dir_path and dir_path not in self.get_mirror_dirs():
+            self.mirror_edit.setText(";".join(self.get_mirror_dirs() + [dir_path]))
+            self.save_config()
+
+    def get_mirror_dirs(self):
+        return [path.strip() for path in self.mirror_edit.text().split(';') if path.strip()]
+
     def load_models(self):
-        self.model_list_widget.blockSignals(True)
-        self.model_list_widget.clear()
-        self.model_name_list = os.listdir(self.model_base_dir) if os.path.exists(self.model_base_dir) else []
-        for model_name in self.model_name_list:
-            model_version_dir = os.path.join(self.model_base_dir, model_name)
-            if not os.path.isdir(model_version_dir):
-                continue
-            for model_version in os.listdir(model_version_dir):
-                item = QListWidgetItem(f"{model_name} - {model_version}")
-                item.setCheckState(Qt.Unchecked)
-                self.model_list_widget.addItem(item)
-        self.model_list_widget.blockSignals(False)
-        self.text_log.append("[刷新] 模型列表已更新，共 {} 个模型".format(self.model_list_widget.count()))
+        if self.scan_thread is not None and self.scan_thread.isRunning():
+            self.scan_pending = True
+            return
+        self.scan_pending = False
+        self.btn_refresh.setEnabled(False)
+        self.scan_thread = CatalogScanThread(self.catalog, self.root_dir_Ollama)
+        self.scan_thread.loaded.connect(self.on_models_loaded)
+        self.scan_thread.start()
 
-    def on_model_item_changed(self, item):
-        pass
+    def on_models_loaded(self, entries):
+        self.btn_refresh.setEnabled(True)
+        if self.scan_thread.error is not None:
+            # 表格保留上次成功加载的列表
+            self.text_log.append("[错误] 刷新失败 -> {}".format(self.scan_thread.error))
+        else:
+            self.model_table.set_entries(entries)
+            self.text_log.append("[刷新] 模型列表已更新，共 {} 个模型".format(len(entries)))
+            stats = self.catalog.stats
+            if stats:
+                # 共享的层只计算一次
+                msg = "[存储] 模型数据共 {}，实际占用 {}，去重比 {:.2f}x".format(
+                    format_size(stats['logical_bytes']), format_size(stats['stored_bytes']), stats['dedup_ratio'])
+                if stats['unreferenced_blobs']:
+                    msg += "，另有 {} 个未引用的 blob 占用 {}".format(
+                        stats['unreferenced_blobs'], format_size(stats['unreferenced_bytes']))
+                self.text_log.append(msg)
+        if self.scan_pending:
+            self.load_models()
 
     def on_organize(self):
-        selected_items = [item for item in self.model_list_widget.findItems("", Qt.MatchContains) if item.checkState() == Qt.Checked]
-        if not selected_items:
+        tasks = self.model_table.checked_refs()
+        if not tasks:
             self.text_log.append("警告: 请先选择要整理的模型")
             return
 
@@ -378,58 +837,275 @@ class OllamaManager(QMainWindow):
 
         self.save_config()
 
-        tasks = []
-        for item in selected_items:
-            model_name, model_version = item.text().split(" - ")
-            tasks.append((model_name, model_version))
-
         self.text_log.clear()
         self.text_log.append("开始整理任务...\n")
+        self.start_organize(tasks, self.dry_run_check.isChecked(), self.bundle_check.isChecked(),
+                            self.low_priority_check.isChecked())
 
+    def start_organize(self, tasks, dry_run, bundle, low_io_priority):
         self.btn_organize.setEnabled(False)
         self.organize_thread = OrganizeThread(
             tasks, self.root_dir_Ollama, self.root_dir_Ollama_new,
-            self.processed_record_file, self.error_log_file)
-        self.organize_thread.signals.progress.connect(self.on_progress)
+            self.processed_record_file, self.error_log_file,
+            self.store_mode_combo.currentData(),
+            self.source_workers, self.target_workers,
+            dry_run, self.verify_existing,
+            bundle, self.limit_spin.value(), low_io_priority,
+            self.get_mirror_dirs(), self.adaptive_check.isChecked(), self.device_workers, self.shared_output)
         self.organize_thread.signals.finished.connect(self.on_organize_finished)
+        self.watch(self.organize_thread.channel)
         self.organize_thread.start()
 
-    def on_progress(self, msg):
-        self.text_log.append(msg)
-        self.text_log.ensureCursorVisible()
+    def on_watch_toggled(self, checked):
+        self.save_config()
+        if checked:
+            self.start_manifest_watcher()
+        else:
+            self.stop_manifest_watcher()
+            self.text_log.append("[监视] 已停止监视新拉取的模型。")
+
+    def start_manifest_watcher(self):
+        self.stop_manifest_watcher()
+        self.manifest_watcher = ManifestWatcher(os.path.join(self.root_dir_Ollama, 'models', 'manifests'),
+                                                self.manifest_signals.changed.emit)
+        self.manifest_watcher.start()
+        self.text_log.append(f"[监视] 正在监视 {self.manifest_watcher.manifests_dir} 中新拉取的模型（{self.manifest_watcher.mode}）")
+
+    def stop_manifest_watcher(self):
+        if self.manifest_watcher is not None:
+            self.manifest_watcher.stop()
+            self.manifest_watcher = None
+
+    def on_manifests_changed(self, refs):
+        self.text_log.append("[监视] 新增或更新: " + ", ".join(f"{m}:{v}" for m, v in refs))
+        for ref in refs:
+            self.auto_queue[tuple(ref)] = None
+        self.load_models()
+        self.run_auto_organize()
+
+    def run_auto_organize(self):
+        # 整理过程中发现的新模型在本次结束后再整理，使用低 I/O 优先级，不影响 Ollama 读写磁盘
+        if not self.auto_queue or (self.organize_thread is not None and self.organize_thread.isRunning()):
+            return
+        tasks = list(self.auto_queue)
+        self.auto_queue.clear()
+        self.root_dir_Ollama_new = self.dir_edit_2.text().strip()
+        self.processed_record_file = os.path.join(self.root_dir_Ollama_new, 'processed_models.json')
+        self.error_log_file = os.path.join(self.root_dir_Ollama_new, 'error_log.json')
+        self.text_log.append("开始自动整理新拉取的模型...\n")
+        self.start_organize(tasks, False, False, True)
+
+    def on_bandwidth_limit_changed(self, value):
+        self.bandwidth_limit = value
+        if self.organize_thread is not None and self.organize_thread.isRunning():
+            self.organize_thread.throttle.set_rate(value * MB)
+
+    def watch(self, channel):
+        self.channels.append(channel)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setFormat("")
+        self.flush_timer.start()
+
+    def unwatch(self, channel):
+        self.flush_progress()
+        self.channels.remove(channel)
+        if not self.channels:
+            self.flush_timer.stop()
+            self.progress_bar.hide()
+            self.blob_panel.update_blobs({})
+
+    def flush_progress(self):
+        for channel in self.channels:
+            update = channel.drain()
+            if update is None:
+                continue
+            if update["dropped"]:
+                self.text_log.append(f"……省略了 {update['dropped']} 行日志……")
+            if update["lines"]:
+                self.text_log.append("\n".join(update["lines"]))
+            self.show_progress(update)
+
+    def show_progress(self, update):
+        counts, throughput = update["counts"], update["throughput"]
+        if throughput and throughput["total_bytes"]:
+            done, total = throughput["done_bytes"], throughput["total_bytes"]
+            text = (f"{format_size(done)} / {format_size(total)}  {throughput['mb_s']:.1f} MB/s  "
+                    f"预计剩余 {format_duration(throughput['eta_seconds'])}")
+            if counts:
+                text = f"{counts[0]}/{counts[1]}  {text}"
+        elif counts:
+            done, total = counts
+            text = f"{done}/{total}"
+        else:
+            return
+        self.progress_bar.setValue(int(done * 1000 / total) if total else 1000)
+        self.progress_bar.setFormat(text)
+        self.progress_bar.show()
+        self.blob_panel.update_blobs(update["blobs"])
 
     def on_organize_finished(self):
+        self.unwatch(self.organize_thread.channel)
+        if self.organize_thread.adaptive:
+            self.device_workers = self.organize_thread.device_workers
+            self.save_config()
         self.btn_organize.setEnabled(True)
         self.text_log.append("\n整理任务已完成。")
         self.load_models()
+        self.run_auto_organize()
+
+    def on_verify(self):
+        self.root_dir_Ollama_new = self.dir_edit_2.text().strip()
+        if not os.path.isdir(self.root_dir_Ollama_new):
+            QMessageBox.warning(self, "路径不存在", f"目录不存在：{self.root_dir_Ollama_new}")
+            return
+        self.save_config()
+
+        self.text_log.clear()
+        self.btn_verify.setEnabled(False)
+        verify_log_file = os.path.join(self.root_dir_Ollama_new, 'verify_log.json')
+        self.verify_thread = VerifyArchiveThread(self.root_dir_Ollama_new, verify_log_file, self.verify_workers)
+        self.verify_thread.finished.connect(self.on_verify_finished)
+        self.watch(self.verify_thread.channel)
+        self.verify_thread.start()
+
+    def on_verify_finished(self):
+        self.unwatch(self.verify_thread.channel)
+        self.btn_verify.setEnabled(True)
+        self.text_log.append("\n校验任务已完成。")
 
     def on_delete(self):
-        selected_items = [item for item in self.model_list_widget.findItems("", Qt.MatchContains) if item.checkState() == Qt.Checked]
-        if not selected_items:
+        tasks = self.model_table.checked_refs()
+        if not tasks:
             self.text_log.append("警告: 请先选择要删除的模型")
             return
-        reply = QMessageBox.question(self, "确认删除", "确定要删除选中模型吗？操作不可恢复！", QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        self.plan_delete(tasks)
+
+    def on_clean_blobs(self):
+        self.plan_delete(None)
+
+    def plan_delete(self, tasks):
+        # 统计所有清单对 blob 的引用，只删除不再被引用的 blob；tasks 为 None 时查找未被引用的 blob
+        self.btn_delete.setEnabled(False)
+        self.btn_clean.setEnabled(False)
+        self.text_log.append("正在统计 blob 引用...")
+        self.delete_thread = DeleteFilesThread(self.root_dir_Ollama, tasks)
+        self.delete_thread.planned.connect(self.on_delete_planned)
+        self.delete_thread.start()
+
+    def on_delete_planned(self):
+        self.delete_thread.wait()
+        self.btn_delete.setEnabled(True)
+        self.btn_clean.setEnabled(True)
+        gc_plan = self.delete_thread.gc_plan
+        if gc_plan is None:
+            self.text_log.append(f"[错误] 删除失败 -> {self.delete_thread.error}")
+            return
+        if self.delete_thread.tasks is None:
+            if gc_plan.errors:
+                for error in gc_plan.errors:
+                    self.text_log.append(f"[错误] {error}")
+                self.text_log.append("存在无法读取的清单文件，不会删除任何 blob 文件。")
+                return
+            if not gc_plan.blobs:
+                self.text_log.append("没有未被引用的 blob 文件。")
+                return
+            reply = QMessageBox.question(
+                self, "确认清理",
+                f"确定删除 {len(gc_plan.blobs)} 个未被任何模型引用的 blob 文件吗？可释放 {format_size(gc_plan.reclaim_bytes)}。",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        else:
+            message = (
+                f"确定要删除选中的 {len(gc_plan.manifests)} 个模型版本吗？操作不可恢复！\n\n"
+                f"将同时删除 {len(gc_plan.blobs)} 个不再被其他模型使用的 blob 文件，可释放 {format_size(gc_plan.reclaim_bytes)}。"
+            )
+            if gc_plan.errors:
+                message += f"\n\n有 {len(gc_plan.errors)} 个清单文件无法读取，本次不会删除任何 blob 文件。"
+            reply = QMessageBox.question(self, "确认删除", message, QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply != QMessageBox.Yes:
             return
-        tasks = []
-        for item in selected_items:
-            model_name, model_version = item.text().split(" - ")
-            tasks.append((model_name, model_version))
+        self.start_delete(gc_plan)
+
+    def start_delete(self, gc_plan):
+        self.text_log.clear()
         self.btn_delete.setEnabled(False)
-        self.delete_thread = DeleteFilesThread(tasks, self.model_base_dir)
-        self.delete_thread.progress.connect(self.on_progress)
+        self.btn_clean.setEnabled(False)
+        self.delete_thread = DeleteFilesThread(self.root_dir_Ollama, gc_plan=gc_plan)
         self.delete_thread.finished.connect(self.on_delete_finished)
+        self.watch(self.delete_thread.channel)
         self.delete_thread.start()
 
     def on_delete_finished(self):
+        self.unwatch(self.delete_thread.channel)
         self.btn_delete.setEnabled(True)
+        self.btn_clean.setEnabled(True)
         self.text_log.append("\n删除任务已完成。")
         self.load_models()
 
+    def on_restore(self):
+        self.root_dir_Ollama = self.dir_edit_1.text().strip()
+        self.root_dir_Ollama_new = self.dir_edit_2.text().strip()
+        if not os.path.isdir(self.root_dir_Ollama_new):
+            QMessageBox.warning(self, "路径不存在", f"目录不存在：{self.root_dir_Ollama_new}")
+            return
+        self.save_config()
+        # 先预演一遍，统计需要还原的版本和数据量
+        self.btn_restore.setEnabled(False)
+        self.restore_thread = RestoreThread(self.root_dir_Ollama_new, self.root_dir_Ollama, dry_run=True)
+        self.restore_thread.planned.connect(self.on_restore_planned)
+        self.restore_thread.start()
+
+    def on_restore_planned(self):
+        self.restore_thread.wait()
+        self.btn_restore.setEnabled(True)
+        restore_plan = self.restore_thread.restore_plan
+        if restore_plan is None:
+            self.text_log.append(f"[错误] 还原失败 -> {self.restore_thread.error}")
+            return
+        to_restore = restore_plan["total"] - restore_plan["skipped"] - restore_plan["conflicts"] - restore_plan["failed"]
+        if not to_restore:
+            self.text_log.append(f"没有需要还原的模型：已安装 {restore_plan['skipped']} 个版本，"
+                                 f"冲突 {restore_plan['conflicts']} 个，无法读取 {restore_plan['failed']} 个。")
+            return
+        message = (
+            f"确定将整理目录中的 {to_restore} 个模型版本还原到 Ollama 目录吗？\n\n"
+            f"将链接或复制 {format_size(restore_plan['bytes_to_copy'])} 的 blob 文件，"
+            f"{restore_plan['skipped']} 个版本已安装。"
+        )
+        if restore_plan["conflicts"]:
+            message += f"\n\n{restore_plan['conflicts']} 个版本在 Ollama 目录中的清单不同，不会被覆盖。"
+        reply = QMessageBox.question(self, "确认还原", message, QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+
+        self.text_log.clear()
+        self.btn_restore.setEnabled(False)
+        self.restore_thread = RestoreThread(self.root_dir_Ollama_new, self.root_dir_Ollama)
+        self.restore_thread.finished.connect(self.on_restore_finished)
+        self.watch(self.restore_thread.channel)
+        self.restore_thread.start()
+
+    def on_restore_finished(self):
+        self.unwatch(self.restore_thread.channel)
+        self.btn_restore.setEnabled(True)
+        self.text_log.append("\n还原任务已完成。")
+        self.load_models()
+
     def save_config(self):
         config = {
             'root_dir_Ollama': self.dir_edit_1.text().strip(),
-            'root_dir_Ollama_new': self.dir_edit_2.text().strip()
+            'root_dir_Ollama_new': self.dir_edit_2.text().strip(),
+            'mirror_dirs': self.get_mirror_dirs(),
+            'blob_store_mode': self.store_mode_combo.currentData(),
+            'verify_workers': self.verify_workers,
+            'source_workers': self.source_workers,
+            'target_workers': self.target_workers,
+            'verify_existing': self.verify_existing,
+            'bandwidth_limit_mb_s': self.limit_spin.value(),
+            'low_io_priority': self.low_priority_check.isChecked(),
+            'adaptive_workers': self.adaptive_check.isChecked(),
+            'shared_output': self.shared_output,
+            'device_workers': self.device_workers,
+            'watch_new_models': self.watch_check.isChecked()
         }
         try:
             with open(self.config_file, 'w', encoding='utf-8') as f:
@@ -444,8 +1120,24 @@ class OllamaManager(QMainWindow):
                     config = json.load(f)
                 self.root_dir_Ollama = config.get('root_dir_Ollama', self.root_dir_Ollama)
                 self.root_dir_Ollama_new = config.get('root_dir_Ollama_new', self.root_dir_Ollama_new)
+                self.mirror_dirs = config.get('mirror_dirs', self.mirror_dirs)
+                self.blob_store_mode = config.get('blob_store_mode', self.blob_store_mode)
+                self.verify_workers = config.get('verify_workers', self.verify_workers)
+                self.source_workers = config.get('source_workers', self.source_workers)
+                self.target_workers = config.get('target_workers', self.target_workers)
+                self.verify_existing = config.get('verify_existing', self.verify_existing)
+                self.bandwidth_limit = config.get('bandwidth_limit_mb_s', self.bandwidth_limit)
+                self.low_io_priority = config.get('low_io_priority', self.low_io_priority)
+                self.adaptive_workers = config.get('adaptive_workers', self.adaptive_workers)
+                self.shared_output = config.get('shared_output', self.shared_output)
+                self.device_workers = config.get('device_workers', self.device_workers)
+                self.watch_new_models = config.get('watch_new_models', self.watch_new_models)
             except Exception:
                 pass
+    def closeEvent(self, event):
+        self.stop_manifest_watcher()
+        super().closeEvent(event)
+
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
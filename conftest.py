@@ -0,0 +1 @@
+# Lets pytest import ollama_organizer from the repository root without installing it
@@ -0,0 +1,90 @@
+import os
+from ollama_organizer.blobgc import BLOB_NAME_RE
+
+
+def scan_blobs(blobs_dir):
+    # blob name -> (size, hard link count), from one directory pass with a single stat per blob
+    blobs = {}
+    try:
+        with os.scandir(blobs_dir) as it:
+            for entry in it:
+                if not BLOB_NAME_RE.match(entry.name):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                blobs[entry.name] = (st.st_size, st.st_nlink)
+    except OSError:
+        pass
+    return blobs
+
+
+def analyze_store(entries, blobs_dir):
+    # Annotates each catalog entry with exclusive_bytes, shared_bytes and freed_bytes and returns store-wide totals.
+    # freed_bytes leaves out blobs with other hard links (e.g. into a blob pool): deleting the tag would not free them.
+    blobs = scan_blobs(blobs_dir)
+    tag_refs = {}
+    model_refs = {}
+    entry_blobs = []
+    for entry in entries:
+        names = {layer["digest"].replace('sha256:', 'sha256-'): layer["size"] for layer in entry["layers"]}
+        entry_blobs.append(names)
+        for name in names:
+            tag_refs[name] = tag_refs.get(name, 0) + 1
+            model_refs.setdefault(name, set()).add(entry["model"])
+
+    stats = {
+        "tags": len(entries),
+        "blobs": len(tag_refs),
+        "missing_blobs": 0,
+        "missing_bytes": 0,
+        "logical_bytes": 0,
+        "stored_bytes": 0,
+        "dedup_ratio": 1.0,
+        "unreferenced_blobs": 0,
+        "unreferenced_bytes": 0,
+        "models": {},
+    }
+    missing = {}
+    for entry, names in zip(entries, entry_blobs):
+        exclusive = shared = freed = shared_blobs = 0
+        for name, size in names.items():
+            found = blobs.get(name)
+            if found:
+                size = found[0]
+                # Missing blobs stay out of the dedup ratio, they are counted in missing_bytes instead
+                stats["logical_bytes"] += size
+            else:
+                missing[name] = size or 0
+            if tag_refs[name] > 1:
+                shared += size
+                shared_blobs += 1
+            else:
+                exclusive += size
+                if found and found[1] <= 1:
+                    freed += size
+        entry["exclusive_bytes"] = exclusive
+        entry["shared_bytes"] = shared
+        entry["shared_blobs"] = shared_blobs
+        entry["freed_bytes"] = freed
+        model = stats["models"].setdefault(entry["model"], {"tags": 0, "freed_bytes": 0})
+        model["tags"] += 1
+
+    for name, owners in model_refs.items():
+        found = blobs.get(name)
+        if found is None:
+            stats["missing_blobs"] += 1
+            continue
+        stats["stored_bytes"] += found[0]
+        # Freed only once every tag of the model is deleted
+        if len(owners) == 1 and found[1] <= 1:
+            stats["models"][next(iter(owners))]["freed_bytes"] += found[0]
+    for name, (size, _) in blobs.items():
+        if name not in tag_refs:
+            stats["unreferenced_blobs"] += 1
+            stats["unreferenced_bytes"] += size
+    stats["missing_bytes"] = sum(missing.values())
+    if stats["stored_bytes"]:
+        stats["dedup_ratio"] = stats["logical_bytes"] / stats["stored_bytes"]
+    return stats
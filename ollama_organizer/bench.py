@@ -0,0 +1,268 @@
+import os
+import sys
+import json
+import time
+import queue
+import random
+import shutil
+import hashlib
+import platform
+import tempfile
+import subprocess
+import multiprocessing
+from ollama_organizer.metrics import MB
+from ollama_organizer.scheduler import SOURCE_WORKERS, TARGET_WORKERS
+
+# Scenarios run in this order, each in a fresh process; later ones work on what earlier ones left behind
+SCENARIOS = ('refresh_cold', 'refresh_warm', 'organize_cold', 'organize_incremental', 'verify', 'delete')
+TAGS_PER_MODEL = 4
+METADATA_LAYER_TYPES = ('license', 'template', 'params', 'system', 'messages')
+FILL_BLOCK_SIZE = 1024 * 1024
+
+
+def _write_blob(blobs_dir, data_chunks):
+    # data_chunks is an iterable of bytes, written through a temp name and renamed to its digest
+    sha = hashlib.sha256()
+    tmp_path = os.path.join(blobs_dir, f".bench-{os.getpid()}.tmp")
+    size = 0
+    with open(tmp_path, 'wb') as f:
+        for chunk in data_chunks:
+            sha.update(chunk)
+            f.write(chunk)
+            size += len(chunk)
+    digest = 'sha256:' + sha.hexdigest()
+    os.replace(tmp_path, os.path.join(blobs_dir, digest.replace('sha256:', 'sha256-')))
+    return {"digest": digest, "size": size}
+
+
+def _weights(rng, fill, size):
+    # A unique header keeps every digest distinct; the body repeats one random block so generation stays cheap
+    header = b'GGUF' + rng.getrandbits(128).to_bytes(16, 'little')
+    yield header
+    remaining = size - len(header)
+    while remaining > 0:
+        yield fill[:remaining]
+        remaining -= len(fill)
+
+
+def make_store(root, tags=20, weight_size=64 * MB, shared_ratio=0.5, metadata_layers=4, seed=0):
+    # Tags are grouped TAGS_PER_MODEL to a model. Tags of one model share their small metadata layers, and
+    # with probability shared_ratio a tag reuses the weights of the previous tag, like llama3:latest and llama3:8b.
+    rng = random.Random(seed)
+    fill = bytes(rng.getrandbits(8) for _ in range(FILL_BLOCK_SIZE))
+    blobs_dir = os.path.join(root, 'models', 'blobs')
+    os.makedirs(blobs_dir, exist_ok=True)
+    layer_types = [METADATA_LAYER_TYPES[i % len(METADATA_LAYER_TYPES)] for i in range(metadata_layers)]
+    stats = {"tags": tags, "blobs": 0, "bytes": 0}
+    weights = metadata = None
+    for i in range(tags):
+        model_name, tag = f"bench{i // TAGS_PER_MODEL}", f"t{i % TAGS_PER_MODEL}"
+        if i % TAGS_PER_MODEL == 0:
+            weights = None
+            metadata = []
+            for n, kind in enumerate(layer_types):
+                text = f"{kind} {model_name} {n} ".encode() * rng.randint(4, 64)
+                metadata.append(dict(_write_blob(blobs_dir, [text]), mediaType=f"application/vnd.ollama.image.{kind}"))
+                stats["blobs"] += 1
+                stats["bytes"] += len(text)
+        if weights is None or rng.random() >= shared_ratio:
+            weights = dict(_write_blob(blobs_dir, _weights(rng, fill, weight_size)),
+                           mediaType='application/vnd.ollama.image.model')
+            stats["blobs"] += 1
+            stats["bytes"] += weights["size"]
+        config_bytes = json.dumps({"model_family": model_name, "tag": tag, "seed": seed}).encode()
+        config = dict(_write_blob(blobs_dir, [config_bytes]), mediaType='application/vnd.docker.container.image.v1+json')
+        stats["blobs"] += 1
+        stats["bytes"] += config["size"]
+        manifest = {
+            "schemaVersion": 2,
+            "mediaType": 'application/vnd.docker.distribution.manifest.v2+json',
+            "config": config,
+            "layers": [weights] + metadata,
+        }
+        path = os.path.join(root, 'models', 'manifests', 'registry.ollama.ai', 'library', model_name, tag)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+    return stats
+
+
+def _peak_rss():
+    # Peak resident set of this process and of the worker processes it has waited for, in bytes
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        unit = 1 if sys.platform == 'darwin' else 1024
+        return unit * max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                          resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + \
+                       [(name, ctypes.c_size_t) for name in (
+                           'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage', 'QuotaPagedPoolUsage',
+                           'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage')]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        if ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                    ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize
+    return None
+
+
+def _io_counters():
+    # Read/write syscall counts and bytes; on Linux this includes worker processes once they have exited
+    if os.path.exists('/proc/self/io'):
+        with open('/proc/self/io') as f:
+            fields = dict(line.split(': ') for line in f.read().splitlines())
+        return {"read_calls": int(fields['syscr']), "write_calls": int(fields['syscw']),
+                "read_bytes": int(fields['rchar']), "write_bytes": int(fields['wchar'])}
+    if sys.platform == 'win32':
+        import ctypes
+        counters = (ctypes.c_ulonglong * 6)()
+        if ctypes.windll.kernel32.GetProcessIoCounters(ctypes.windll.kernel32.GetCurrentProcess(), counters):
+            return {"read_calls": counters[0], "write_calls": counters[1],
+                    "read_bytes": counters[3], "write_bytes": counters[4]}
+    return None
+
+
+def _blob_bytes(root):
+    from ollama_organizer.integrity import collect_archive
+    return sum(os.path.getsize(path) for path in collect_archive(root)[0])
+
+
+def _run_scenario(name, work_dir, options):
+    # Returns (bytes, files) processed by the scenario
+    source_dir = os.path.join(work_dir, 'store')
+    target_dir = os.path.join(work_dir, 'output')
+    cache_file = os.path.join(work_dir, 'catalog_cache.json')
+    if name in ('refresh_cold', 'refresh_warm'):
+        from ollama_organizer.catalog import ModelCatalog
+        if name == 'refresh_cold' and os.path.exists(cache_file):
+            os.remove(cache_file)
+        return 0, len(ModelCatalog(cache_file).refresh(source_dir))
+    if name in ('organize_cold', 'organize_incremental'):
+        from ollama_organizer.engine import list_models, organize
+        if name == 'organize_cold':
+            shutil.rmtree(target_dir, ignore_errors=True)
+        os.makedirs(target_dir, exist_ok=True)
+        summary = organize(list_models(source_dir), source_dir, target_dir, link_mode=options["link_mode"],
+                           source_workers=options["source_workers"], target_workers=options["target_workers"],
+                           adaptive=options["adaptive"])
+        if summary["failed"]:
+            raise RuntimeError(f"{summary['failed']} model versions failed to organize")
+        return summary["bytes_copied"], summary["blob_files"] + summary["success"] + summary["skipped"]
+    if name == 'verify':
+        from ollama_organizer.integrity import verify_archive
+        report = verify_archive(target_dir, options["verify_workers"])
+        if report["corrupted"] or report["missing"]:
+            raise RuntimeError("Output directory failed verification")
+        return options["verify_bytes"], report["checked"]
+    if name == 'delete':
+        from ollama_organizer.engine import list_models
+        from ollama_organizer.blobgc import plan_gc, execute_gc
+        # Every other tag, so some weights are freed and some are kept for the remaining tags
+        result = execute_gc(plan_gc(source_dir, list_models(source_dir)[::2]))
+        return result["bytes"], result["manifests"] + result["blobs"]
+    raise ValueError(f"Unknown scenario: {name}")
+
+
+def _scenario_process(name, work_dir, options, results):
+    try:
+        io_before = _io_counters()
+        started = time.perf_counter()
+        nbytes, files = _run_scenario(name, work_dir, options)
+        elapsed = time.perf_counter() - started
+        io_after = _io_counters()
+        result = {
+            "scenario": name,
+            "elapsed": elapsed,
+            "bytes": nbytes,
+            "files": files,
+            "mb_s": nbytes / MB / elapsed if nbytes and elapsed else None,
+            "files_s": files / elapsed if elapsed else None,
+            "peak_rss_bytes": _peak_rss(),
+            "syscalls": {k: io_after[k] - io_before[k] for k in io_after} if io_before and io_after else None,
+        }
+    except Exception as e:
+        result = {"scenario": name, "error": str(e)}
+    results.put(result)
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                             stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.decode().strip() or None
+
+
+def compare(report, baseline):
+    # Elapsed time relative to a previous report, > 1.0 means slower
+    before = {s["scenario"]: s for s in baseline.get("scenarios", []) if "error" not in s}
+    ratios = {}
+    for s in report["scenarios"]:
+        old = before.get(s["scenario"])
+        if old and "error" not in s and old["elapsed"]:
+            ratios[s["scenario"]] = s["elapsed"] / old["elapsed"]
+    return ratios
+
+
+def run_bench(work_dir=None, tags=20, weight_size=64 * MB, shared_ratio=0.5, metadata_layers=4, seed=0,
+              scenarios=SCENARIOS, link_mode='copy', source_workers=SOURCE_WORKERS, target_workers=TARGET_WORKERS,
+              verify_workers=None, keep=False, on_result=None, adaptive=False):
+    # work_dir decides which disk is measured; by default a temp directory is created and removed afterwards
+    base_dir = tempfile.mkdtemp(prefix='ollama-bench-', dir=work_dir)
+    params = {
+        "tags": tags,
+        "weight_size": weight_size,
+        "shared_ratio": shared_ratio,
+        "metadata_layers": metadata_layers,
+        "seed": seed,
+        "link_mode": link_mode,
+        "source_workers": source_workers,
+        "target_workers": target_workers,
+        "verify_workers": verify_workers,
+        "adaptive": adaptive,
+    }
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "work_dir": base_dir,
+        "params": params,
+        "scenarios": [],
+    }
+    # spawn everywhere, so each scenario starts from the same clean interpreter as on Windows
+    ctx = multiprocessing.get_context('spawn')
+    try:
+        started = time.perf_counter()
+        report["store"] = make_store(os.path.join(base_dir, 'store'), tags, weight_size, shared_ratio,
+                                     metadata_layers, seed)
+        report["store"]["generate_seconds"] = time.perf_counter() - started
+        options = dict(params)
+        for name in scenarios:
+            if name == 'verify':
+                options["verify_bytes"] = _blob_bytes(os.path.join(base_dir, 'output'))
+            results = ctx.Queue()
+            process = ctx.Process(target=_scenario_process, args=(name, base_dir, options, results))
+            process.start()
+            process.join()
+            try:
+                result = results.get(timeout=1)
+            except queue.Empty:
+                result = {"scenario": name, "error": f"Benchmark process exited with code {process.exitcode}"}
+            report["scenarios"].append(result)
+            if on_result:
+                on_result(result)
+    finally:
+        if not keep:
+            shutil.rmtree(base_dir, ignore_errors=True)
+    return report
@@ -0,0 +1,132 @@
+import os
+import re
+import json
+import time
+from ollama_organizer.discovery import manifest_rel_path
+
+BLOB_NAME_RE = re.compile(r'^sha256-[0-9a-f]{64}$')
+# Blobs written by a pull that has not produced its manifest yet look unreferenced
+ORPHAN_GRACE_SECONDS = 3600
+
+
+def manifest_blob_names(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        content = json.load(f)
+    digests = [content['config']['digest']] + [layer['digest'] for layer in content.get('layers', [])]
+    return {digest.replace('sha256:', 'sha256-') for digest in digests}
+
+
+def iter_manifest_files(manifests_dir):
+    for dirpath, dirnames, filenames in os.walk(manifests_dir):
+        for name in filenames:
+            yield os.path.join(dirpath, name)
+
+
+class GCPlan:
+    def __init__(self, source_dir):
+        self.source_dir = source_dir
+        self.manifests = []
+        # manifest path -> blob names it references, for blobs to keep if the manifest cannot be removed
+        self.released = {}
+        self.missing = []
+        self.blobs = []
+        self.reclaim_bytes = 0
+        self.referenced = 0
+        self.errors = []
+
+
+def version_manifest_path(source_dir, model_name, model_version):
+    return os.path.normpath(os.path.join(source_dir, 'models', manifest_rel_path(model_name, model_version)))
+
+
+def plan_gc(source_dir, tasks=(), sweep_orphans=False, grace_seconds=ORPHAN_GRACE_SECONDS):
+    plan = GCPlan(source_dir)
+    manifests_dir = os.path.join(source_dir, 'models', 'manifests')
+    blobs_dir = os.path.join(source_dir, 'models', 'blobs')
+    targets = {version_manifest_path(source_dir, m, v): (m, v) for m, v in tasks}
+
+    refs = {}
+    released = set()
+    for path in iter_manifest_files(manifests_dir):
+        path = os.path.normpath(path)
+        try:
+            names = manifest_blob_names(path)
+        except Exception as e:
+            if path in targets:
+                names = set()
+            else:
+                plan.errors.append(f"{path} -> {e}")
+                continue
+        if path in targets:
+            plan.manifests.append(path)
+            plan.released[path] = names
+            released.update(names)
+        else:
+            for name in names:
+                refs[name] = refs.get(name, 0) + 1
+    plan.missing = [targets[p] for p in targets if p not in plan.manifests]
+    plan.referenced = len(refs)
+
+    if plan.errors:
+        # A manifest we cannot read may still reference blobs, so nothing is swept
+        return plan
+    now = time.time()
+    try:
+        entries = list(os.scandir(blobs_dir))
+    except OSError:
+        entries = []
+    for entry in entries:
+        if not BLOB_NAME_RE.match(entry.name) or entry.name in refs or not entry.is_file():
+            continue
+        st = entry.stat()
+        if entry.name in released or (sweep_orphans and now - st.st_mtime > grace_seconds):
+            plan.blobs.append((entry.path, st.st_size))
+            plan.reclaim_bytes += st.st_size
+    return plan
+
+
+def _remove_empty_dirs(path, stop_dir):
+    path = os.path.dirname(path)
+    stop_dir = os.path.normpath(stop_dir)
+    while os.path.normpath(path) != stop_dir and path.startswith(stop_dir):
+        try:
+            os.rmdir(path)
+        except OSError:
+            break
+        path = os.path.dirname(path)
+
+
+def execute_gc(plan, on_event=None):
+    emit = on_event or (lambda event: None)
+    manifests_dir = os.path.join(plan.source_dir, 'models', 'manifests')
+    result = {"manifests": 0, "blobs": 0, "bytes": 0, "failed": 0}
+    for model_name, model_version in plan.missing:
+        emit({"event": "missing", "model": model_name, "version": model_version})
+    kept = set()
+    for path in plan.manifests:
+        try:
+            os.remove(path)
+        except OSError as e:
+            # The tag stays, so do the blobs it references
+            kept.update(plan.released.get(path, ()))
+            result["failed"] += 1
+            emit({"event": "error", "path": path, "error": str(e)})
+            continue
+        _remove_empty_dirs(path, manifests_dir)
+        result["manifests"] += 1
+        emit({"event": "deleted_manifest", "path": path})
+    for error in plan.errors:
+        emit({"event": "error", "path": None, "error": error})
+    for path, size in plan.blobs:
+        if os.path.basename(path) in kept:
+            continue
+        try:
+            os.remove(path)
+            result["blobs"] += 1
+            result["bytes"] += size
+            emit({"event": "deleted_blob", "path": path, "size": size})
+        except OSError as e:
+            result["failed"] += 1
+            emit({"event": "error", "path": path, "error": str(e)})
+    emit(dict({"event": "summary"}, **result))
+    return result
@@ -0,0 +1,112 @@
+import os
+import shutil
+import threading
+from ollama_organizer.fastcopy import clone_fd
+from ollama_organizer.integrity import copy_verified
+from ollama_organizer.resumable import resumable_copy, CHUNK_SIZE
+
+POOL_DIR_NAME = 'blob_pool'
+LINK_MODES = ('copy', 'hardlink', 'reflink', 'symlink')
+
+_digest_locks = {}
+_digest_locks_guard = threading.Lock()
+
+
+def pool_dir(target_root):
+    return os.path.join(target_root, POOL_DIR_NAME)
+
+
+def _digest_lock(path):
+    with _digest_locks_guard:
+        lock = _digest_locks.get(path)
+        if lock is None:
+            lock = _digest_locks[path] = threading.Lock()
+        return lock
+
+
+def reflink(src, dst):
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            clone_fd(fsrc.fileno(), fdst.fileno())
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        raise
+
+
+def _remove_existing(dst):
+    if os.path.lexists(dst):
+        os.remove(dst)
+
+
+def clone_blob(src, dst):
+    # An independent copy of a verified blob on the same disk: a copy-on-write clone where supported
+    _remove_existing(dst)
+    try:
+        reflink(src, dst)
+        return 'reflink'
+    except OSError:
+        shutil.copyfile(src, dst)
+        return 'copy'
+
+
+def link_blob(pool_path, dst, mode, link_dir=None):
+    # Falls back from symlink to hardlink, between hardlink and reflink, and only then to a copy of the pool file;
+    # returns the mode actually used. link_dir is where dst will live once its version is published, relative
+    # symlinks are made from there.
+    if mode == 'symlink':
+        try:
+            _remove_existing(dst)
+            os.symlink(os.path.relpath(pool_path, link_dir or os.path.dirname(dst)), dst)
+            return 'symlink'
+        except OSError:
+            mode = 'hardlink'
+    if os.path.exists(dst) and os.path.samefile(pool_path, dst):
+        return 'hardlink'
+    for method in ('reflink', 'hardlink') if mode == 'reflink' else ('hardlink', 'reflink'):
+        try:
+            _remove_existing(dst)
+            if method == 'reflink':
+                reflink(pool_path, dst)
+            else:
+                os.link(pool_path, dst)
+            return method
+        except OSError:
+            continue
+    shutil.copyfile(pool_path, dst)
+    return 'copy'
+
+
+def copy_blob_file(src, dst, blob_name=None, progress=None):
+    # Large layers go through *.partial files so an interrupted copy can resume
+    if os.path.getsize(src) >= CHUNK_SIZE:
+        return resumable_copy(src, dst, blob_name, progress=progress)
+    return copy_verified(src, dst, blob_name, progress)
+
+
+def add_to_pool(src, pool_path, progress=None):
+    with _digest_lock(pool_path):
+        if os.path.exists(pool_path) and os.path.getsize(pool_path) == os.path.getsize(src):
+            return False
+        if os.path.getsize(src) >= CHUNK_SIZE:
+            resumable_copy(src, pool_path, progress=progress)
+            return True
+        tmp_path = f"{pool_path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            copy_verified(src, tmp_path, os.path.basename(pool_path), progress)
+            os.replace(tmp_path, pool_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return True
+
+
+def place_blob(src, dst, blob_pool_dir=None, link_mode='copy', progress=None, link_dir=None):
+    if link_mode == 'copy' or not blob_pool_dir:
+        _remove_existing(dst)
+        copy_blob_file(src, dst, progress=progress)
+        return 'copy'
+    os.makedirs(blob_pool_dir, exist_ok=True)
+    pool_path = os.path.join(blob_pool_dir, os.path.basename(dst))
+    add_to_pool(src, pool_path, progress)
+    return link_blob(pool_path, dst, link_mode, link_dir)
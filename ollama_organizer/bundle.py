@@ -0,0 +1,283 @@
+import os
+import io
+import json
+import time
+import gzip
+import hashlib
+import tarfile
+import threading
+from ollama_organizer.blobgc import BLOB_NAME_RE
+from ollama_organizer.discovery import manifest_rel_path, model_ref
+from ollama_organizer.integrity import COPY_BUFFER_SIZE, digest_hex
+from ollama_organizer.metrics import TransferMetrics
+from ollama_organizer.planner import read_manifest, blob_file_name
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+BUNDLE_SUFFIX = '.tar'
+INDEX_NAME = 'index.json'
+# Weights are incompressible, only small metadata layers (config, license, template, params) are compressed
+COMPRESS_MAX_SIZE = 16 * 1024 * 1024
+WEIGHT_MEDIA_TYPES = ('application/vnd.ollama.image.model', 'application/vnd.ollama.image.projector',
+                      'application/vnd.ollama.image.adapter')
+CODEC_SUFFIXES = {'zstd': '.zst', 'gzip': '.gz'}
+# Metadata layers are mostly text; higher levels gain little and cost seconds on the larger ones
+ZSTD_LEVEL = 3
+
+
+def default_codec():
+    return 'zstd' if zstandard is not None else 'gzip'
+
+
+def _compress(data, codec):
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return gzip.compress(data, mtime=0)
+
+
+def _decompress(data, codec):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("This bundle uses zstd compression, install the zstandard package to import it")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def bundle_file_name(model_name, model_version):
+    return f"{model_name.replace('/', '_')}-{model_version}{BUNDLE_SUFFIX}"
+
+
+class _HashingReader:
+    def __init__(self, f, sha, progress=None):
+        self.f = f
+        self.sha = sha
+        self.progress = progress
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.sha.update(data)
+        if self.progress and data:
+            self.progress(len(data))
+        return data
+
+
+def _tar_info(name, size):
+    info = tarfile.TarInfo(name)
+    info.size = size
+    # A fixed time, so exporting the same version twice gives the same bytes
+    info.mtime = 0
+    info.mode = 0o644
+    return info
+
+
+def _add_member(tar, name, size, fileobj):
+    # Returns the offset of the member data, so a reader can fetch a single blob by byte range
+    tar.addfile(_tar_info(name, size), fileobj)
+    blocks = (size + tarfile.BLOCKSIZE - 1) // tarfile.BLOCKSIZE
+    return tar.offset - blocks * tarfile.BLOCKSIZE
+
+
+def export_version(source_dir, model_name, model_version, bundle_path, codec=None, progress=None):
+    # Manifest first so a streaming import knows every digest up front, digest index last
+    codec = codec or default_codec()
+    manifest_bytes, content = read_manifest(source_dir, model_name, model_version)
+    blobs_dir = os.path.join(source_dir, 'models', 'blobs')
+    index = {
+        "model": model_name,
+        "version": model_version,
+        "manifest": '/'.join(['models'] + manifest_rel_path(model_name, model_version).split(os.sep)),
+        "manifest_sha256": hashlib.sha256(manifest_bytes).hexdigest(),
+        "blobs": [],
+    }
+    layers = {}
+    for layer in [content['config']] + list(content.get('layers', [])):
+        layers.setdefault(blob_file_name(layer['digest']), layer)
+
+    tmp_path = bundle_path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f, tarfile.open(fileobj=f, mode='w', format=tarfile.PAX_FORMAT) as tar:
+            _add_member(tar, index["manifest"], len(manifest_bytes), io.BytesIO(manifest_bytes))
+            for name, layer in layers.items():
+                path = os.path.join(blobs_dir, name)
+                size = os.path.getsize(path)
+                entry = {"digest": layer['digest'], "size": size, "compression": None}
+                if size <= COMPRESS_MAX_SIZE and layer.get('mediaType') not in WEIGHT_MEDIA_TYPES:
+                    with open(path, 'rb') as blob:
+                        data = blob.read()
+                    actual = hashlib.sha256(data).hexdigest()
+                    packed = _compress(data, codec)
+                    if len(packed) < len(data):
+                        entry["compression"] = codec
+                        data = packed
+                    entry["name"] = f"models/blobs/{name}{CODEC_SUFFIXES.get(entry['compression'], '')}"
+                    entry["stored_size"] = len(data)
+                    entry["offset"] = _add_member(tar, entry["name"], len(data), io.BytesIO(data))
+                    if progress:
+                        progress(size)
+                else:
+                    sha = hashlib.sha256()
+                    entry["name"] = f"models/blobs/{name}"
+                    entry["stored_size"] = size
+                    with open(path, 'rb', buffering=COPY_BUFFER_SIZE) as blob:
+                        entry["offset"] = _add_member(tar, entry["name"], size, _HashingReader(blob, sha, progress))
+                    actual = sha.hexdigest()
+                if actual != digest_hex(name):
+                    raise RuntimeError(f"Digest mismatch: {path} expected {layer['digest']}, got sha256:{actual}")
+                index["blobs"].append(entry)
+            index_bytes = json.dumps(index, indent=2).encode('utf-8')
+            _add_member(tar, INDEX_NAME, len(index_bytes), io.BytesIO(index_bytes))
+        os.replace(tmp_path, bundle_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return index
+
+
+def read_index(bundle_path):
+    with tarfile.open(bundle_path, mode='r:') as tar:
+        return json.loads(tar.extractfile(tar.getmember(INDEX_NAME)).read().decode('utf-8'))
+
+
+def _safe_manifest_path(models_dir, name):
+    parts = name.split('/')
+    if len(parts) != 6 or parts[:2] != ['models', 'manifests'] or any(p in ('', '.', '..') for p in parts):
+        raise RuntimeError(f"Unexpected manifest path in bundle: {name}")
+    return os.path.join(models_dir, *parts[1:])
+
+
+def _write_blob(src, dst, expected, codec, progress=None):
+    tmp_path = f"{dst}.tmp-{os.getpid()}-{threading.get_ident()}"
+    sha = hashlib.sha256()
+    try:
+        with open(tmp_path, 'wb') as f:
+            if codec:
+                data = _decompress(src.read(), codec)
+                sha.update(data)
+                f.write(data)
+                if progress:
+                    progress(len(data))
+            else:
+                while True:
+                    data = src.read(COPY_BUFFER_SIZE)
+                    if not data:
+                        break
+                    sha.update(data)
+                    f.write(data)
+                    if progress:
+                        progress(len(data))
+        if sha.hexdigest() != expected:
+            raise RuntimeError(f"Digest mismatch: {dst} expected sha256:{expected}, got sha256:{sha.hexdigest()}")
+        os.replace(tmp_path, dst)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def import_bundle(fileobj, dest_dir, progress=None):
+    # Reads the tar as a stream, so bundles can come from a pipe; the manifest is written last
+    models_dir = os.path.join(dest_dir, 'models')
+    blobs_dir = os.path.join(models_dir, 'blobs')
+    os.makedirs(blobs_dir, exist_ok=True)
+    manifest_path = manifest_bytes = None
+    sizes = {}
+    done = set()
+    with tarfile.open(fileobj=fileobj, mode='r|') as tar:
+        for member in tar:
+            if not member.isfile() or member.name == INDEX_NAME:
+                continue
+            if member.name.startswith('models/manifests/'):
+                manifest_path = _safe_manifest_path(models_dir, member.name)
+                manifest_bytes = tar.extractfile(member).read()
+                content = json.loads(manifest_bytes.decode('utf-8'))
+                for layer in [content['config']] + list(content.get('layers', [])):
+                    sizes[blob_file_name(layer['digest'])] = layer.get('size')
+                continue
+            base = member.name.rsplit('/', 1)[-1]
+            codec = None
+            for candidate, suffix in CODEC_SUFFIXES.items():
+                if base.endswith(suffix):
+                    codec, base = candidate, base[:-len(suffix)]
+            if not member.name.startswith('models/blobs/') or not BLOB_NAME_RE.match(base):
+                raise RuntimeError(f"Unexpected file in bundle: {member.name}")
+            if base not in sizes:
+                raise RuntimeError(f"Blob not referenced by the bundle manifest: {member.name}")
+            dst = os.path.join(blobs_dir, base)
+            if os.path.exists(dst) and os.path.getsize(dst) == sizes[base]:
+                if progress:
+                    progress(sizes[base] or 0)
+            else:
+                _write_blob(tar.extractfile(member), dst, digest_hex(base), codec, progress)
+            done.add(base)
+    if manifest_path is None:
+        raise RuntimeError("No manifest found in bundle")
+    missing = [name for name in sizes if name not in done and not os.path.exists(os.path.join(blobs_dir, name))]
+    if missing:
+        raise RuntimeError(f"Bundle is missing blob files: {', '.join(missing)}")
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(manifest_bytes)
+    os.replace(tmp_path, manifest_path)
+    host, namespace, repo, tag = os.path.relpath(manifest_path, models_dir).split(os.sep)[-4:]
+    return model_ref(host, namespace, repo), tag
+
+
+def _bundle_current(bundle_path, manifest_bytes):
+    try:
+        return read_index(bundle_path)["manifest_sha256"] == hashlib.sha256(manifest_bytes).hexdigest()
+    except Exception:
+        return False
+
+
+def export_bundles(tasks, source_dir, dest_dir, codec=None, on_event=None):
+    emit_lock = threading.Lock()
+
+    def emit(event):
+        if on_event:
+            with emit_lock:
+                on_event(event)
+
+    codec = codec or default_codec()
+    summary = {"total": len(tasks), "skipped": 0, "success": 0, "failed": 0, "bytes": 0,
+               "codec": codec, "elapsed": 0.0}
+    start_time = time.time()
+    emit({"event": "bundle_start", "total": len(tasks), "codec": codec})
+    pending = []
+    total_bytes = 0
+    for model_name, model_version in tasks:
+        bundle_path = os.path.join(dest_dir, bundle_file_name(model_name, model_version))
+        try:
+            manifest_bytes, content = read_manifest(source_dir, model_name, model_version)
+        except Exception as e:
+            pending.append((model_name, model_version, bundle_path, f"{model_name}/{model_version} -> {e}"))
+            continue
+        if _bundle_current(bundle_path, manifest_bytes):
+            summary["skipped"] += 1
+            emit({"event": "skipped", "model": model_name, "version": model_version})
+            continue
+        total_bytes += sum(layer.get('size') or 0 for layer in [content['config']] + list(content.get('layers', [])))
+        pending.append((model_name, model_version, bundle_path, None))
+
+    metrics = TransferMetrics(total_bytes, emit)
+    finished = summary["skipped"]
+    for model_name, model_version, bundle_path, error in pending:
+        if error is None:
+            try:
+                export_version(source_dir, model_name, model_version, bundle_path, codec, metrics.add_bytes)
+            except Exception as e:
+                error = f"{model_name}/{model_version} -> {e}"
+        if error is None:
+            summary["success"] += 1
+            emit({"event": "done", "model": model_name, "version": model_version, "bundle": bundle_path})
+        else:
+            summary["failed"] += 1
+            emit({"event": "error", "model": model_name, "version": model_version, "error": error})
+        finished += 1
+        emit({"event": "progress", "finished": finished, "total": len(tasks)})
+    summary["bytes"] = metrics.done_bytes
+    summary["elapsed"] = time.time() - start_time
+    emit(dict({"event": "bundle_summary"}, **summary))
+    return summary
@@ -0,0 +1,140 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from ollama_organizer.discovery import scan_manifests, SCAN_WORKERS
+from ollama_organizer.gguf import model_info, MODEL_MEDIA_TYPE
+from ollama_organizer.analytics import analyze_store
+
+CACHE_VERSION = 2
+GGUF_FIELDS = ("architecture", "quantization", "parameters", "context_length", "size_label")
+
+
+def parse_manifest_entry(path, model_name, model_version, st):
+    entry = {
+        "model": model_name,
+        "version": model_version,
+        "path": path,
+        "mtime_ns": st.st_mtime_ns,
+        "manifest_size": st.st_size,
+        "config_digest": None,
+        "layers": [],
+        "total_size": 0,
+    }
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = json.load(f)
+        config = content['config']
+        entry["config_digest"] = config['digest']
+        blobs = [config] + list(content.get('layers', []))
+        entry["layers"] = [
+            {"digest": blob['digest'], "media_type": blob.get('mediaType', ''), "size": blob.get('size') or 0}
+            for blob in blobs
+        ]
+        entry["total_size"] = sum(layer["size"] for layer in entry["layers"])
+    except Exception as e:
+        entry["error"] = str(e)
+    return entry
+
+
+class ModelCatalog:
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self.entries = {}
+        # GGUF header fields by blob digest, shared by every tag using the same weights
+        self.gguf = {}
+        # Store-wide totals from the last refresh
+        self.stats = None
+        self.loaded = False
+
+    def load(self):
+        self.loaded = True
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                return
+            if data.get("version") == CACHE_VERSION:
+                self.entries = data["manifests"]
+                self.gguf = data["gguf"]
+            else:
+                # Older caches held the manifest entries only
+                self.entries = data
+
+    def save(self):
+        tmp_path = self.cache_file + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": CACHE_VERSION, "manifests": self.entries, "gguf": self.gguf}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_file)
+        except OSError:
+            pass
+
+    def scan(self, manifests_dir):
+        seen = {}
+        changed = False
+        for model_name, model_version, path, st in scan_manifests(manifests_dir):
+            cached = self.entries.get(path)
+            if cached is None or cached["mtime_ns"] != st.st_mtime_ns or cached["manifest_size"] != st.st_size \
+                    or cached["model"] != model_name:
+                cached = parse_manifest_entry(path, model_name, model_version, st)
+                self.entries[path] = cached
+                changed = True
+            seen[path] = cached
+        prefix = os.path.join(manifests_dir, '')
+        for path in [p for p in self.entries if p.startswith(prefix) and p not in seen]:
+            del self.entries[path]
+            changed = True
+        return list(seen.values()), changed
+
+    def scan_gguf(self, blobs_dir, entries):
+        missing = {d for d in map(model_digest, entries) if d and d not in self.gguf}
+        changed = False
+
+        def parse(digest):
+            path = os.path.join(blobs_dir, digest.replace('sha256:', 'sha256-'))
+            try:
+                return digest, model_info(path)
+            except FileNotFoundError:
+                # Possibly a pull still in progress, try again on the next refresh
+                return digest, None
+            except (OSError, ValueError) as e:
+                return digest, {"error": str(e)}
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(SCAN_WORKERS, len(missing))) as executor:
+                for digest, info in executor.map(parse, sorted(missing)):
+                    if info is not None:
+                        self.gguf[digest] = info
+                        changed = True
+        referenced = {model_digest(entry) for entry in self.entries.values()}
+        for digest in [d for d in self.gguf if d not in referenced]:
+            del self.gguf[digest]
+            changed = True
+        return changed
+
+    def refresh(self, source_dir):
+        if not self.loaded:
+            self.load()
+        manifests_dir = os.path.normpath(os.path.join(source_dir, 'models', 'manifests'))
+        blobs_dir = os.path.join(source_dir, 'models', 'blobs')
+        entries, changed = self.scan(manifests_dir)
+        if self.scan_gguf(blobs_dir, entries):
+            changed = True
+        if changed:
+            self.save()
+        # Derived fields go on copies; the cached entries keep only what was read from the manifests
+        entries = [dict(entry) for entry in entries]
+        self.stats = analyze_store(entries, blobs_dir)
+        for entry in entries:
+            info = self.gguf.get(model_digest(entry)) or {}
+            entry.update((field, info.get(field)) for field in GGUF_FIELDS)
+        entries.sort(key=lambda e: (e["model"], e["version"]))
+        return entries
+
+
+def model_digest(entry):
+    for layer in entry["layers"]:
+        if layer["media_type"] == MODEL_MEDIA_TYPE:
+            return layer["digest"]
+    return None
@@ -0,0 +1,490 @@
+import os
+import sys
+import json
+import argparse
+from ollama_organizer.blobstore import LINK_MODES
+from ollama_organizer.restore import RESTORE_MODES
+from ollama_organizer.scheduler import SOURCE_WORKERS, TARGET_WORKERS
+from ollama_organizer.watcher import DEBOUNCE_SECONDS, POLL_INTERVAL
+from ollama_organizer.utils import format_size, format_duration
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+
+def format_event(event):
+    kind = event["event"]
+    # Only set when organizing into several output directories
+    where = f" -> {event['target']}" if event.get("target") else ""
+    if kind == "start":
+        msg = f"Total model versions to process: {event['total']}\nBlob storage mode: {event['link_mode']}"
+        if event.get("targets"):
+            msg += "\nOutput directories: " + ", ".join(event["targets"])
+        return msg
+    if kind == "bundle_start":
+        return f"Total model versions to export: {event['total']}\nMetadata compression: {event['codec']}"
+    if kind == "bundle_summary":
+        return (f"Exported {event['success']}/{event['total']} (unchanged {event['skipped']}, failed {event['failed']}) "
+                f"in {event['elapsed']:.2f} seconds, {format_size(event['bytes'])} written")
+    if kind == "restore_start":
+        return f"Total model versions to restore: {event['total']}\nBlob transfer mode: {event['link_mode']}"
+    if kind == "restore_plan":
+        return (f"Blob files to transfer: {event['blobs']} ({format_size(event['bytes'])}), "
+                f"already in store: {event['present_blobs']} ({format_size(event['present_bytes'])})")
+    if kind == "conflict":
+        return (f"[Conflict] Model: {event['model']}, Version: {event['version']} "
+                f"(the store has a different manifest, use --overwrite to replace it)")
+    if kind == "restore_summary":
+        if event["dry_run"]:
+            return (f"Dry run: {event['skipped']} already installed, {event['conflicts']} conflicts, "
+                    f"{format_size(event['bytes_to_copy'])} to transfer")
+        methods = ", ".join(f"{count} by {method}" for method, count in sorted(event["methods"].items()))
+        return (f"Restored {event['success']}/{event['total']} (already installed {event['skipped']}, "
+                f"conflicts {event['conflicts']}, failed {event['failed']}) in {event['elapsed']:.2f} seconds, "
+                f"{event['blob_files']} blob files transferred" + (f" ({methods})" if methods else ""))
+    if kind == "skipped":
+        return f"[Skipped] Model: {event['model']}, Version: {event['version']}{where}"
+    if kind == "stale":
+        return f"[Stale] Model: {event['model']}, Version: {event['version']} (manifest changed){where}"
+    if kind == "plan":
+        return (f"Blob files to copy: {event['blobs']} ({format_size(event['bytes'])}), "
+                f"already in output: {event['present_blobs']} ({format_size(event['present_bytes'])})")
+    if kind == "done":
+        return f"[Done] Model: {event['model']}, Version: {event['version']}{where}"
+    if kind == "error":
+        return f"[Error] {event['error']}{where}"
+    if kind == "watch_start":
+        return f"Watching {event['manifests']} for new pulls ({event['mode']}), press Ctrl+C to stop"
+    if kind == "watch_batch":
+        return "New or updated: " + ", ".join(event["models"])
+    if kind == "progress":
+        return f"Progress: {event['finished']}/{event['total']}"
+    if kind == "throughput":
+        return (f"Throughput: {event['mb_s']:.1f} MB/s, {format_size(event['done_bytes'])} / "
+                f"{format_size(event['total_bytes'])}, ETA {format_duration(event['eta_seconds'])}")
+    if kind == "summary":
+        if event["dry_run"]:
+            return (f"Dry run: {event['up_to_date']} up to date, {event['stale']} stale, "
+                    f"{event['to_organize']} to organize, {format_size(event['bytes_to_copy'])} to transfer")
+        msg = (f"Organized {event['success']}/{event['total']} (skipped {event['skipped']}, failed {event['failed']}) "
+               f"in {event['elapsed']:.2f} seconds, {format_size(event['bytes_copied'])} copied "
+               f"at {event['average_mb_s'] or 0:.1f} MB/s\nRun report written to: {event['run_report_file']}")
+        if event["error_log_file"]:
+            msg += f"\nFailed details written to: {event['error_log_file']}"
+        if event.get("device_workers"):
+            msg += "\nCopy threads per device: " + ", ".join(f"{name}: {n}" for name, n in sorted(event["device_workers"].items()))
+        return msg
+    return None
+
+
+def make_printer(as_json):
+    def on_event(event):
+        if as_json:
+            line = json.dumps(event, ensure_ascii=False)
+        else:
+            line = format_event(event)
+        if line is not None:
+            print(line, flush=True)
+    return on_event
+
+
+def make_targets(targets):
+    # Returns an error message, or None once every output directory exists
+    for target in targets:
+        try:
+            os.makedirs(target, exist_ok=True)
+        except OSError as e:
+            return f"Cannot use output directory {target}: {e.strerror or e}"
+    return None
+
+
+def cmd_list(args):
+    from ollama_organizer.engine import list_models, select_models
+    models = list_models(args.source)
+    if args.models:
+        models = select_models(models, args.models)
+    for model_name, model_version in models:
+        if args.json:
+            print(json.dumps({"model": model_name, "version": model_version}))
+        else:
+            print(f"{model_name}:{model_version}")
+    return EXIT_OK
+
+
+def cmd_usage(args):
+    from ollama_organizer.catalog import parse_manifest_entry
+    from ollama_organizer.discovery import scan_manifests
+    from ollama_organizer.analytics import analyze_store
+    from ollama_organizer.engine import select_models
+    models_dir = os.path.join(args.source, 'models')
+    entries = [parse_manifest_entry(path, model_name, model_version, st)
+               for model_name, model_version, path, st in scan_manifests(os.path.join(models_dir, 'manifests'))]
+    # Every tag is counted for sharing, the patterns only limit what is printed
+    stats = analyze_store(entries, os.path.join(models_dir, 'blobs'))
+    shown = set(select_models([(e["model"], e["version"]) for e in entries], args.models or ['*']))
+    entries = [e for e in entries if (e["model"], e["version"]) in shown]
+    entries.sort(key=lambda e: (e["model"], e["version"]) if args.sort == 'name' else -e[args.sort + "_bytes"])
+    for entry in entries:
+        if args.json:
+            print(json.dumps({"event": "usage", "model": entry["model"], "version": entry["version"],
+                              "total_bytes": entry["total_size"], "exclusive_bytes": entry["exclusive_bytes"],
+                              "shared_bytes": entry["shared_bytes"], "freed_bytes": entry["freed_bytes"]}))
+        else:
+            print(f"{entry['model']}:{entry['version']}  size {format_size(entry['total_size'])}, "
+                  f"shared {format_size(entry['shared_bytes'])}, frees {format_size(entry['freed_bytes'])}")
+    if args.json:
+        print(json.dumps(dict({"event": "summary"}, **stats)))
+    else:
+        print(f"{stats['tags']} model versions, {stats['blobs']} blob files: {format_size(stats['stored_bytes'])} "
+              f"on disk for {format_size(stats['logical_bytes'])} of model data (dedup ratio {stats['dedup_ratio']:.2f}x)")
+        if stats["unreferenced_blobs"]:
+            print(f"{stats['unreferenced_blobs']} unreferenced blob files hold {format_size(stats['unreferenced_bytes'])}")
+        if stats["missing_blobs"]:
+            print(f"{stats['missing_blobs']} referenced blob files ({format_size(stats['missing_bytes'])}) are missing "
+                  f"and left out of the totals")
+    return EXIT_OK
+
+
+def cmd_organize(args):
+    from ollama_organizer.engine import list_models, select_models, organize
+    from ollama_organizer.metrics import MB
+    from ollama_organizer.throttle import TokenBucket
+    tasks = select_models(list_models(args.source), args.models or ['*'])
+    if not tasks:
+        print("No models matched.", file=sys.stderr)
+        return EXIT_USAGE
+    error = make_targets(args.target)
+    if error:
+        print(error, file=sys.stderr)
+        return EXIT_USAGE
+    throttle = TokenBucket(args.bwlimit * MB) if args.bwlimit else None
+    config = {}
+    if args.config and os.path.exists(args.config):
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    summary = organize(tasks, args.source, args.target, link_mode=args.link_mode,
+                       source_workers=args.source_workers, target_workers=args.target_workers,
+                       dry_run=args.dry_run, verify_existing=args.verify_existing,
+                       on_event=make_printer(args.json), throttle=throttle, low_io_priority=args.low_priority,
+                       adaptive=args.adaptive, device_workers=config.get('device_workers'), shared=args.shared)
+    if args.config and args.adaptive and not args.dry_run:
+        config['device_workers'] = summary["device_workers"]
+        tmp_path = args.config + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, args.config)
+    return EXIT_FAILED if summary["failed"] else EXIT_OK
+
+
+def cmd_watch(args):
+    from ollama_organizer.metrics import MB
+    from ollama_organizer.throttle import TokenBucket
+    from ollama_organizer.watcher import watch_and_organize
+    error = make_targets(args.target)
+    if error:
+        print(error, file=sys.stderr)
+        return EXIT_USAGE
+    throttle = TokenBucket(args.bwlimit * MB) if args.bwlimit else None
+    try:
+        watch_and_organize(args.source, args.target, args.models or ['*'], on_event=make_printer(args.json),
+                           initial_sync=not args.no_initial_sync, debounce=args.debounce,
+                           poll_interval=args.poll_interval, link_mode=args.link_mode,
+                           source_workers=args.source_workers, target_workers=args.target_workers,
+                           verify_existing=args.verify_existing, throttle=throttle,
+                           low_io_priority=not args.normal_priority, shared=args.shared)
+    except KeyboardInterrupt:
+        pass
+    return EXIT_OK
+
+
+def cmd_verify(args):
+    from ollama_organizer.integrity import verify_archive
+    printer = make_printer(args.json)
+
+    def on_blob_checked(path, ok, done, total):
+        if args.json:
+            printer({"event": "verified", "blob": path, "ok": ok, "finished": done, "total": total})
+        elif not ok:
+            print(f"[Corrupted] {path}", flush=True)
+
+    report = verify_archive(args.target, args.workers, on_blob_checked)
+    if args.json:
+        printer(dict({"event": "summary"}, **report))
+    else:
+        for path in report["missing"]:
+            print(f"[Missing] {path}")
+        print(f"Checked {report['checked']} blob files, {len(report['corrupted'])} corrupted, "
+              f"{len(report['missing'])} missing")
+    return EXIT_FAILED if report["corrupted"] or report["missing"] else EXIT_OK
+
+
+def cmd_export(args):
+    from ollama_organizer.engine import list_models, select_models
+    from ollama_organizer.bundle import export_bundles
+    tasks = select_models(list_models(args.source), args.models or ['*'])
+    if not tasks:
+        print("No models matched.", file=sys.stderr)
+        return EXIT_USAGE
+    os.makedirs(args.dest, exist_ok=True)
+    summary = export_bundles(tasks, args.source, args.dest, args.codec, make_printer(args.json))
+    return EXIT_FAILED if summary["failed"] else EXIT_OK
+
+
+def cmd_import(args):
+    from ollama_organizer.bundle import import_bundle
+    printer = make_printer(args.json)
+    failed = 0
+    for bundle in args.bundles:
+        try:
+            if bundle == '-':
+                model_name, model_version = import_bundle(sys.stdin.buffer, args.target)
+            else:
+                with open(bundle, 'rb') as f:
+                    model_name, model_version = import_bundle(f, args.target)
+            printer({"event": "done", "model": model_name, "version": model_version})
+        except Exception as e:
+            failed += 1
+            printer({"event": "error", "bundle": bundle, "error": f"{bundle} -> {e}"})
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def cmd_restore(args):
+    from ollama_organizer.engine import select_models
+    from ollama_organizer.restore import list_archive, restore
+    tasks = select_models([(model_name, model_version) for model_name, model_version, _ in list_archive(args.archive)],
+                          args.models or ['*'])
+    if not tasks:
+        print("No models matched.", file=sys.stderr)
+        return EXIT_USAGE
+    summary = restore(args.archive, args.target, tasks, link_mode=args.link_mode,
+                      verify_existing=args.verify_existing, overwrite=args.overwrite, dry_run=args.dry_run,
+                      source_workers=args.source_workers, target_workers=args.target_workers,
+                      on_event=make_printer(args.json))
+    return EXIT_FAILED if summary["failed"] or summary["conflicts"] else EXIT_OK
+
+
+def cmd_bench(args):
+    from ollama_organizer.bench import run_bench, compare, SCENARIOS
+    from ollama_organizer.metrics import MB
+    unknown = [name for name in args.scenario or () if name not in SCENARIOS]
+    if unknown:
+        print(f"Unknown scenarios: {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})", file=sys.stderr)
+        return EXIT_USAGE
+
+    def on_result(result):
+        # Progress goes to stderr so stdout stays a single JSON document
+        if "error" in result:
+            print(f"[Error] {result['scenario']} -> {result['error']}", file=sys.stderr, flush=True)
+        else:
+            rate = f", {result['mb_s']:.1f} MB/s" if result["mb_s"] else ""
+            print(f"{result['scenario']}: {result['elapsed']:.2f} seconds, {result['files_s']:.0f} files/s{rate}",
+                  file=sys.stderr, flush=True)
+
+    scenarios = [name for name in SCENARIOS if name in args.scenario] if args.scenario else SCENARIOS
+    report = run_bench(args.dir, args.tags, int(args.weight_mb * MB), args.shared_ratio, args.metadata_layers,
+                       args.seed, scenarios, args.link_mode, args.source_workers, args.target_workers,
+                       args.verify_workers, args.keep, on_result, args.adaptive)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            report["compare"] = compare(report, json.load(f))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return EXIT_FAILED if any("error" in result for result in report["scenarios"]) else EXIT_OK
+
+
+def run_gc(plan, args):
+    printer = make_printer(args.json)
+    if args.json:
+        printer({"event": "plan", "manifests": len(plan.manifests), "blobs": len(plan.blobs),
+                 "reclaim_bytes": plan.reclaim_bytes, "errors": plan.errors})
+    else:
+        for model_name, model_version in plan.missing:
+            print(f"[Skipped] Model: {model_name}, Version: {model_version} (not found)")
+        for error in plan.errors:
+            print(f"[Error] {error}")
+        if plan.errors:
+            print("Unreadable manifests found, no blob files will be removed.")
+        print(f"Manifests to delete: {len(plan.manifests)}, unreferenced blob files: {len(plan.blobs)}, "
+              f"reclaimable: {format_size(plan.reclaim_bytes)}", flush=True)
+    if args.dry_run:
+        return EXIT_FAILED if plan.errors else EXIT_OK
+
+    from ollama_organizer.blobgc import execute_gc
+
+    def on_event(event):
+        if args.json:
+            printer(event)
+        elif event["event"] == "deleted_manifest":
+            print(f"[Deleted] {event['path']}", flush=True)
+        elif event["event"] == "deleted_blob":
+            print(f"[Deleted] {event['path']} ({format_size(event['size'])})", flush=True)
+        elif event["event"] == "error" and event["path"]:
+            print(f"[Error] {event['path']} -> {event['error']}", flush=True)
+        elif event["event"] == "summary":
+            print(f"Deleted {event['manifests']} manifests and {event['blobs']} blob files, "
+                  f"freed {format_size(event['bytes'])}", flush=True)
+
+    result = execute_gc(plan, on_event)
+    return EXIT_FAILED if result["failed"] or plan.errors else EXIT_OK
+
+
+def cmd_delete(args):
+    from ollama_organizer.engine import list_models, select_models
+    from ollama_organizer.blobgc import plan_gc
+    tasks = select_models(list_models(args.source), args.models)
+    if not tasks:
+        print("No models matched.", file=sys.stderr)
+        return EXIT_USAGE
+    return run_gc(plan_gc(args.source, tasks), args)
+
+
+def cmd_gc(args):
+    from ollama_organizer.blobgc import plan_gc
+    return run_gc(plan_gc(args.source, sweep_orphans=True, grace_seconds=args.grace_hours * 3600), args)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='ollama_organizer', description="Organize local Ollama models without the GUI")
+    sub = parser.add_subparsers(dest='command')
+
+    p = sub.add_parser('list', help="List model versions in an Ollama store")
+    p.add_argument('--source', required=True, help="Ollama root directory (the .ollama folder)")
+    p.add_argument('models', nargs='*', help="Glob patterns, e.g. 'llama3*' or 'qwen*:7b*'")
+    p.add_argument('--json', action='store_true', help="Print one JSON object per line")
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser('usage', help="Show the space each model version holds, counting shared layers once")
+    p.add_argument('--source', required=True, help="Ollama root directory (the .ollama folder)")
+    p.add_argument('models', nargs='*', help="Glob patterns, e.g. 'llama3*' or 'qwen*:7b*' (default: all)")
+    p.add_argument('--sort', choices=('name', 'freed', 'exclusive', 'shared'), default='name',
+                   help="Order of the listed versions (default: name)")
+    p.add_argument('--json', action='store_true', help="Print one JSON object per version and a summary")
+    p.set_defaults(func=cmd_usage)
+
+    p = sub.add_parser('organize', help="Copy selected model versions into the output directory")
+    p.add_argument('--source', required=True, help="Ollama root directory (the .ollama folder)")
+    p.add_argument('--target', required=True, action='append',
+                   help="Output directory; repeat to copy into several, reading each blob once")
+    p.add_argument('models', nargs='*', help="Glob patterns, e.g. 'llama3*' or 'qwen*:7b*' (default: all)")
+    p.add_argument('--link-mode', choices=LINK_MODES, default='copy')
+    p.add_argument('--source-workers', type=int, default=SOURCE_WORKERS)
+    p.add_argument('--target-workers', type=int, default=TARGET_WORKERS)
+    p.add_argument('--dry-run', action='store_true', help="Only report what would be copied")
+    p.add_argument('--verify-existing', action='store_true', help="Re-hash blobs already in the output before reusing them")
+    p.add_argument('--bwlimit', type=float, default=0, metavar='MB/S', help="Cap total copy bandwidth (default: unlimited)")
+    p.add_argument('--shared', action='store_true',
+                   help="Other hosts may organize into the same output directory at once; claim blobs before writing")
+    p.add_argument('--low-priority', action='store_true',
+                   help="Copy with the lowest disk priority and drop copied files from the page cache")
+    p.add_argument('--adaptive', action='store_true',
+                   help="Tune the number of copy threads per disk from the measured throughput")
+    p.add_argument('--config', default=None,
+                   help="JSON file remembering tuned thread counts per disk, e.g. the GUI's config.json")
+    p.add_argument('--json', action='store_true', help="Print progress events as JSON lines")
+    p.set_defaults(func=cmd_organize)
+
+    p = sub.add_parser('watch', help="Keep organizing model versions as they are pulled, until interrupted")
+    p.add_argument('--source', required=True, help="Ollama root directory (the .ollama folder)")
+    p.add_argument('--target', required=True, action='append',
+                   help="Output directory; repeat to copy into several, reading each blob once")
+    p.add_argument('models', nargs='*', help="Glob patterns, e.g. 'llama3*' or 'qwen*:7b*' (default: all)")
+    p.add_argument('--link-mode', choices=LINK_MODES, default='copy')
+    p.add_argument('--source-workers', type=int, default=SOURCE_WORKERS)
+    p.add_argument('--target-workers', type=int, default=TARGET_WORKERS)
+    p.add_argument('--verify-existing', action='store_true', help="Re-hash blobs already in the output before reusing them")
+    p.add_argument('--bwlimit', type=float, default=0, metavar='MB/S', help="Cap total copy bandwidth (default: unlimited)")
+    p.add_argument('--shared', action='store_true',
+                   help="Other hosts may organize into the same output directory at once; claim blobs before writing")
+    p.add_argument('--normal-priority', action='store_true',
+                   help="Copy with normal disk priority (default: lowest, dropping copied files from the page cache)")
+    p.add_argument('--debounce', type=float, default=DEBOUNCE_SECONDS, metavar='SECONDS',
+                   help=f"Wait until the store has been quiet this long (default: {DEBOUNCE_SECONDS:g})")
+    p.add_argument('--poll-interval', type=float, default=POLL_INTERVAL, metavar='SECONDS',
+                   help=f"Rescan interval where inotify is unavailable (default: {POLL_INTERVAL:g})")
+    p.add_argument('--no-initial-sync', action='store_true', help="Skip organizing the matching models at start")
+    p.add_argument('--json', action='store_true', help="Print progress events as JSON lines")
+    p.set_defaults(func=cmd_watch)
+
+    p = sub.add_parser('verify', help="Re-hash every blob in an output directory")
+    p.add_argument('--target', required=True, help="Output directory")
+    p.add_argument('--workers', type=int, default=None, help="Hashing processes (default: CPU count)")
+    p.add_argument('--json', action='store_true', help="Print progress events as JSON lines")
+    p.set_defaults(func=cmd_verify)
+
+    p = sub.add_parser('export', help="Pack each selected model version into one .tar bundle")
+    p.add_argument('--source', required=True, help="Ollama root directory (the .ollama folder)")
+    p.add_argument('--dest', required=True, help="Directory for the bundles")
+    p.add_argument('models', nargs='*', help="Glob patterns, e.g. 'llama3*' or 'qwen*:7b*' (default: all)")
+    p.add_argument('--codec', choices=('zstd', 'gzip'), default=None,
+                   help="Compression for small metadata layers (default: zstd if installed, else gzip)")
+    p.add_argument('--json', action='store_true', help="Print progress events as JSON lines")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser('import', help="Unpack bundles into an Ollama root directory")
+    p.add_argument('--target', required=True, help="Ollama root directory to restore into")
+    p.add_argument('bundles', nargs='+', help="Bundle files, or - to read one from stdin")
+    p.add_argument('--json', action='store_true', help="Print progress events as JSON lines")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser('restore', help="Install model versions from an output directory back into an Ollama store")
+    p.add_argument('--archive', required=True, help="Output directory written by organize")
+    p.add_argument('--target', required=True, help="Ollama root directory to restore into")
+    p.add_argument('models', nargs='*', help="Glob patterns, e.g. 'llama3*' or 'qwen*:7b*' (default: all)")
+    p.add_argument('--link-mode', choices=RESTORE_MODES, default='auto',
+                   help="auto tries reflink, then hardlink, then copy (default: auto)")
+    p.add_argument('--source-workers', type=int, default=SOURCE_WORKERS)
+    p.add_argument('--target-workers', type=int, default=TARGET_WORKERS)
+    p.add_argument('--verify-existing', action='store_true', help="Re-hash blobs already in the store before reusing them")
+    p.add_argument('--overwrite', action='store_true', help="Replace tags whose manifest differs from the archive")
+    p.add_argument('--dry-run', action='store_true', help="Only report what would be transferred")
+    p.add_argument('--json', action='store_true', help="Print progress events as JSON lines")
+    p.set_defaults(func=cmd_restore)
+
+    p = sub.add_parser('delete', help="Delete model versions from an Ollama store and free blobs nothing else uses")
+    p.add_argument('--source', required=True, help="Ollama root directory (the .ollama folder)")
+    p.add_argument('models', nargs='+', help="Glob patterns, e.g. 'llama3*' or 'qwen*:7b*'")
+    p.add_argument('--dry-run', action='store_true', help="Only report what would be deleted")
+    p.add_argument('--json', action='store_true', help="Print progress events as JSON lines")
+    p.set_defaults(func=cmd_delete)
+
+    p = sub.add_parser('gc', help="Remove blob files no manifest references")
+    p.add_argument('--source', required=True, help="Ollama root directory (the .ollama folder)")
+    p.add_argument('--grace-hours', type=float, default=1.0,
+                   help="Keep unreferenced blobs newer than this, they may belong to a running pull (default: 1)")
+    p.add_argument('--dry-run', action='store_true', help="Only report what would be removed")
+    p.add_argument('--json', action='store_true', help="Print progress events as JSON lines")
+    p.set_defaults(func=cmd_gc)
+
+    p = sub.add_parser('bench', help="Time organize, verify, delete and refresh on a generated store")
+    p.add_argument('--dir', default=None, help="Create the synthetic store here, on the disk to measure (default: temp dir)")
+    p.add_argument('--tags', type=int, default=20, help="Model versions to generate (default: 20)")
+    p.add_argument('--weight-mb', type=float, default=64, help="Size of each weights blob in MB (default: 64)")
+    p.add_argument('--shared-ratio', type=float, default=0.5,
+                   help="Chance that a tag reuses the weights of the previous tag of its model (default: 0.5)")
+    p.add_argument('--metadata-layers', type=int, default=4, help="Small metadata layers per model (default: 4)")
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--scenario', action='append', help="Run only this scenario; repeatable (default: all)")
+    p.add_argument('--link-mode', choices=LINK_MODES, default='copy')
+    p.add_argument('--source-workers', type=int, default=SOURCE_WORKERS)
+    p.add_argument('--target-workers', type=int, default=TARGET_WORKERS)
+    p.add_argument('--verify-workers', type=int, default=None, help="Hashing processes (default: CPU count)")
+    p.add_argument('--adaptive', action='store_true', help="Organize with per-disk thread tuning")
+    p.add_argument('--keep', action='store_true', help="Keep the generated store and output directory")
+    p.add_argument('--output', default=None, help="Write the JSON report to this file instead of stdout")
+    p.add_argument('--compare', default=None, metavar='REPORT', help="Add elapsed-time ratios against an earlier report")
+    p.set_defaults(func=cmd_bench)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not getattr(args, 'func', None):
+        parser.print_help()
+        return EXIT_USAGE
+    return args.func(args)
@@ -0,0 +1,83 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_HOST = 'registry.ollama.ai'
+DEFAULT_NAMESPACE = 'library'
+SCAN_WORKERS = 8
+
+
+def model_ref(host, namespace, repo):
+    # Same short form `ollama list` prints: library models drop host and namespace, other namespaces drop the host
+    if host == DEFAULT_HOST:
+        return repo if namespace == DEFAULT_NAMESPACE else f"{namespace}/{repo}"
+    return f"{host}/{namespace}/{repo}"
+
+
+def parse_model_ref(model_name):
+    parts = model_name.split('/')
+    if len(parts) == 1:
+        return DEFAULT_HOST, DEFAULT_NAMESPACE, parts[0]
+    if len(parts) == 2:
+        return DEFAULT_HOST, parts[0], parts[1]
+    if len(parts) == 3:
+        return parts[0], parts[1], parts[2]
+    raise ValueError(f"Invalid model name: {model_name}")
+
+
+def manifest_rel_path(model_name, model_version):
+    return os.path.join('manifests', *parse_model_ref(model_name), model_version)
+
+
+def manifest_ref(manifests_dir, path):
+    # manifests/<host>/<namespace>/<repo>/<tag> -> (model_name, tag); None for anything else under manifests/
+    parts = os.path.relpath(path, manifests_dir).split(os.sep)
+    if len(parts) != 4 or parts[0] == os.pardir:
+        return None
+    host, namespace, repo, tag = parts
+    return model_ref(host, namespace, repo), tag
+
+
+def split_ref(ref):
+    # "hf.co/user/repo:Q4_K_M" -> ("hf.co/user/repo", "Q4_K_M"); a ':' before the last '/' belongs to a host:port
+    name, sep, tag = ref.rpartition(':')
+    if not sep or '/' in tag:
+        return ref, ''
+    return name, tag
+
+
+def _scan_namespace(host, namespace, namespace_dir):
+    found = []
+    try:
+        repo_dirs = [e for e in os.scandir(namespace_dir) if e.is_dir()]
+    except OSError:
+        return found
+    for repo_entry in repo_dirs:
+        name = model_ref(host, namespace, repo_entry.name)
+        try:
+            tag_entries = list(os.scandir(repo_entry.path))
+        except OSError:
+            continue
+        for tag_entry in tag_entries:
+            if tag_entry.is_file():
+                found.append((name, tag_entry.name, tag_entry.path, tag_entry.stat()))
+    return found
+
+
+def scan_manifests(manifests_dir, workers=SCAN_WORKERS):
+    # manifests/<host>/<namespace>/<repo>/<tag>; each host/namespace directory is scanned by its own worker
+    namespaces = []
+    try:
+        host_dirs = [e for e in os.scandir(manifests_dir) if e.is_dir()]
+    except OSError:
+        return []
+    for host_entry in host_dirs:
+        try:
+            namespaces.extend((host_entry.name, e.name, e.path) for e in os.scandir(host_entry.path) if e.is_dir())
+        except OSError:
+            continue
+    if len(namespaces) <= 1 or workers <= 1:
+        results = [_scan_namespace(*ns) for ns in namespaces]
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(namespaces))) as executor:
+            results = list(executor.map(lambda ns: _scan_namespace(*ns), namespaces))
+    return [item for result in results for item in result]
@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import fnmatch
+import threading
+from ollama_organizer.blobstore import pool_dir
+from ollama_organizer.discovery import scan_manifests, split_ref
+from ollama_organizer.journal import RecordStore
+from ollama_organizer.locking import BlobClaims
+from ollama_organizer.metrics import TransferMetrics, EVENT_INTERVAL, MB
+from ollama_organizer.planner import plan_sync, merge_plans
+from ollama_organizer.scheduler import BlobScheduler, SOURCE_WORKERS, TARGET_WORKERS
+from ollama_organizer.staging import stage_key, staging_root, clean_stages, release_stage
+
+
+def list_models(source_dir):
+    manifests_dir = os.path.join(source_dir, 'models', 'manifests')
+    return sorted((model_name, model_version) for model_name, model_version, _, _ in scan_manifests(manifests_dir))
+
+
+def select_models(models, patterns):
+    # "llama3*" matches every tag of a model, "llama3:8b*" also filters the tag, "hf.co/*" matches a registry
+    selected = []
+    for model_name, model_version in models:
+        for pattern in patterns:
+            name_pattern, version_pattern = split_ref(pattern)
+            if fnmatch.fnmatchcase(model_name, name_pattern) and fnmatch.fnmatchcase(model_version, version_pattern or '*'):
+                selected.append((model_name, model_version))
+                break
+    return selected
+
+
+def organize(tasks, source_dir, target_dir, record_file=None, error_log_file=None, link_mode='copy',
+             source_workers=SOURCE_WORKERS, target_workers=TARGET_WORKERS, dry_run=False, verify_existing=False,
+             on_event=None, progress_interval=EVENT_INTERVAL, throttle=None, low_io_priority=False,
+             adaptive=False, device_workers=None, shared=False):
+    # target_dir may be a list: every output directory is planned and recorded on its own, but each
+    # source blob is read once and written to all of them. record_file and error_log_file apply to the first.
+    # shared: other hosts may organize into the same output directories, blobs are claimed before writing.
+    emit_lock = threading.Lock()
+
+    def emit(event):
+        if on_event:
+            with emit_lock:
+                on_event(event)
+
+    target_dirs = [target_dir] if isinstance(target_dir, str) else list(dict.fromkeys(target_dir))
+    multi = len(target_dirs) > 1
+
+    def job_event(kind, job, **fields):
+        event = dict({"event": kind, "model": job.model_name, "version": job.model_version}, **fields)
+        if multi:
+            event["target"] = job.target_dir
+        return event
+
+    record_files = [record_file or os.path.join(target_dirs[0], 'processed_models.json')]
+    record_files += [os.path.join(d, 'processed_models.json') for d in target_dirs[1:]]
+    error_log_files = [error_log_file or os.path.join(target_dirs[0], 'error_log.json')]
+    error_log_files += [os.path.join(d, 'error_log.json') for d in target_dirs[1:]]
+    record_stores = {d: RecordStore(f) for d, f in zip(target_dirs, record_files)}
+    blob_cache_dir = os.path.join(source_dir, 'models', 'blobs')
+    blob_pool_dir = pool_dir(target_dirs[0]) if link_mode != 'copy' else None
+
+    summary = {
+        "total": len(tasks) * len(target_dirs),
+        "skipped": 0,
+        "success": 0,
+        "failed": 0,
+        "blob_files": 0,
+        "bytes_to_copy": 0,
+        "bytes_copied": 0,
+        "average_mb_s": None,
+        "dry_run": dry_run,
+        "error_log_file": None,
+        "run_report_file": None,
+        "device_workers": dict(device_workers or {}),
+        "elapsed": 0.0,
+    }
+    failed_list = []
+    start_time = time.time()
+    start_event = {"event": "start", "total": summary["total"], "link_mode": link_mode}
+    if multi:
+        start_event["targets"] = target_dirs
+    emit(start_event)
+
+    if not dry_run:
+        # Stages of versions in this run are resumed, other leftovers of crashed runs go
+        keep = {stage_key(model_name, model_version) for model_name, model_version in tasks}
+        for d in target_dirs:
+            clean_stages(d, keep)
+    plans = [plan_sync(tasks, source_dir, d, blob_cache_dir, record_stores[d].load(),
+                       pool_dir(d) if link_mode != 'copy' else None, link_mode, verify_existing, dry_run)
+             for d in target_dirs]
+    plan = merge_plans(plans) if multi else plans[0]
+    for job in plan.up_to_date:
+        summary["skipped"] += 1
+        emit(job_event("skipped", job))
+    for job in plan.stale:
+        emit(job_event("stale", job))
+    summary["bytes_to_copy"] = plan.bytes_to_copy
+    summary["up_to_date"] = len(plan.up_to_date)
+    summary["stale"] = len(plan.stale)
+    summary["to_organize"] = len(plan.jobs)
+    emit({
+        "event": "plan",
+        "blobs": len(plan.blob_tasks),
+        "bytes": plan.bytes_to_copy,
+        "present_blobs": plan.blobs_present,
+        "present_bytes": plan.bytes_present,
+        "up_to_date": len(plan.up_to_date),
+        "stale": len(plan.stale),
+        "to_organize": len(plan.jobs),
+    })
+
+    if dry_run:
+        for job in plan.jobs:
+            if job.error is not None:
+                emit(job_event("error", job, error=job.error))
+    else:
+        for d in target_dirs:
+            os.makedirs(d, exist_ok=True)
+        finished = summary["skipped"]
+
+        def on_job_done(job):
+            nonlocal finished
+            error = job.error
+            if error is None:
+                try:
+                    record_stores[job.target_dir].record(job.model_name, job.model_version, {
+                        "config_digest": job.config_digest,
+                        "layers_digest": job.layer_digests
+                    })
+                except Exception as e:
+                    error = f"{job.model_name}/{job.model_version} -> {e}"
+            if error is None:
+                summary["success"] += 1
+                summary["blob_files"] += 1 + len(job.layer_digests)
+                emit(job_event("done", job))
+            else:
+                summary["failed"] += 1
+                failed_list.append((job.target_dir,
+                                    {"model": job.model_name, "version": job.model_version, "error": error}))
+                emit(job_event("error", job, error=error))
+            finished += 1
+            emit({"event": "progress", "finished": finished, "total": summary["total"]})
+
+        metrics = TransferMetrics(plan.bytes_to_copy, emit, interval=progress_interval)
+        scheduler = BlobScheduler(source_workers, target_workers, blob_pool_dir, link_mode, metrics,
+                                  throttle, low_io_priority, fanout=multi, adaptive=adaptive,
+                                  device_workers=device_workers,
+                                  blob_claims=BlobClaims() if shared else None)
+        scheduler.run(plan.jobs, plan.blob_tasks, on_job_done)
+        for job in plan.jobs:
+            if job.stage_dir:
+                # Failed versions keep their stage, the next run resumes or removes it
+                release_stage(job.stage_dir)
+        for d in target_dirs:
+            try:
+                os.rmdir(staging_root(d))
+            except OSError:
+                pass
+        summary["device_workers"], tuning = scheduler.tuned_workers()
+        for record_store in record_stores.values():
+            record_store.compact()
+
+        report = metrics.report()
+        summary["bytes_copied"] = report["bytes"]
+        summary["average_mb_s"] = report["average_mb_s"]
+        report_files = []
+        error_files = []
+        for d, log_file in zip(target_dirs, error_log_files):
+            report_file = os.path.join(os.path.dirname(log_file), 'run_report.json')
+            with open(report_file, 'w', encoding='utf-8') as f:
+                json.dump(dict(report, link_mode=link_mode, source_workers=source_workers, target_workers=target_workers,
+                               bandwidth_limit_mb_s=round(throttle.rate / MB, 2) if throttle and throttle.rate else None,
+                               low_io_priority=low_io_priority, targets=target_dirs,
+                               adaptive=adaptive, device_tuning=tuning,
+                               success=summary["success"], failed=summary["failed"]),
+                          f, indent=2, ensure_ascii=False)
+            report_files.append(report_file)
+            failed = [item for failed_dir, item in failed_list if failed_dir == d]
+            if failed:
+                with open(log_file, 'w', encoding='utf-8') as f:
+                    json.dump(failed, f, indent=2, ensure_ascii=False)
+                error_files.append(log_file)
+        summary["run_report_file"] = '\n'.join(report_files)
+        if error_files:
+            summary["error_log_file"] = '\n'.join(error_files)
+
+    summary["elapsed"] = time.time() - start_time
+    emit(dict({"event": "summary"}, **summary))
+    return summary
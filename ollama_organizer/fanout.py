@@ -0,0 +1,112 @@
+import os
+import queue
+import hashlib
+import threading
+import time
+from ollama_organizer.integrity import COPY_BUFFER_SIZE, digest_hex
+from ollama_organizer.throttle import background_io, background_io_enabled, drop_cache, drop_cache_enabled
+
+# Buffers a target may fall behind the fastest one before the source read waits for it
+QUEUE_CHUNKS = 4
+
+
+class _TargetWriter:
+    def __init__(self, path, background, queue_chunks):
+        self.path = path
+        self.tmp_path = f"{path}.tmp-{os.getpid()}-{id(self)}"
+        self.queue = queue.Queue(queue_chunks)
+        self.error = None
+        self.background = background
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        if self.background:
+            background_io()
+        drop = drop_cache_enabled()
+        offset = 0
+        data = b''
+        try:
+            with open(self.tmp_path, 'wb', buffering=0) as f:
+                while True:
+                    data = self.queue.get()
+                    if data is None:
+                        break
+                    view = memoryview(data)
+                    while view:
+                        view = view[f.write(view):]
+                    if drop:
+                        start = max(offset - len(data), 0)
+                        drop_cache(f.fileno(), start, offset + len(data) - start)
+                    offset += len(data)
+                if drop:
+                    os.fdatasync(f.fileno())
+                    drop_cache(f.fileno(), 0, 0)
+        except Exception as e:
+            self.error = e
+            # Keep taking buffers so the reader never blocks on a failed target
+            while data is not None:
+                data = self.queue.get()
+
+    def discard(self):
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def fanout_copy(src, paths, blob_name=None, buffer_size=COPY_BUFFER_SIZE, queue_chunks=QUEUE_CHUNKS, progress=None):
+    # Reads src once and writes every path from the same buffers, each target on its own thread.
+    # Returns {path: exception} for targets that failed; a source error or digest mismatch fails all of them.
+    expected = digest_hex(blob_name or os.path.basename(paths[0]))
+    background = background_io_enabled()
+    drop = drop_cache_enabled()
+    writers = [_TargetWriter(path, background, queue_chunks) for path in paths]
+    for writer in writers:
+        writer.thread.start()
+    sha = hashlib.sha256()
+    clock = time.perf_counter
+    try:
+        with open(src, 'rb', buffering=0) as f:
+            offset = 0
+            while True:
+                t0 = clock()
+                data = f.read(buffer_size)
+                if not data:
+                    break
+                t1 = clock()
+                sha.update(data)
+                t2 = clock()
+                live = [writer for writer in writers if writer.error is None]
+                if not live:
+                    break
+                for writer in live:
+                    writer.queue.put(data)
+                if drop:
+                    drop_cache(f.fileno(), offset, len(data))
+                offset += len(data)
+                if progress:
+                    # Time blocked on full queues is time spent waiting for the slowest target
+                    progress(len(data) * len(live), t1 - t0, t2 - t1, clock() - t2)
+    except BaseException:
+        for writer in writers:
+            writer.queue.put(None)
+            writer.thread.join()
+            writer.discard()
+        raise
+    for writer in writers:
+        writer.queue.put(None)
+    for writer in writers:
+        writer.thread.join()
+
+    errors = {}
+    actual = sha.hexdigest()
+    for writer in writers:
+        if writer.error is None and actual != expected:
+            writer.error = RuntimeError(f"Digest mismatch: {src} expected sha256:{expected}, got sha256:{actual}")
+        if writer.error is None:
+            try:
+                os.replace(writer.tmp_path, writer.path)
+            except OSError as e:
+                writer.error = e
+        if writer.error is not None:
+            writer.discard()
+            errors[writer.path] = writer.error
+    return errors
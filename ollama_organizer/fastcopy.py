@@ -0,0 +1,153 @@
+import os
+import sys
+import time
+import errno
+from ollama_organizer.throttle import drop_cache, drop_cache_enabled
+
+FICLONE = 0x40049409
+KERNEL_METHODS = ('copy_file_range', 'sendfile')
+# Errors meaning "this primitive does not work for this pair of files", not a failed copy
+FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP,
+                   errno.EBADF, errno.EPERM, errno.ENOTTY}
+
+_unsupported = set()
+
+
+def clone_fd(src_fd, dst_fd):
+    if not sys.platform.startswith('linux'):
+        raise OSError(errno.EOPNOTSUPP, "Reflink not supported on this platform")
+    import fcntl
+    fcntl.ioctl(dst_fd, FICLONE, src_fd)
+
+
+def available_methods():
+    methods = ['reflink'] if sys.platform.startswith('linux') else []
+    if hasattr(os, 'copy_file_range'):
+        methods.append('copy_file_range')
+    if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+        methods.append('sendfile')
+    return methods + ['readinto']
+
+
+class BlobTransfer:
+    # Copies src into dst with the fastest primitive the pair of filesystems supports.
+    # Kernel-side copies never pass the data through Python, so each chunk is read back
+    # from the target (normally still in the page cache) to hash what actually landed.
+    def __init__(self, fsrc, fdst, buf):
+        self.fsrc = fsrc
+        self.fdst = fdst
+        self.buf = buf
+        self.view = memoryview(buf)
+        src_st = os.fstat(fsrc.fileno())
+        self.src_size = src_st.st_size
+        self.devices = (src_st.st_dev, os.fstat(fdst.fileno()).st_dev)
+        self.methods = [m for m in available_methods() if (m, self.devices) not in _unsupported]
+        self.method = None
+        self.drop_cache = drop_cache_enabled()
+
+    def _disable(self, method):
+        _unsupported.add((method, self.devices))
+        self.methods.remove(method)
+
+    def clone(self):
+        # Whole-file CoW clone, only valid on an empty target
+        if 'reflink' not in self.methods:
+            return False
+        try:
+            clone_fd(self.fsrc.fileno(), self.fdst.fileno())
+        except OSError as e:
+            if e.errno not in FALLBACK_ERRNOS:
+                raise
+            self._disable('reflink')
+            return False
+        self.method = 'reflink'
+        return True
+
+    def _kernel_copy(self, method, offset, count):
+        src_fd, dst_fd = self.fsrc.fileno(), self.fdst.fileno()
+        if method == 'copy_file_range':
+            return os.copy_file_range(src_fd, dst_fd, count, offset, offset)
+        os.lseek(dst_fd, offset, os.SEEK_SET)
+        return os.sendfile(dst_fd, src_fd, offset, count)
+
+    def _read_at(self, f, offset, count):
+        f.seek(offset)
+        done = 0
+        while done < count:
+            n = f.readinto(self.view[done:count])
+            if not n:
+                break
+            done += n
+        return done
+
+    def _release(self, offset, n):
+        # The previous target chunk is included, its writeback has usually finished by now
+        drop_cache(self.fsrc.fileno(), offset, n)
+        start = max(offset - len(self.buf), 0)
+        drop_cache(self.fdst.fileno(), start, offset + n - start)
+
+    def finish(self):
+        # Flushed target pages are clean, so the whole file can leave the cache
+        if self.drop_cache:
+            os.fdatasync(self.fdst.fileno())
+            drop_cache(self.fdst.fileno(), 0, 0)
+
+    def hash_range(self, offset, count, sha, progress=None):
+        # Used after a clone: the data is already in place, only hash it
+        clock = time.perf_counter
+        t0 = clock()
+        n = self._read_at(self.fdst, offset, min(count, len(self.buf)))
+        t1 = clock()
+        sha.update(self.view[:n])
+        if self.drop_cache and n:
+            self._release(offset, n)
+        if progress and n:
+            progress(n, t1 - t0, clock() - t1, 0.0)
+        return n
+
+    def transfer(self, offset, count, sha, progress=None):
+        clock = time.perf_counter
+        count = min(count, len(self.buf))
+        for method in list(self.methods):
+            if method not in KERNEL_METHODS:
+                continue
+            t0 = clock()
+            try:
+                n = self._kernel_copy(method, offset, count)
+            except OSError as e:
+                if e.errno not in FALLBACK_ERRNOS:
+                    raise
+                self._disable(method)
+                continue
+            if not n and offset < self.src_size:
+                # Some filesystems report 0 bytes instead of failing
+                self._disable(method)
+                continue
+            self.method = method
+            t1 = clock()
+            n = self._read_at(self.fdst, offset, n)
+            t2 = clock()
+            sha.update(self.view[:n])
+            if self.drop_cache and n:
+                self._release(offset, n)
+            if progress and n:
+                progress(n, t2 - t1, clock() - t2, t1 - t0)
+            return n
+
+        self.method = 'readinto'
+        t0 = clock()
+        n = self._read_at(self.fsrc, offset, count)
+        if not n:
+            return 0
+        t1 = clock()
+        data = self.view[:n]
+        sha.update(data)
+        t2 = clock()
+        self.fdst.seek(offset)
+        while data:
+            data = data[self.fdst.write(data):]
+        if self.drop_cache:
+            self._release(offset, n)
+        if progress:
+            progress(n, t1 - t0, t2 - t1, clock() - t2)
+        return n
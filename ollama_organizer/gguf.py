@@ -0,0 +1,133 @@
+import mmap
+import struct
+
+GGUF_MAGIC = b'GGUF'
+MODEL_MEDIA_TYPE = 'application/vnd.ollama.image.model'
+
+# GGUF metadata value types
+STRING = 8
+ARRAY = 9
+SCALAR_FORMATS = {0: '<B', 1: '<b', 2: '<H', 3: '<h', 4: '<I', 5: '<i', 6: '<f', 7: '<?', 10: '<Q', 11: '<q', 12: '<d'}
+
+# general.file_type, as llama.cpp names it
+FILE_TYPES = {
+    0: 'F32', 1: 'F16', 2: 'Q4_0', 3: 'Q4_1', 7: 'Q8_0', 8: 'Q5_0', 9: 'Q5_1', 10: 'Q2_K', 11: 'Q3_K_S',
+    12: 'Q3_K_M', 13: 'Q3_K_L', 14: 'Q4_K_S', 15: 'Q4_K_M', 16: 'Q5_K_S', 17: 'Q5_K_M', 18: 'Q6_K', 19: 'IQ2_XXS',
+    20: 'IQ2_XS', 21: 'Q2_K_S', 22: 'IQ3_XS', 23: 'IQ3_XXS', 24: 'IQ1_S', 25: 'IQ4_NL', 26: 'IQ3_S', 27: 'IQ3_M',
+    28: 'IQ2_S', 29: 'IQ2_M', 30: 'IQ4_XS', 31: 'IQ1_M', 32: 'BF16', 36: 'TQ1_0', 37: 'TQ2_0',
+}
+# Tensor types, used when a file has no general.file_type
+TENSOR_TYPES = {
+    0: 'F32', 1: 'F16', 2: 'Q4_0', 3: 'Q4_1', 6: 'Q5_0', 7: 'Q5_1', 8: 'Q8_0', 9: 'Q8_1', 10: 'Q2_K', 11: 'Q3_K',
+    12: 'Q4_K', 13: 'Q5_K', 14: 'Q6_K', 15: 'Q8_K', 16: 'IQ2_XXS', 17: 'IQ2_XS', 18: 'IQ3_XXS', 19: 'IQ1_S',
+    20: 'IQ4_NL', 21: 'IQ3_S', 22: 'IQ2_S', 23: 'IQ4_XS', 24: 'I8', 25: 'I16', 26: 'I32', 27: 'I64', 28: 'F64',
+    29: 'IQ1_M', 30: 'BF16', 34: 'TQ1_0', 35: 'TQ2_0',
+}
+
+
+class _HeaderReader:
+    def __init__(self, buf):
+        self.buf = buf
+        self.pos = 0
+        self.count_format = '<Q'
+
+    def unpack(self, fmt):
+        try:
+            value = struct.unpack_from(fmt, self.buf, self.pos)[0]
+        except struct.error:
+            raise ValueError(f"GGUF header is truncated at offset {self.pos}")
+        self.pos += struct.calcsize(fmt)
+        return value
+
+    def count(self):
+        return self.unpack(self.count_format)
+
+    def skip_string(self):
+        n = self.count()
+        self.pos += n
+
+    def string(self):
+        n = self.count()
+        if self.pos + n > len(self.buf):
+            raise ValueError(f"GGUF header is truncated at offset {self.pos}")
+        value = self.buf[self.pos:self.pos + n].decode('utf-8', 'replace')
+        self.pos += n
+        return value
+
+    def value(self, value_type):
+        # Arrays (token lists, merges) are stepped over and returned as their length only
+        if value_type == STRING:
+            return self.string()
+        if value_type == ARRAY:
+            item_type = self.unpack('<I')
+            n = self.count()
+            if item_type == STRING:
+                for _ in range(n):
+                    self.skip_string()
+            elif item_type == ARRAY:
+                for _ in range(n):
+                    self.value(ARRAY)
+            else:
+                self.pos += n * struct.calcsize(self._scalar_format(item_type))
+            return n
+        return self.unpack(self._scalar_format(value_type))
+
+    @staticmethod
+    def _scalar_format(value_type):
+        fmt = SCALAR_FORMATS.get(value_type)
+        if fmt is None:
+            raise ValueError(f"Unknown GGUF value type {value_type}")
+        return fmt
+
+
+def read_header(path):
+    # Maps the file and walks only the metadata and tensor-info sections; the OS pages in just what is touched,
+    # never the tensor data. Returns (metadata, tensors) with tensors as [(n_elements, tensor_type)].
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            if buf[:4] != GGUF_MAGIC:
+                raise ValueError("Not a GGUF file")
+            reader = _HeaderReader(buf)
+            reader.pos = 4
+            version = reader.unpack('<I')
+            if version == 1:
+                reader.count_format = '<I'
+            elif version not in (2, 3):
+                raise ValueError(f"Unsupported GGUF version {version}")
+            tensor_count = reader.count()
+            kv_count = reader.count()
+            metadata = {"GGUF.version": version}
+            for _ in range(kv_count):
+                key = reader.string()
+                metadata[key] = reader.value(reader.unpack('<I'))
+            tensors = []
+            for _ in range(tensor_count):
+                reader.skip_string()
+                elements = 1
+                for _ in range(reader.unpack('<I')):
+                    elements *= reader.count()
+                tensor_type = reader.unpack('<I')
+                reader.unpack('<Q')
+                tensors.append((elements, tensor_type))
+    return metadata, tensors
+
+
+def model_info(path):
+    metadata, tensors = read_header(path)
+    architecture = metadata.get('general.architecture')
+    file_type = metadata.get('general.file_type')
+    quantization = FILE_TYPES.get(file_type) if file_type is not None else None
+    if quantization is None and tensors:
+        # The type holding most weights
+        totals = {}
+        for elements, tensor_type in tensors:
+            totals[tensor_type] = totals.get(tensor_type, 0) + elements
+        quantization = TENSOR_TYPES.get(max(totals, key=totals.get))
+    return {
+        "architecture": architecture,
+        "quantization": quantization,
+        "parameters": sum(elements for elements, _ in tensors) or metadata.get('general.parameter_count'),
+        "context_length": metadata.get(f"{architecture}.context_length") if architecture else None,
+        "size_label": metadata.get('general.size_label'),
+        "gguf_version": metadata["GGUF.version"],
+    }
@@ -0,0 +1,110 @@
+import os
+import json
+import hashlib
+from ollama_organizer.fastcopy import BlobTransfer
+from ollama_organizer.staging import STAGING_DIR_NAME
+
+COPY_BUFFER_SIZE = 8 * 1024 * 1024
+
+
+def digest_hex(blob_name):
+    return blob_name.replace('sha256:', '').replace('sha256-', '')
+
+
+def hash_file(path, buffer_size=COPY_BUFFER_SIZE):
+    sha = hashlib.sha256()
+    buf = bytearray(buffer_size)
+    view = memoryview(buf)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            sha.update(view[:n])
+    return sha.hexdigest()
+
+
+def copy_and_hash(src, dst, buffer_size=COPY_BUFFER_SIZE, progress=None):
+    sha = hashlib.sha256()
+    with open(src, 'rb', buffering=0) as fsrc, open(dst, 'w+b', buffering=0) as fdst:
+        transfer = BlobTransfer(fsrc, fdst, bytearray(buffer_size))
+        step = transfer.hash_range if transfer.clone() else transfer.transfer
+        offset = 0
+        while True:
+            n = step(offset, buffer_size, sha, progress)
+            if not n:
+                break
+            offset += n
+        transfer.finish()
+    return sha.hexdigest()
+
+
+def copy_verified(src, dst, blob_name=None, progress=None):
+    expected = digest_hex(blob_name or os.path.basename(dst))
+    actual = copy_and_hash(src, dst, progress=progress)
+    if actual != expected:
+        os.remove(dst)
+        raise RuntimeError(f"Digest mismatch: {dst} expected sha256:{expected}, got sha256:{actual}")
+    return actual
+
+
+def _verify_blob(path):
+    try:
+        actual = hash_file(path)
+    except OSError as e:
+        return path, False, str(e)
+    return path, actual == digest_hex(os.path.basename(path)), actual
+
+
+def collect_archive(target_root):
+    blobs = []
+    missing = []
+    seen = set()
+    for dirpath, dirnames, filenames in os.walk(target_root):
+        # Unpublished versions of a running or crashed organize
+        dirnames[:] = [d for d in dirnames if d != STAGING_DIR_NAME]
+        if os.path.basename(dirpath) in ('blobs', 'blob_pool'):
+            for name in filenames:
+                if not name.startswith('sha256-') or '.' in name:
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    missing.append(path)
+                    continue
+                if (st.st_dev, st.st_ino) in seen:
+                    continue
+                seen.add((st.st_dev, st.st_ino))
+                blobs.append(path)
+        elif os.sep + 'manifests' in dirpath:
+            models_dir = dirpath[:dirpath.index(os.sep + 'manifests')]
+            for name in filenames:
+                try:
+                    with open(os.path.join(dirpath, name), 'r', encoding='utf-8') as f:
+                        content = json.load(f)
+                    digests = [content['config']['digest']] + [layer['digest'] for layer in content['layers']]
+                except (OSError, ValueError, KeyError, TypeError):
+                    continue
+                for digest in digests:
+                    blob_path = os.path.join(models_dir, 'blobs', digest.replace('sha256:', 'sha256-'))
+                    if not os.path.exists(blob_path):
+                        missing.append(blob_path)
+    return blobs, missing
+
+
+def verify_archive(target_root, workers=None, progress=None):
+    from concurrent.futures import ProcessPoolExecutor
+    blobs, missing = collect_archive(target_root)
+    # Largest first so one huge blob does not end up as the tail of the run
+    blobs.sort(key=os.path.getsize, reverse=True)
+    corrupted = []
+    checked = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        for path, ok, detail in executor.map(_verify_blob, blobs):
+            checked += 1
+            if not ok:
+                corrupted.append({"blob": path, "error": detail})
+            if progress:
+                progress(path, ok, checked, len(blobs))
+    return {"checked": checked, "corrupted": corrupted, "missing": missing}
@@ -0,0 +1,96 @@
+import os
+import json
+import threading
+from ollama_organizer.locking import FileLock, lock_path
+
+COMPACT_EVERY = 500
+
+
+def journal_path(record_file):
+    return os.path.splitext(record_file)[0] + '.journal.jsonl'
+
+
+class RecordStore:
+    # Several processes, possibly on different hosts, may organize into the same output root. Appends and
+    # compaction happen under a file lock, and compaction re-reads the files so no other run's records are lost.
+    def __init__(self, record_file, compact_every=COMPACT_EVERY):
+        self.record_file = record_file
+        self.journal_file = journal_path(record_file)
+        self.lock_file = lock_path(record_file)
+        self.compact_every = compact_every
+        self.records = {}
+        self._appended = 0
+        self._lock = threading.Lock()
+
+    def _read(self):
+        records = {}
+        if os.path.exists(self.record_file):
+            try:
+                with open(self.record_file, 'r', encoding='utf-8') as f:
+                    records = json.load(f)
+            except ValueError:
+                # Records are only a shortcut, the planner re-checks the target contents anyway
+                records = {}
+        lines = 0
+        if os.path.exists(self.journal_file):
+            with open(self.journal_file, 'rb') as f:
+                data = f.read()
+            end = data.rfind(b'\n') + 1
+            if end != len(data):
+                # Drop the torn tail left by a crash so the next append starts on a fresh line
+                with open(self.journal_file, 'r+b') as f:
+                    f.truncate(end)
+            for line in data[:end].splitlines():
+                try:
+                    event = json.loads(line.decode('utf-8'))
+                except ValueError:
+                    continue
+                self._apply(records, event)
+                lines += 1
+        return records, lines
+
+    def load(self):
+        if not os.path.isdir(os.path.dirname(os.path.abspath(self.record_file))):
+            # Output directory not created yet (first run, or a dry run)
+            self.records, self._appended = {}, 0
+            return self.records
+        with FileLock(self.lock_file):
+            self.records, self._appended = self._read()
+        return self.records
+
+    @staticmethod
+    def _apply(records, event):
+        if event.get('op') == 'done':
+            records.setdefault(event['model'], {})[event['version']] = event['record']
+
+    def _append(self, event):
+        with self._lock, FileLock(self.lock_file):
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(event, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._apply(self.records, event)
+            self._appended += 1
+            if self._appended >= self.compact_every:
+                self._compact()
+
+    def record(self, model_name, model_version, entry):
+        self._append({'op': 'done', 'model': model_name, 'version': model_version, 'record': entry})
+
+    def _compact(self):
+        # Lines other runs appended since load() are on disk next to ours
+        self.records, _ = self._read()
+        tmp_path = self.record_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.records, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.record_file)
+        if os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+        self._appended = 0
+
+    def compact(self):
+        with self._lock, FileLock(self.lock_file):
+            if self._appended:
+                self._compact()
@@ -0,0 +1,188 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+from ollama_organizer.staging import HOST, pid_alive
+
+LOCK_POLL = 0.1
+CLAIMS_DIR_NAME = '.claims'
+CLAIM_POLL = 1.0
+# A claim from another host whose heartbeat has not moved for this long, by our own clock, belongs to a run that died
+CLAIM_TTL = 600
+CLAIM_HEARTBEAT = CLAIM_TTL / 4
+
+
+def hide(path):
+    # Lock files and claim markers are bookkeeping; dot names already hide them outside Windows
+    if sys.platform == 'win32':
+        import ctypes
+        ctypes.windll.kernel32.SetFileAttributesW(str(path), 0x2)
+
+
+def lock_path(path):
+    # The hidden lock file guarding path
+    directory, name = os.path.split(path)
+    return os.path.join(directory, '.' + name + '.lock')
+
+
+class FileLock:
+    # Advisory lock on a lock file (fcntl record lock, which NFS forwards to the server, or msvcrt on Windows).
+    # Record locks belong to the process, so threads of this process are serialized by a thread lock first.
+    _thread_locks = {}
+    _guard = threading.Lock()
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        with FileLock._guard:
+            self._thread_lock = FileLock._thread_locks.setdefault(self.path, threading.Lock())
+        self._fd = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        try:
+            created = not os.path.exists(self.path)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+            if created:
+                hide(self.path)
+            if sys.platform == 'win32':
+                import msvcrt
+                while True:
+                    try:
+                        msvcrt.locking(self._fd, msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(LOCK_POLL)
+            else:
+                import fcntl
+                fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        except BaseException:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        try:
+            if sys.platform == 'win32':
+                import msvcrt
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            os.close(self._fd)
+        finally:
+            self._fd = None
+            self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def claim_marker(target_dir, path):
+    # The marker for a file other runs might also be writing, by its path inside the output root
+    rel_path = os.path.relpath(path, target_dir).replace(os.sep, '/')
+    return os.path.join(target_dir, CLAIMS_DIR_NAME, hashlib.sha1(rel_path.encode('utf-8')).hexdigest())
+
+
+class BlobClaims:
+    # Marker files under <target>/.claims saying which host is writing a blob. Runs on other hosts wait for the
+    # marker to go away instead of transferring the same data; held markers are touched regularly so a run that
+    # died can be told apart from one copying a large blob.
+    def __init__(self):
+        self.held = set()
+        # marker -> (mtime, monotonic time it was first seen with that mtime)
+        self._seen = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _stale(self, marker):
+        try:
+            with open(marker, 'r', encoding='utf-8') as f:
+                owner = json.load(f)
+            mtime = os.path.getmtime(marker)
+        except (OSError, ValueError):
+            # Vanished, or still being written by its creator
+            return False
+        if owner.get("host") == HOST:
+            if owner.get("pid") == os.getpid():
+                with self._lock:
+                    return marker not in self.held
+            return not pid_alive(owner.get("pid", 0))
+        # The mtime comes from the file server's or the other host's clock, so it is only compared with itself:
+        # a claim is dead once its heartbeat has not changed it for CLAIM_TTL of our time
+        now = time.monotonic()
+        with self._lock:
+            seen = self._seen.get(marker)
+            if seen is None or seen[0] != mtime:
+                self._seen[marker] = (mtime, now)
+                return False
+        return now - seen[1] > CLAIM_TTL
+
+    def _try_claim(self, marker):
+        claims_dir = os.path.dirname(marker)
+        if not os.path.isdir(claims_dir):
+            os.makedirs(claims_dir, exist_ok=True)
+            hide(claims_dir)
+        # Breaking a stale claim and taking it must not interleave with another run doing the same
+        with FileLock(os.path.join(claims_dir, '.lock')):
+            if os.path.exists(marker):
+                if not self._stale(marker):
+                    return False
+                os.remove(marker)
+            with self._lock:
+                self._seen.pop(marker, None)
+            fd = os.open(marker, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"host": HOST, "pid": os.getpid(), "time": time.time()}, f)
+        with self._lock:
+            self.held.add(marker)
+        return True
+
+    def acquire(self, markers):
+        # Sorted, so two runs needing the same markers cannot each hold some and wait for the rest
+        taken = []
+        try:
+            for marker in sorted(set(markers)):
+                while not self._try_claim(marker):
+                    time.sleep(CLAIM_POLL)
+                taken.append(marker)
+        except BaseException:
+            self.release(taken)
+            raise
+        return taken
+
+    def release(self, markers):
+        for marker in markers:
+            with self._lock:
+                self.held.discard(marker)
+            try:
+                os.remove(marker)
+            except OSError:
+                pass
+
+    def _heartbeat(self):
+        while not self._stop.wait(CLAIM_HEARTBEAT):
+            with self._lock:
+                held = list(self.held)
+            for marker in held:
+                try:
+                    os.utime(marker)
+                except OSError:
+                    pass
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._heartbeat, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
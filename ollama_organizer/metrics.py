@@ -0,0 +1,146 @@
+import time
+import threading
+from collections import deque
+
+RATE_WINDOW = 10.0
+EVENT_INTERVAL = 1.0
+MB = 1024 * 1024
+
+
+class BlobStats:
+    def __init__(self, metrics, blob_name, size):
+        self.metrics = metrics
+        self.blob_name = blob_name
+        self.size = size
+        self.worker = threading.current_thread().name
+        self.started = time.monotonic()
+        self.finished = None
+        self.bytes = 0
+        self.read_seconds = 0.0
+        self.hash_seconds = 0.0
+        self.write_seconds = 0.0
+        self.throttle_seconds = 0.0
+        self.ok = None
+
+    def add(self, nbytes, read_seconds=0.0, hash_seconds=0.0, write_seconds=0.0):
+        self.bytes += nbytes
+        self.read_seconds += read_seconds
+        self.hash_seconds += hash_seconds
+        self.write_seconds += write_seconds
+        self.metrics.add_bytes(nbytes)
+
+    def to_dict(self):
+        seconds = (self.finished or time.monotonic()) - self.started
+        return {
+            "blob": self.blob_name,
+            "size": self.size,
+            "bytes": self.bytes,
+            "worker": self.worker,
+            "seconds": round(seconds, 3),
+            "mb_s": round(self.bytes / MB / seconds, 2) if seconds > 0 else None,
+            "read_seconds": round(self.read_seconds, 3),
+            "hash_seconds": round(self.hash_seconds, 3),
+            "write_seconds": round(self.write_seconds, 3),
+            "throttle_seconds": round(self.throttle_seconds, 3),
+            "ok": self.ok,
+        }
+
+
+class TransferMetrics:
+    def __init__(self, total_bytes, on_event=None, window=RATE_WINDOW, interval=EVENT_INTERVAL):
+        self.total_bytes = total_bytes
+        self.on_event = on_event
+        self.window = window
+        self.interval = interval
+        self.started = time.monotonic()
+        self.done_bytes = 0
+        self.peak_rate = 0.0
+        self.blobs = []
+        self.active = {}
+        self.workers = {}
+        self._samples = deque([(self.started, 0)])
+        self._last_event = self.started
+        self._lock = threading.Lock()
+
+    def blob_started(self, blob_name, size):
+        stats = BlobStats(self, blob_name, size)
+        with self._lock:
+            self.blobs.append(stats)
+            self.active[id(stats)] = stats
+        return stats
+
+    def blob_finished(self, stats, ok):
+        stats.finished = time.monotonic()
+        stats.ok = ok
+        with self._lock:
+            self.active.pop(id(stats), None)
+            worker = self.workers.setdefault(stats.worker, {"busy_seconds": 0.0, "blobs": 0, "bytes": 0})
+            worker["busy_seconds"] += stats.finished - stats.started
+            worker["blobs"] += 1
+            worker["bytes"] += stats.bytes
+        if self.on_event:
+            self.on_event(dict({"event": "blob"}, **stats.to_dict()))
+
+    def add_bytes(self, nbytes):
+        now = time.monotonic()
+        with self._lock:
+            self.done_bytes += nbytes
+            self._samples.append((now, self.done_bytes))
+            while len(self._samples) > 2 and now - self._samples[1][0] > self.window:
+                self._samples.popleft()
+            due = now - self._last_event >= self.interval
+            if due:
+                self._last_event = now
+        if due and self.on_event:
+            self.on_event(self.snapshot())
+
+    def rate(self):
+        with self._lock:
+            (t0, b0), (t1, b1) = self._samples[0], self._samples[-1]
+        return (b1 - b0) / (t1 - t0) if t1 > t0 else 0.0
+
+    def snapshot(self):
+        rate = self.rate()
+        self.peak_rate = max(self.peak_rate, rate)
+        remaining = max(self.total_bytes - self.done_bytes, 0)
+        with self._lock:
+            active = [{"blob": b.blob_name, "bytes": b.bytes, "size": b.size} for b in self.active.values()]
+        return {
+            "event": "throughput",
+            "done_bytes": self.done_bytes,
+            "total_bytes": self.total_bytes,
+            "mb_s": round(rate / MB, 2),
+            "eta_seconds": round(remaining / rate, 1) if rate > 0 else None,
+            "active_workers": len(active),
+            "active": active,
+        }
+
+    def report(self):
+        elapsed = time.monotonic() - self.started
+        self.peak_rate = max(self.peak_rate, self.rate())
+        read_seconds = sum(b.read_seconds for b in self.blobs)
+        hash_seconds = sum(b.hash_seconds for b in self.blobs)
+        write_seconds = sum(b.write_seconds for b in self.blobs)
+        throttle_seconds = sum(b.throttle_seconds for b in self.blobs)
+        stages = {"source read": read_seconds, "hashing": hash_seconds, "target write": write_seconds,
+                  "bandwidth limit": throttle_seconds}
+        workers = {
+            name: dict(w, busy_seconds=round(w["busy_seconds"], 3),
+                       utilization=round(w["busy_seconds"] / elapsed, 3) if elapsed > 0 else None)
+            for name, w in self.workers.items()
+        }
+        return {
+            "elapsed_seconds": round(elapsed, 3),
+            "bytes": self.done_bytes,
+            "planned_bytes": self.total_bytes,
+            "blob_files": len(self.blobs),
+            "average_mb_s": round(self.done_bytes / MB / elapsed, 2) if elapsed > 0 else None,
+            "peak_mb_s": round(self.peak_rate / MB, 2),
+            "read_seconds": round(read_seconds, 3),
+            "hash_seconds": round(hash_seconds, 3),
+            "write_seconds": round(write_seconds, 3),
+            "throttle_seconds": round(throttle_seconds, 3),
+            "bottleneck": max(stages, key=stages.get) if self.done_bytes else None,
+            "workers": workers,
+            "blobs": [b.to_dict() for b in sorted(self.blobs, key=lambda b: b.size, reverse=True)],
+        }
@@ -0,0 +1,135 @@
+import os
+import json
+from ollama_organizer.integrity import hash_file, digest_hex
+from ollama_organizer.discovery import manifest_rel_path
+from ollama_organizer.scheduler import VersionJob, BlobTask
+from ollama_organizer.staging import abandoned_stages, claim_stage
+
+
+def blob_file_name(digest):
+    return digest.replace('sha256:', 'sha256-')
+
+
+def read_manifest(source_dir, model_name, model_version):
+    manifest_path = os.path.join(source_dir, 'models', manifest_rel_path(model_name, model_version))
+    with open(manifest_path, 'rb') as f:
+        data = f.read()
+    content = json.loads(data.decode('utf-8'))
+    return data, content
+
+
+def load_job(job, source_dir):
+    job.manifest_bytes, content = read_manifest(source_dir, job.model_name, job.model_version)
+    job.config_digest = blob_file_name(content['config']['digest'])
+    job.layer_digests = [layer['digest'] for layer in content['layers']]
+    job.blob_sizes = {job.config_digest: content['config'].get('size')}
+    for layer in content['layers']:
+        job.blob_sizes.setdefault(blob_file_name(layer['digest']), layer.get('size'))
+
+
+def blob_present(path, size, verify_existing=False):
+    try:
+        if os.path.getsize(path) != size:
+            return False
+    except OSError:
+        return False
+    return not verify_existing or hash_file(path) == digest_hex(os.path.basename(path))
+
+
+def _manifest_current(job):
+    try:
+        with open(job.manifest_path, 'rb') as f:
+            return f.read() == job.manifest_bytes
+    except OSError:
+        return False
+
+
+class SyncPlan:
+    def __init__(self):
+        self.jobs = []
+        self.blob_tasks = []
+        self.up_to_date = []
+        self.stale = []
+        self.bytes_to_copy = 0
+        self.bytes_present = 0
+        self.blobs_present = 0
+
+
+def plan_sync(tasks, source_dir, target_dir, blob_cache_dir, processed_records=None,
+              blob_pool_dir=None, link_mode='copy', verify_existing=False, dry_run=False):
+    processed_records = processed_records or {}
+    plan = SyncPlan()
+    blob_tasks = {}
+    pooled = link_mode != 'copy' and blob_pool_dir
+    abandoned = abandoned_stages(target_dir)
+    for model_name, model_version in tasks:
+        version_dir = os.path.join(target_dir, model_name, model_version)
+        job = VersionJob(model_name, model_version, os.path.join(version_dir, 'models'), target_dir)
+        plan.jobs.append(job)
+        try:
+            load_job(job, source_dir)
+        except Exception as e:
+            job.error = f"{model_name}/{model_version} -> {e}"
+            continue
+
+        record = processed_records.get(model_name, {}).get(model_version)
+        if record is not None:
+            if record.get('config_digest') != job.config_digest or record.get('layers_digest') != job.layer_digests:
+                plan.stale.append(job)
+            elif _manifest_current(job) and all(
+                    blob_present(os.path.join(job.blobs_dir, name), size, verify_existing)
+                    for name, size in job.blob_sizes.items()):
+                plan.jobs.remove(job)
+                plan.up_to_date.append(job)
+                continue
+        if not os.path.exists(job.manifest_path):
+            # Not in the output yet: built in a stage and published in one rename. A version that is already
+            # there is updated in place, its manifest is replaced last, so it stays valid throughout.
+            job.version_dir = version_dir
+            job.stage_dir = claim_stage(target_dir, model_name, model_version, version_dir, abandoned, dry_run)
+            job.models_dir = os.path.join(job.stage_dir, 'models')
+
+        for blob_name, size in job.blob_sizes.items():
+            src = os.path.join(blob_cache_dir, blob_name)
+            if size is None:
+                size = os.path.getsize(src) if os.path.exists(src) else 0
+            dst = os.path.join(job.blobs_dir, blob_name)
+            if blob_present(dst, size, verify_existing):
+                plan.blobs_present += 1
+                plan.bytes_present += size
+                continue
+            task = blob_tasks.get(blob_name)
+            if task is None:
+                task = blob_tasks[blob_name] = BlobTask(blob_name, src, size)
+                if pooled and blob_present(os.path.join(blob_pool_dir, blob_name), size, verify_existing):
+                    plan.blobs_present += 1
+                    plan.bytes_present += size
+                else:
+                    # Read from the source once; further versions get a local copy of the first
+                    plan.bytes_to_copy += size
+            task.jobs.append(job)
+            task.destinations.append(dst)
+            job.pending += 1
+    plan.blob_tasks = sorted(blob_tasks.values(), key=lambda t: t.size, reverse=True)
+    return plan
+
+
+def merge_plans(plans):
+    # One task per blob across all output directories, so each source blob is read once
+    merged = SyncPlan()
+    blob_tasks = {}
+    for plan in plans:
+        merged.jobs.extend(plan.jobs)
+        merged.up_to_date.extend(plan.up_to_date)
+        merged.stale.extend(plan.stale)
+        merged.bytes_to_copy += plan.bytes_to_copy
+        merged.bytes_present += plan.bytes_present
+        merged.blobs_present += plan.blobs_present
+        for task in plan.blob_tasks:
+            merged_task = blob_tasks.get(task.blob_name)
+            if merged_task is None:
+                merged_task = blob_tasks[task.blob_name] = BlobTask(task.blob_name, task.src, task.size)
+            merged_task.jobs.extend(task.jobs)
+            merged_task.destinations.extend(task.destinations)
+    merged.blob_tasks = sorted(blob_tasks.values(), key=lambda t: t.size, reverse=True)
+    return merged
@@ -0,0 +1,55 @@
+import threading
+from collections import deque
+
+LOG_LIMIT = 5000
+
+
+class ProgressChannel:
+    # Worker threads write here instead of emitting a Qt signal per message; the UI drains it on a timer
+    def __init__(self, limit=LOG_LIMIT):
+        self._lines = deque(maxlen=limit)
+        self._dropped = 0
+        self._counts = None
+        self._throughput = None
+        self._blobs = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def log(self, line):
+        with self._lock:
+            if len(self._lines) == self._lines.maxlen:
+                self._dropped += 1
+            self._lines.append(line)
+            self._dirty = True
+
+    def progress(self, finished, total):
+        with self._lock:
+            self._counts = (finished, total)
+            self._dirty = True
+
+    def throughput(self, event):
+        with self._lock:
+            self._throughput = event
+            self._blobs = {blob["blob"]: (blob["bytes"], blob["size"]) for blob in event.get("active", [])}
+            self._dirty = True
+
+    def blob_finished(self, blob_name):
+        with self._lock:
+            self._blobs.pop(blob_name, None)
+            self._dirty = True
+
+    def drain(self):
+        with self._lock:
+            if not self._dirty:
+                return None
+            update = {
+                "lines": list(self._lines),
+                "dropped": self._dropped,
+                "counts": self._counts,
+                "throughput": self._throughput,
+                "blobs": dict(self._blobs),
+            }
+            self._lines.clear()
+            self._dropped = 0
+            self._dirty = False
+        return update
@@ -0,0 +1,222 @@
+import os
+import time
+import threading
+from ollama_organizer.blobstore import POOL_DIR_NAME, reflink, copy_blob_file
+from ollama_organizer.discovery import scan_manifests
+from ollama_organizer.metrics import TransferMetrics, EVENT_INTERVAL
+from ollama_organizer.planner import load_job, blob_present
+from ollama_organizer.scheduler import BlobScheduler, VersionJob, BlobTask, SOURCE_WORKERS, TARGET_WORKERS
+from ollama_organizer.staging import STAGING_DIR_NAME
+
+# auto tries a copy-on-write clone, then a hardlink, then a verified copy
+RESTORE_MODES = ('auto', 'reflink', 'hardlink', 'copy')
+LINK_METHODS = {'auto': ('reflink', 'hardlink'), 'reflink': ('reflink',), 'hardlink': ('hardlink',), 'copy': ()}
+
+
+def list_archive(archive_dir):
+    # <archive>/<model_name>/<version>/models/manifests/...; model names may contain '/', so walk until a models dir
+    found = []
+    for dirpath, dirnames, filenames in os.walk(archive_dir):
+        manifests_dir = os.path.join(dirpath, 'models', 'manifests')
+        if os.path.isdir(manifests_dir):
+            for model_name, model_version, _, _ in scan_manifests(manifests_dir):
+                found.append((model_name, model_version, dirpath))
+            dirnames[:] = []
+        else:
+            dirnames[:] = [d for d in dirnames if d not in (POOL_DIR_NAME, 'bundles', STAGING_DIR_NAME)]
+    return sorted(found)
+
+
+def install_blob(src, dst, link_mode='auto', progress=None):
+    # Links and clones are made under a temp name, so dst never points at a half-made file. An output organized in
+    # symlink mode holds relative links into its blob pool; the store gets the file they point at.
+    src = os.path.realpath(src)
+    tmp_path = f"{dst}.tmp-{os.getpid()}-{threading.get_ident()}"
+    for method in LINK_METHODS[link_mode]:
+        try:
+            if method == 'reflink':
+                reflink(src, tmp_path)
+            else:
+                os.link(src, tmp_path)
+            os.replace(tmp_path, dst)
+        except OSError:
+            if os.path.lexists(tmp_path):
+                os.remove(tmp_path)
+            continue
+        if progress:
+            progress(os.path.getsize(dst))
+        return method
+    if os.path.lexists(dst):
+        os.remove(dst)
+    copy_blob_file(src, dst, progress=progress)
+    return 'copy'
+
+
+class RestoreScheduler(BlobScheduler):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.methods = {}
+        self.placed = []
+
+    def place(self, task, dst, progress):
+        new = not os.path.lexists(dst)
+        method = install_blob(task.src, dst, self.link_mode, progress)
+        with self._lock:
+            self.methods[method] = self.methods.get(method, 0) + 1
+            if new:
+                self.placed.append(dst)
+
+    def remove_unused(self, jobs):
+        # Blobs this run added to the store only for versions that failed would be left without a manifest
+        used = set()
+        for job in jobs:
+            if job.error is None:
+                used.update(job.blob_sizes)
+        removed = 0
+        for dst in self.placed:
+            if os.path.basename(dst) in used:
+                continue
+            try:
+                os.remove(dst)
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def commit(self, job):
+        # Ollama treats every file under manifests/ as a tag, so the temp file is written outside it
+        os.makedirs(os.path.dirname(job.manifest_path), exist_ok=True)
+        tmp_path = os.path.join(job.models_dir, f".manifest-{os.getpid()}-{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(job.manifest_bytes)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, job.manifest_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def _read_current(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def restore(archive_dir, store_dir, tasks=None, link_mode='auto', verify_existing=False, overwrite=False,
+            dry_run=False, source_workers=SOURCE_WORKERS, target_workers=TARGET_WORKERS, on_event=None,
+            progress_interval=EVENT_INTERVAL):
+    emit_lock = threading.Lock()
+
+    def emit(event):
+        if on_event:
+            with emit_lock:
+                on_event(event)
+
+    entries = list_archive(archive_dir)
+    if tasks is not None:
+        wanted = set(tasks)
+        entries = [e for e in entries if (e[0], e[1]) in wanted]
+    models_dir = os.path.join(store_dir, 'models')
+    blobs_dir = os.path.join(models_dir, 'blobs')
+    summary = {
+        "total": len(entries),
+        "skipped": 0,
+        "conflicts": 0,
+        "success": 0,
+        "failed": 0,
+        "blob_files": 0,
+        "bytes_to_copy": 0,
+        "bytes_copied": 0,
+        "methods": {},
+        "removed_blobs": 0,
+        "dry_run": dry_run,
+        "elapsed": 0.0,
+    }
+    start_time = time.time()
+    emit({"event": "restore_start", "total": len(entries), "link_mode": link_mode, "archive": archive_dir})
+
+    jobs = []
+    blob_tasks = {}
+    present = set()
+    present_bytes = 0
+    finished = 0
+    for model_name, model_version, version_dir in entries:
+        job = VersionJob(model_name, model_version, models_dir, store_dir)
+        try:
+            load_job(job, version_dir)
+        except Exception as e:
+            summary["failed"] += 1
+            finished += 1
+            emit({"event": "error", "model": model_name, "version": model_version,
+                  "error": f"{model_name}/{model_version} -> {e}"})
+            continue
+        current = _read_current(job.manifest_path)
+        if current is not None and current != job.manifest_bytes and not overwrite:
+            # The store has a different build under this tag, e.g. pulled again after the archive was made
+            summary["conflicts"] += 1
+            finished += 1
+            emit({"event": "conflict", "model": model_name, "version": model_version})
+            continue
+        needed = []
+        for blob_name, size in job.blob_sizes.items():
+            src = os.path.join(version_dir, 'models', 'blobs', blob_name)
+            if size is None:
+                size = os.path.getsize(src) if os.path.exists(src) else 0
+            if blob_name in present:
+                continue
+            if blob_name not in blob_tasks and blob_present(os.path.join(blobs_dir, blob_name), size, verify_existing):
+                present.add(blob_name)
+                present_bytes += size
+                continue
+            needed.append((blob_name, src, size))
+        if current == job.manifest_bytes and not needed:
+            summary["skipped"] += 1
+            finished += 1
+            emit({"event": "skipped", "model": model_name, "version": model_version})
+            continue
+        jobs.append(job)
+        for blob_name, src, size in needed:
+            task = blob_tasks.get(blob_name)
+            if task is None:
+                task = blob_tasks[blob_name] = BlobTask(blob_name, src, size)
+                task.destinations.append(os.path.join(blobs_dir, blob_name))
+                summary["bytes_to_copy"] += size
+            task.jobs.append(job)
+            job.pending += 1
+    emit({
+        "event": "restore_plan",
+        "blobs": len(blob_tasks),
+        "bytes": summary["bytes_to_copy"],
+        "present_blobs": len(present),
+        "present_bytes": present_bytes,
+        "to_restore": len(jobs),
+    })
+
+    if not dry_run:
+        def on_job_done(job):
+            nonlocal finished
+            if job.error is None:
+                summary["success"] += 1
+                emit({"event": "done", "model": job.model_name, "version": job.model_version})
+            else:
+                summary["failed"] += 1
+                emit({"event": "error", "model": job.model_name, "version": job.model_version, "error": job.error})
+            finished += 1
+            emit({"event": "progress", "finished": finished, "total": len(entries)})
+
+        os.makedirs(blobs_dir, exist_ok=True)
+        metrics = TransferMetrics(summary["bytes_to_copy"], emit, interval=progress_interval)
+        scheduler = RestoreScheduler(source_workers, target_workers, None, link_mode, metrics)
+        scheduler.run(jobs, sorted(blob_tasks.values(), key=lambda t: t.size, reverse=True), on_job_done)
+        summary["removed_blobs"] = scheduler.remove_unused(jobs)
+        summary["blob_files"] = sum(scheduler.methods.values())
+        summary["bytes_copied"] = metrics.done_bytes
+        summary["methods"] = scheduler.methods
+
+    summary["elapsed"] = time.time() - start_time
+    emit(dict({"event": "restore_summary"}, **summary))
+    return summary
@@ -0,0 +1,85 @@
+import os
+import json
+import hashlib
+from ollama_organizer.integrity import COPY_BUFFER_SIZE, digest_hex
+from ollama_organizer.fastcopy import BlobTransfer
+
+CHUNK_SIZE = 64 * 1024 * 1024
+PARTIAL_SUFFIX = '.partial'
+STATE_SUFFIX = '.partial.json'
+
+
+def _load_state(state_path, expected, src_stat):
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get('digest') != expected or state.get('size') != src_stat.st_size \
+            or state.get('mtime') != int(src_stat.st_mtime):
+        return None
+    return state
+
+
+def _save_state(state_path, state):
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+
+def _rehash_prefix(partial_path, offset, sha, buf):
+    # hashlib cannot persist its state, so the already verified prefix is re-read from the target instead of the source
+    view = memoryview(buf)
+    done = 0
+    with open(partial_path, 'rb', buffering=0) as f:
+        while done < offset:
+            n = f.readinto(view[:min(len(buf), offset - done)])
+            if not n:
+                break
+            sha.update(view[:n])
+            done += n
+    return done
+
+
+def resumable_copy(src, dst, blob_name=None, chunk_size=CHUNK_SIZE, buffer_size=COPY_BUFFER_SIZE, progress=None):
+    expected = digest_hex(blob_name or os.path.basename(dst))
+    partial_path = dst + PARTIAL_SUFFIX
+    state_path = dst + STATE_SUFFIX
+    src_stat = os.stat(src)
+    sha = hashlib.sha256()
+    buf = bytearray(buffer_size)
+
+    state = _load_state(state_path, expected, src_stat) if os.path.exists(partial_path) else None
+    offset = 0
+    if state is not None:
+        offset = _rehash_prefix(partial_path, min(state['offset'], os.path.getsize(partial_path)), sha, buf)
+    else:
+        state = {'digest': expected, 'size': src_stat.st_size, 'mtime': int(src_stat.st_mtime), 'offset': 0}
+
+    with open(src, 'rb', buffering=0) as fsrc, open(partial_path, 'r+b' if offset else 'w+b', buffering=0) as fdst:
+        fdst.truncate(offset)
+        transfer = BlobTransfer(fsrc, fdst, buf)
+        step = transfer.hash_range if not offset and transfer.clone() else transfer.transfer
+        while True:
+            chunk_end = offset + chunk_size
+            while offset < chunk_end:
+                n = step(offset, chunk_end - offset, sha, progress)
+                if not n:
+                    break
+                offset += n
+            os.fsync(fdst.fileno())
+            state['offset'] = offset
+            _save_state(state_path, state)
+            if offset < chunk_end:
+                break
+        transfer.finish()
+
+    actual = sha.hexdigest()
+    if actual != expected:
+        os.remove(partial_path)
+        os.remove(state_path)
+        raise RuntimeError(f"Digest mismatch: {dst} expected sha256:{expected}, got sha256:{actual}")
+    os.replace(partial_path, dst)
+    os.remove(state_path)
+    return actual
@@ -0,0 +1,529 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from ollama_organizer.blobgc import BLOB_NAME_RE
+from ollama_organizer.blobstore import place_blob, add_to_pool, link_blob, clone_blob, pool_dir
+from ollama_organizer.discovery import manifest_rel_path
+from ollama_organizer.fanout import fanout_copy
+from ollama_organizer.throttle import background_io
+from ollama_organizer.staging import publish_stage, sibling_stages
+from ollama_organizer.locking import claim_marker
+
+SOURCE_WORKERS = 3
+TARGET_WORKERS = 3
+# Adaptive mode: every TUNE_INTERVAL seconds each busy device gets one more copy slot while that still adds
+# TUNE_GAIN to its throughput, steps back once it stops helping, and halves its slots when throughput falls
+# TUNE_LOSS below the best seen or time per MB grows past LATENCY_FACTOR times the fastest seen (seek thrash)
+MAX_DEVICE_WORKERS = 16
+TUNE_INTERVAL = 2.0
+TUNE_MIN_BYTES = 32 * 1024 * 1024
+TUNE_GAIN = 0.05
+TUNE_LOSS = 0.15
+LATENCY_FACTOR = 3.0
+
+
+class VersionJob:
+    def __init__(self, model_name, model_version, models_dir, target_dir=None):
+        self.model_name = model_name
+        self.model_version = model_version
+        self.models_dir = models_dir
+        self.target_dir = target_dir
+        self.manifest_bytes = None
+        self.config_digest = None
+        self.layer_digests = []
+        self.blob_sizes = {}
+        self.pending = 0
+        self.error = None
+        # Set for versions not yet in the output: models_dir then points into stage_dir
+        self.stage_dir = None
+        self.version_dir = None
+
+    @property
+    def blobs_dir(self):
+        return os.path.join(self.models_dir, 'blobs')
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.models_dir, manifest_rel_path(self.model_name, self.model_version))
+
+    @property
+    def published_blobs_dir(self):
+        return os.path.join(self.version_dir, 'models', 'blobs') if self.stage_dir else self.blobs_dir
+
+
+def _has_size(path, size):
+    try:
+        return os.path.getsize(path) == size
+    except OSError:
+        return False
+
+
+def _prune_blobs(blobs_dir, keep):
+    # Removes blobs the version's manifest no longer references
+    try:
+        names = os.listdir(blobs_dir)
+    except OSError:
+        return
+    for name in names:
+        if BLOB_NAME_RE.match(name) and name not in keep:
+            try:
+                os.remove(os.path.join(blobs_dir, name))
+            except OSError:
+                pass
+
+
+class BlobTask:
+    def __init__(self, blob_name, src, size):
+        self.blob_name = blob_name
+        self.src = src
+        self.size = size
+        self.jobs = []
+        self.destinations = []
+
+
+def device_name(path):
+    # Unlike st_dev this stays the same across reboots and replugging: the mount point or drive of path
+    path = os.path.abspath(path)
+    while not os.path.exists(path) or not os.path.ismount(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def device_key(path):
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    try:
+        return os.stat(path).st_dev
+    except OSError:
+        return path
+
+
+class DeviceSlots:
+    # A semaphore whose size can change while threads wait on it
+    def __init__(self, limit):
+        self._cond = threading.Condition()
+        self.limit = limit
+        self.active = 0
+        self.waiting = 0
+
+    def acquire(self):
+        with self._cond:
+            self.waiting += 1
+            while self.active >= self.limit:
+                self._cond.wait()
+            self.waiting -= 1
+            self.active += 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def set_limit(self, limit):
+        with self._cond:
+            self.limit = limit
+            self._cond.notify_all()
+
+
+class DeviceTuner:
+    def __init__(self, limit, max_limit=MAX_DEVICE_WORKERS):
+        self.start_limit = limit
+        self.limit = limit
+        self.max_limit = max(max_limit, limit)
+        self.ceiling = self.max_limit
+        self.best_rate = 0.0
+        self.best_limit = limit
+        self.base_latency = None
+        self.probed = set()
+        self.samples = []
+        self.window_start = time.monotonic()
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def add(self, nbytes, seconds):
+        self.bytes += nbytes
+        self.seconds += seconds
+
+    def due(self, now):
+        return now - self.window_start >= TUNE_INTERVAL and self.bytes >= TUNE_MIN_BYTES
+
+    def adjust(self, now, saturated):
+        rate = self.bytes / (now - self.window_start)
+        latency = self.seconds * 1024 * 1024 / self.bytes
+        self.window_start, self.bytes, self.seconds = now, 0, 0.0
+        if not saturated:
+            # Fewer copies than slots, the rate says nothing about the device
+            return self.limit
+        self.samples.append([self.limit, round(rate / 1024 / 1024, 2)])
+        if self.base_latency is None or latency < self.base_latency:
+            self.base_latency = latency
+        probed = self.limit in self.probed
+        self.probed.add(self.limit)
+        congested = rate < self.best_rate * (1 - TUNE_LOSS) or \
+            (self.base_latency > 0 and latency > self.base_latency * LATENCY_FACTOR)
+        if congested and self.limit > 1 and self.limit >= self.best_limit:
+            if self.limit > self.best_limit:
+                self.ceiling = self.limit - 1
+            self.limit = max(self.limit // 2, 1)
+        elif rate > self.best_rate * (1 + TUNE_GAIN):
+            self.best_rate, self.best_limit = rate, self.limit
+            if self.limit < self.ceiling:
+                self.limit += 1
+        elif self.limit < self.best_limit and rate >= self.best_rate * (1 - TUNE_GAIN) and not probed:
+            # Just as fast with fewer copies
+            self.best_limit = self.limit
+        elif self.limit > self.best_limit:
+            # The last slot added nothing, keep the smaller count
+            self.ceiling = self.limit - 1
+            self.limit -= 1
+        elif self.limit < self.best_limit:
+            self.limit += 1
+        elif self.limit > 1 and self.limit - 1 not in self.probed:
+            self.limit -= 1
+        return self.limit
+
+    def to_dict(self):
+        return {
+            "start": self.start_limit,
+            "final": self.limit,
+            "best": self.best_limit,
+            "best_mb_s": round(self.best_rate / 1024 / 1024, 2),
+            "samples": self.samples,
+        }
+
+
+class DeviceLimiter:
+    def __init__(self, adaptive=False):
+        self.adaptive = adaptive
+        self._limits = {}
+        self._slots = {}
+        self._tuners = {}
+        self._lock = threading.Lock()
+
+    def claim(self, key, limit):
+        # A disk used as both source and target keeps the smaller limit
+        self._limits[key] = min(self._limits.get(key, limit), max(limit, 1))
+
+    def acquire(self, keys):
+        sems = []
+        for key in sorted(set(keys), key=str):
+            sem = self._slots.get(key)
+            if sem is None:
+                sem = self._slots.setdefault(key, DeviceSlots(self._limits.get(key, 1)))
+            sem.acquire()
+            sems.append(sem)
+        return sems
+
+    @staticmethod
+    def release(sems):
+        for sem in reversed(sems):
+            sem.release()
+
+    def record(self, key, nbytes, seconds):
+        if not self.adaptive:
+            return
+        slots = self._slots.get(key)
+        if slots is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            tuner = self._tuners.get(key)
+            if tuner is None:
+                tuner = self._tuners[key] = DeviceTuner(slots.limit)
+            tuner.add(nbytes, seconds)
+            if not tuner.due(now):
+                return
+            limit = tuner.adjust(now, slots.waiting > 0)
+        if limit != slots.limit:
+            slots.set_limit(limit)
+
+    def tuned(self):
+        with self._lock:
+            return {key: tuner.to_dict() for key, tuner in self._tuners.items() if tuner.samples}
+
+
+class BlobScheduler:
+    def __init__(self, source_workers=SOURCE_WORKERS, target_workers=TARGET_WORKERS,
+                 blob_pool_dir=None, link_mode='copy', metrics=None, throttle=None, low_io_priority=False,
+                 fanout=False, adaptive=False, device_workers=None, blob_claims=None):
+        self.source_workers = source_workers
+        self.target_workers = target_workers
+        self.blob_pool_dir = blob_pool_dir
+        self.link_mode = link_mode
+        self.metrics = metrics
+        self.throttle = throttle
+        self.low_io_priority = low_io_priority
+        self.fanout = fanout
+        self.adaptive = adaptive
+        # Remembered slot counts by device_name(), the starting point for adaptive runs
+        self.device_workers = dict(device_workers or {})
+        self.limiter = DeviceLimiter(adaptive)
+        # BlobClaims shared with other processes writing into the same output roots, or None
+        self.blob_claims = blob_claims
+        self._lock = threading.Lock()
+        self._done_lock = threading.Lock()
+        self._devices = {}
+        self._names = {}
+        self._published = {}
+        self._stages = {}
+
+    def _device(self, path):
+        directory = os.path.dirname(path)
+        key = self._devices.get(directory)
+        if key is None:
+            key = self._devices[directory] = device_key(directory)
+            if self.adaptive and key not in self._names:
+                self._names[key] = device_name(directory)
+        return key
+
+    def _workers(self, key, default):
+        if self.adaptive:
+            return self.device_workers.get(self._names.get(key), default)
+        return default
+
+    def claims(self, task):
+        source = self._device(task.src)
+        targets = [self._device(dst) for dst in task.destinations]
+        self.limiter.claim(source, self._workers(source, self.source_workers))
+        for key in targets:
+            self.limiter.claim(key, self._workers(key, self.target_workers))
+        return [source] + targets
+
+    def _progress(self, stats, devices=None):
+        if self.throttle is None and not self.adaptive:
+            return stats.add if stats else None
+        source = devices[0] if devices else None
+        targets = list(dict.fromkeys(devices[1:])) if devices else []
+
+        def progress(nbytes, read_seconds=0.0, hash_seconds=0.0, write_seconds=0.0):
+            if stats:
+                stats.add(nbytes, read_seconds, hash_seconds, write_seconds)
+            waited = self.throttle.consume(nbytes) if self.throttle is not None else 0.0
+            if stats:
+                stats.throttle_seconds += waited
+            if self.adaptive and targets and not (self.throttle is not None and self.throttle.rate):
+                # A fanout copy reports the bytes of every target together
+                share = nbytes / len(targets)
+                self.limiter.record(source, share if self.fanout else nbytes, read_seconds)
+                for key in targets:
+                    self.limiter.record(key, share, write_seconds)
+        return progress
+
+    def tuned_workers(self):
+        # Slot counts to remember: the best count of every device that was tuned, on top of the ones passed in
+        tuning = {self._names.get(key, str(key)): result for key, result in self.limiter.tuned().items()}
+        workers = dict(self.device_workers)
+        workers.update((name, result["best"]) for name, result in tuning.items())
+        return workers, tuning
+
+    def _published_path(self, dst):
+        # Where dst ends up once its version is published, and the output root it belongs to
+        target_dir, blobs_dir = self._published.get(os.path.dirname(dst), (None, None))
+        if blobs_dir is None:
+            return None, dst
+        return target_dir, os.path.join(blobs_dir, os.path.basename(dst))
+
+    def _claim_markers(self, task):
+        # The files other runs would write for this task: the pool copy, or the blob of each published version
+        markers = []
+        for dst in task.destinations:
+            target_dir, published = self._published_path(dst)
+            if target_dir is None:
+                continue
+            if self.link_mode != 'copy':
+                published = os.path.join(pool_dir(target_dir), task.blob_name)
+            markers.append(claim_marker(target_dir, published))
+        return markers
+
+    def _written_elsewhere(self, task, dst):
+        # Another run holding the claim before us wrote the blob. Once its version is published our stage is
+        # discarded, until then its verified copy is linked from its stage. A pooled blob is found by add_to_pool.
+        if self.blob_claims is None or self.link_mode != 'copy':
+            return False
+        published = self._published_path(dst)[1]
+        if _has_size(published, task.size):
+            return True
+        stage_dir = self._stages.get(os.path.dirname(dst))
+        for sibling in sibling_stages(stage_dir) if stage_dir else ():
+            path = os.path.join(sibling, 'models', 'blobs', task.blob_name)
+            if _has_size(path, task.size):
+                try:
+                    os.makedirs(os.path.dirname(dst), exist_ok=True)
+                    os.link(path, dst)
+                    return True
+                except OSError:
+                    continue
+        return False
+
+    def copy_blob(self, task, devices):
+        if self.low_io_priority:
+            background_io()
+        # Claimed before taking device slots, a wait for another host must not hold up other copies
+        markers = self.blob_claims.acquire(self._claim_markers(task)) if self.blob_claims else []
+        try:
+            return self._copy_claimed(task, devices)
+        finally:
+            if markers:
+                self.blob_claims.release(markers)
+
+    def _copy_claimed(self, task, devices):
+        sems = self.limiter.acquire(devices)
+        stats = self.metrics.blob_started(task.blob_name, task.size) if self.metrics else None
+        progress = self._progress(stats, devices)
+        ok = False
+        failures = {}
+        try:
+            if not os.path.exists(task.src):
+                raise RuntimeError(f"Missing blob file: {task.src}")
+            if self.fanout:
+                failures = self.fanout_blob(task, progress)
+            else:
+                placed = None
+                for dst in task.destinations:
+                    if self._written_elsewhere(task, dst):
+                        continue
+                    os.makedirs(os.path.dirname(dst), exist_ok=True)
+                    if placed and self.link_mode == 'copy':
+                        # Versions of one output sharing a blob: the source is read once, the other copies are
+                        # reflinked or copied on the target disk from the verified first one
+                        clone_blob(placed, dst)
+                    else:
+                        self.place(task, dst, progress)
+                        placed = dst
+            ok = not failures
+        finally:
+            if stats:
+                self.metrics.blob_finished(stats, ok)
+            self.limiter.release(sems)
+        return failures
+
+    def place(self, task, dst, progress):
+        place_blob(task.src, dst, self.blob_pool_dir, self.link_mode, progress,
+                   os.path.dirname(self._published_path(dst)[1]))
+
+    def fanout_blob(self, task, progress):
+        # One source read for every output directory, each written once; returns {destination index: error}.
+        # Several writes at once go through fanout_copy, which has no *.partial resume.
+        with self._lock:
+            live = [i for i, job in enumerate(task.jobs) if job.error is None]
+        live = [i for i in live if not self._written_elsewhere(task, task.destinations[i])]
+        writes = {}
+        firsts = {}
+        failures = {}
+        for i in live:
+            dst = task.destinations[i]
+            target_dir = task.jobs[i].target_dir
+            try:
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                if self.link_mode == 'copy':
+                    # The first version of each output is written from the source, the others clone it
+                    path = firsts.setdefault(target_dir, dst)
+                else:
+                    blob_pool_dir = pool_dir(target_dir)
+                    os.makedirs(blob_pool_dir, exist_ok=True)
+                    path = os.path.join(blob_pool_dir, task.blob_name)
+                writes.setdefault(path, []).append(i)
+            except OSError as e:
+                failures[i] = e
+        # A pool that already holds the blob only needs the links
+        pending = [path for path in writes if self.link_mode == 'copy'
+                   or not (os.path.exists(path) and os.path.getsize(path) == task.size)]
+        errors = {}
+        if len(pending) > 1:
+            errors = fanout_copy(task.src, pending, task.blob_name, progress=progress)
+        elif pending:
+            # A single write keeps the kernel copy and resume support
+            try:
+                if self.link_mode == 'copy':
+                    place_blob(task.src, pending[0], progress=progress)
+                else:
+                    add_to_pool(task.src, pending[0], progress)
+            except Exception as e:
+                errors[pending[0]] = e
+        for path, indexes in writes.items():
+            for i in indexes:
+                dst = task.destinations[i]
+                if path in errors:
+                    failures[i] = errors[path]
+                    continue
+                try:
+                    if self.link_mode != 'copy':
+                        link_blob(path, dst, self.link_mode, os.path.dirname(self._published_path(dst)[1]))
+                    elif dst != path:
+                        clone_blob(path, dst)
+                except OSError as e:
+                    failures[i] = e
+        return failures
+
+    def commit(self, job):
+        os.makedirs(os.path.dirname(job.manifest_path), exist_ok=True)
+        tmp_path = job.manifest_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(job.manifest_bytes)
+        os.replace(tmp_path, job.manifest_path)
+        if job.stage_dir:
+            publish_stage(job.stage_dir, job.version_dir, job.model_name, job.model_version)
+        else:
+            # Updated in place: layers of the old manifest go once the new one is in place
+            _prune_blobs(job.blobs_dir, job.blob_sizes)
+
+    def _complete(self, job, on_job_done):
+        if job.error is None:
+            try:
+                self.commit(job)
+            except Exception as e:
+                job.error = f"{job.model_name}/{job.model_version} -> {e}"
+        with self._done_lock:
+            on_job_done(job)
+
+    def _finish_blob(self, task, error, on_job_done, failures=None):
+        finished = []
+        with self._lock:
+            for i, job in enumerate(task.jobs):
+                job_error = error or (failures or {}).get(i)
+                if job_error and job.error is None:
+                    job.error = f"{job.model_name}/{job.model_version} -> {job_error}"
+                job.pending -= 1
+                if job.pending == 0:
+                    finished.append(job)
+        for job in finished:
+            self._complete(job, on_job_done)
+
+    def _run_task(self, task, devices, on_job_done):
+        with self._lock:
+            # Every version needing this blob already failed, nothing will be committed
+            abandoned = all(job.error is not None for job in task.jobs)
+        error = None
+        failures = None
+        if not abandoned:
+            try:
+                failures = self.copy_blob(task, devices)
+            except Exception as e:
+                error = e
+        self._finish_blob(task, error, on_job_done, failures)
+
+    def run(self, jobs, blob_tasks, on_job_done):
+        self._published = {job.blobs_dir: (job.target_dir, job.published_blobs_dir) for job in jobs}
+        self._stages = {job.blobs_dir: job.stage_dir for job in jobs if job.stage_dir}
+        for job in jobs:
+            if job.pending == 0:
+                self._complete(job, on_job_done)
+        claims = [(task, self.claims(task)) for task in blob_tasks]
+        workers = max(self.source_workers, self.target_workers, 1)
+        if self.adaptive:
+            workers = max(workers, MAX_DEVICE_WORKERS)
+        if self.blob_claims:
+            self.blob_claims.start()
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                wait([executor.submit(self._run_task, task, devices, on_job_done) for task, devices in claims])
+        finally:
+            if self.blob_claims:
+                self.blob_claims.stop()
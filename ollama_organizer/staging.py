@@ -0,0 +1,151 @@
+import os
+import sys
+import shutil
+import hashlib
+import platform
+import threading
+from ollama_organizer.discovery import manifest_rel_path
+
+# New versions are assembled under <target>/.staging/<key>.<pid>.<host> and moved into <target>/<model>/<version>
+# with one directory rename once every blob is in place, so the output never holds a half-written version
+STAGING_DIR_NAME = '.staging'
+HOST = platform.node() or 'localhost'
+
+# Stages of this process still in use; a GUI session outlives its runs, so its own pid proves nothing
+_active = set()
+_active_lock = threading.Lock()
+
+
+def staging_root(target_dir):
+    return os.path.join(target_dir, STAGING_DIR_NAME)
+
+
+def stage_key(model_name, model_version):
+    return hashlib.sha1(f"{model_name}:{model_version}".encode('utf-8')).hexdigest()[:16]
+
+
+def pid_alive(pid):
+    if sys.platform == 'win32':
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        # PROCESS_QUERY_LIMITED_INFORMATION; os.kill would terminate the process on Windows
+        handle = kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return kernel32.GetLastError() == 5
+        try:
+            code = ctypes.c_ulong()
+            return not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)) or code.value == 259
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _abandoned(name):
+    # Stages of live runs and of runs on other hosts (a shared NFS target) are left alone
+    key, _, owner = name.partition('.')
+    pid, _, host = owner.partition('.')
+    if not pid.isdigit() or host != HOST:
+        return None
+    if int(pid) == os.getpid():
+        with _active_lock:
+            return None if name in _active else key
+    return None if pid_alive(int(pid)) else key
+
+
+def abandoned_stages(target_dir):
+    # stage key -> paths left behind by runs that crashed or were killed
+    found = {}
+    try:
+        names = os.listdir(staging_root(target_dir))
+    except OSError:
+        return found
+    for name in names:
+        key = _abandoned(name)
+        if key is not None:
+            found.setdefault(key, []).append(os.path.join(staging_root(target_dir), name))
+    return found
+
+
+def clean_stages(target_dir, keep=()):
+    # Removes abandoned stages, except those of versions in keep, which the caller resumes
+    removed = 0
+    for key, paths in abandoned_stages(target_dir).items():
+        if key in keep:
+            continue
+        for path in paths:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def own_stage(target_dir, model_name, model_version):
+    return os.path.join(staging_root(target_dir), f"{stage_key(model_name, model_version)}.{os.getpid()}.{HOST}")
+
+
+def sibling_stages(stage_dir):
+    # Stages other runs are building for the same version
+    parent, name = os.path.split(stage_dir)
+    prefix = name.partition('.')[0] + '.'
+    try:
+        names = os.listdir(parent)
+    except OSError:
+        return []
+    return [os.path.join(parent, n) for n in names if n.startswith(prefix) and n != name]
+
+
+def claim_stage(target_dir, model_name, model_version, version_dir, abandoned, dry_run=False):
+    # Returns the stage directory for a version; blobs already in an abandoned stage, or in a version directory a
+    # failed run left without a manifest, are taken over so the copy resumes instead of starting again
+    path = own_stage(target_dir, model_name, model_version)
+    if not dry_run:
+        with _active_lock:
+            _active.add(os.path.basename(path))
+    leftovers = list(abandoned.get(stage_key(model_name, model_version), ()))
+    if os.path.isdir(version_dir):
+        leftovers.append(version_dir)
+    for leftover in leftovers:
+        if dry_run:
+            return leftover
+        try:
+            os.makedirs(staging_root(target_dir), exist_ok=True)
+            os.rename(leftover, path)
+            return path
+        except OSError:
+            # Another run took it first
+            continue
+    return path
+
+
+def release_stage(stage_dir):
+    with _active_lock:
+        _active.discard(os.path.basename(stage_dir))
+
+
+def publish_stage(stage_dir, version_dir, model_name, model_version):
+    os.makedirs(os.path.dirname(version_dir), exist_ok=True)
+    try:
+        os.rename(stage_dir, version_dir)
+        release_stage(stage_dir)
+        return
+    except OSError:
+        if not os.path.isdir(version_dir):
+            raise
+        # A parallel run published the same version first; fine if it holds the same manifest
+        rel_path = os.path.join('models', manifest_rel_path(model_name, model_version))
+        with open(os.path.join(stage_dir, rel_path), 'rb') as f:
+            ours = f.read()
+        try:
+            with open(os.path.join(version_dir, rel_path), 'rb') as f:
+                theirs = f.read()
+        except OSError:
+            theirs = None
+        if theirs != ours:
+            raise RuntimeError(f"{version_dir} was written by another run meanwhile")
+        shutil.rmtree(stage_dir, ignore_errors=True)
+        release_stage(stage_dir)
@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+import threading
+
+# Best-effort class at its lowest level (ionice -c2 -n7). The idle class could stall a backup indefinitely
+# on a disk that is never idle.
+IOPRIO_CLASS_BE = 2
+IOPRIO_LOWEST = 7
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_WHO_PROCESS = 1
+# ioprio_set has no libc wrapper
+IOPRIO_SET_SYSCALLS = {'x86_64': 251, 'i386': 289, 'i686': 289, 'aarch64': 30, 'armv7l': 314, 'ppc64le': 273}
+THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+IOPOL_TYPE_DISK = 0
+IOPOL_SCOPE_THREAD = 1
+IOPOL_THROTTLE = 3
+
+_local = threading.local()
+
+
+class TokenBucket:
+    # Shared by all copy workers of a run. rate is in bytes per second, 0 means unlimited;
+    # set_rate() may be called from another thread while copies are waiting.
+    def __init__(self, rate=0):
+        self._cond = threading.Condition()
+        self.rate = 0
+        self._tokens = 0.0
+        self._stamp = time.monotonic()
+        self.set_rate(rate)
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate:
+            # At most one second of unused allowance is kept
+            self._tokens = min(self._tokens + (now - self._stamp) * self.rate, self.rate)
+        self._stamp = now
+
+    def set_rate(self, rate):
+        with self._cond:
+            self._refill()
+            self.rate = max(rate or 0, 0)
+            if not self.rate:
+                self._tokens = 0.0
+            self._cond.notify_all()
+
+    def consume(self, nbytes):
+        # Copies report whole buffers after the fact, so the balance may go negative and the caller
+        # waits until it is paid back. Returns the seconds spent waiting.
+        with self._cond:
+            self._refill()
+            if not self.rate:
+                return 0.0
+            started = time.monotonic()
+            self._tokens -= nbytes
+            while self.rate and self._tokens < 0:
+                self._cond.wait(-self._tokens / self.rate)
+                self._refill()
+            return time.monotonic() - started
+
+
+def _lower_io_priority():
+    if sys.platform.startswith('linux'):
+        import ctypes
+        import platform
+        nr = IOPRIO_SET_SYSCALLS.get(platform.machine())
+        if nr is None:
+            return False
+        libc = ctypes.CDLL(None, use_errno=True)
+        # who=0 is the calling thread
+        return libc.syscall(nr, IOPRIO_WHO_PROCESS, 0, IOPRIO_CLASS_BE << IOPRIO_CLASS_SHIFT | IOPRIO_LOWEST) == 0
+    if sys.platform == 'win32':
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        # Background mode also lowers the memory priority of pages the thread reads, so they are evicted first
+        return bool(kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN))
+    if sys.platform == 'darwin':
+        import ctypes
+        libc = ctypes.CDLL(None)
+        return libc.setiopolicy_np(IOPOL_TYPE_DISK, IOPOL_SCOPE_THREAD, IOPOL_THROTTLE) == 0
+    return False
+
+
+def background_io():
+    # Called by each copy worker thread; the priority is per thread and threads do not outlive a run
+    if getattr(_local, 'background', False):
+        return
+    _local.background = True
+    try:
+        _lower_io_priority()
+    except (OSError, AttributeError):
+        pass
+
+
+def background_io_enabled():
+    return getattr(_local, 'background', False)
+
+
+def drop_cache_enabled():
+    return background_io_enabled() and hasattr(os, 'posix_fadvise')
+
+
+def drop_cache(fd, offset, length):
+    # Clean pages only; dirty pages are queued for writeback and can be dropped on a later call.
+    # Pages mapped by another process, such as a model a running server has loaded, are never dropped.
+    try:
+        os.posix_fadvise(fd, offset, length, os.POSIX_FADV_DONTNEED)
+    except OSError:
+        pass
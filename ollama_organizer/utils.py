@@ -0,0 +1,22 @@
+def format_size(num_bytes):
+    size = float(num_bytes)
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if size < 1024 or unit == 'TB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.2f} {unit}"
+        size /= 1024
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return '--:--:--'
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def format_count(count):
+    # Parameter counts the way model cards write them: 135M, 8.0B
+    value = float(count)
+    for unit in ('', 'K', 'M', 'B'):
+        if value < 1000 or unit == 'B':
+            return f"{value:.0f}{unit}" if unit in ('', 'K', 'M') else f"{value:.1f}{unit}"
+        value /= 1000
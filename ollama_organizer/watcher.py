@@ -0,0 +1,247 @@
+import os
+import sys
+import time
+import errno
+import queue
+import select
+import struct
+import threading
+from ollama_organizer.discovery import scan_manifests, manifest_ref
+
+# A pull writes its manifest last, but one pull can be followed by others; changes are handed over once the
+# manifests tree has been quiet this long
+DEBOUNCE_SECONDS = 5.0
+# Used where inotify is not available (Windows, macOS, inotify watches exhausted)
+POLL_INTERVAL = 30.0
+WAKE_SECONDS = 0.5
+# A run that fails as a whole (output unreachable) is retried after this, doubling up to RETRY_MAX_SECONDS
+RETRY_SECONDS = 10.0
+RETRY_MAX_SECONDS = 300.0
+
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT = struct.Struct('iIII')
+
+
+class _Inotify:
+    def __init__(self):
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        import ctypes
+        self._ctypes = ctypes
+        try:
+            self._libc = ctypes.CDLL(None, use_errno=True)
+            init = self._libc.inotify_init1
+        except (OSError, AttributeError):
+            raise OSError(errno.ENOSYS, "libc has no inotify")
+        self.fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            self._raise()
+        self.paths = {}
+
+    def _raise(self, path=None):
+        code = self._ctypes.get_errno()
+        raise OSError(code, os.strerror(code), path)
+
+    def add(self, path):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            self._raise(path)
+        self.paths[wd] = path
+
+    def read(self, timeout):
+        # [(watched directory, mask, name)]; empty after timeout seconds without events
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        pos = 0
+        while pos + EVENT.size <= len(data):
+            wd, mask, _, length = EVENT.unpack_from(data, pos)
+            pos += EVENT.size
+            name = os.fsdecode(data[pos:pos + length].rstrip(b'\0'))
+            pos += length
+            if mask & IN_IGNORED:
+                self.paths.pop(wd, None)
+                continue
+            events.append((self.paths.get(wd), mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ManifestWatcher:
+    # Calls on_change([(model_name, model_version)]) from its own thread for manifests written since start(),
+    # after debounce seconds without further changes
+    def __init__(self, manifests_dir, on_change, debounce=DEBOUNCE_SECONDS, poll_interval=POLL_INTERVAL):
+        self.manifests_dir = manifests_dir
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.mode = None
+        self._pending = {}
+        self._deadline = 0
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _changed(self, path):
+        ref = manifest_ref(self.manifests_dir, path)
+        if ref is not None:
+            self._pending[ref] = path
+            self._deadline = time.monotonic() + self.debounce
+
+    def _flush(self):
+        if not self._pending or time.monotonic() < self._deadline:
+            return
+        # Temp files a writer renamed away again are not tags
+        refs = sorted(ref for ref, path in self._pending.items() if os.path.isfile(path))
+        self._pending = {}
+        if refs:
+            self.on_change(refs)
+
+    def _watch_tree(self, inotify, root, collect):
+        # Directories created after start() may already hold manifests by the time their watch is added
+        for dirpath, _, filenames in os.walk(root):
+            inotify.add(dirpath)
+            if collect:
+                for name in filenames:
+                    self._changed(os.path.join(dirpath, name))
+
+    def _snapshot(self):
+        return {path: (st.st_mtime_ns, st.st_size) for _, _, path, st in scan_manifests(self.manifests_dir)}
+
+    def _watch_inotify(self, inotify):
+        while not self._stop.is_set():
+            for dirpath, mask, name in inotify.read(WAKE_SECONDS):
+                if mask & IN_Q_OVERFLOW:
+                    # Events were dropped; every manifest counts as changed and organize skips what is current
+                    for path in self._snapshot():
+                        self._changed(path)
+                    continue
+                if dirpath is None:
+                    continue
+                path = os.path.join(dirpath, name)
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        try:
+                            self._watch_tree(inotify, path, True)
+                        except OSError:
+                            pass
+                elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                    self._changed(path)
+            self._flush()
+
+    def _watch_poll(self, known):
+        next_poll = time.monotonic() + self.poll_interval
+        while not self._stop.wait(WAKE_SECONDS):
+            if time.monotonic() >= next_poll:
+                current = self._snapshot()
+                for path, signature in current.items():
+                    if known.get(path) != signature:
+                        self._changed(path)
+                known = current
+                next_poll = time.monotonic() + self.poll_interval
+            self._flush()
+
+    def _run(self):
+        inotify = None
+        known = None
+        try:
+            inotify = _Inotify()
+            self._watch_tree(inotify, self.manifests_dir, False)
+            if not inotify.paths:
+                raise OSError(errno.ENOENT, "No such directory", self.manifests_dir)
+            self.mode = 'inotify'
+        except OSError:
+            if inotify is not None:
+                inotify.close()
+                inotify = None
+            self.mode = 'poll'
+            # Taken before start() returns, a manifest written right after it must differ from the snapshot
+            known = self._snapshot()
+        self._ready.set()
+        try:
+            if inotify is not None:
+                self._watch_inotify(inotify)
+            else:
+                self._watch_poll(known)
+        finally:
+            if inotify is not None:
+                inotify.close()
+
+    def start(self):
+        # Returns once changes from now on are seen, with mode set to 'inotify' or 'poll'
+        self._stop.clear()
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+
+def watch_and_organize(source_dir, target_dir, patterns=('*',), stop=None, on_event=None, initial_sync=True,
+                       debounce=DEBOUNCE_SECONDS, poll_interval=POLL_INTERVAL, **options):
+    # Organizes new and updated tags matching patterns, one run at a time, until stop is set. options go to
+    # organize(); low_io_priority defaults to True so a pull or a running model keeps the disk.
+    from ollama_organizer.engine import list_models, select_models, organize
+    options.setdefault('low_io_priority', True)
+    stop = stop or threading.Event()
+    batches = queue.Queue()
+    watcher = ManifestWatcher(os.path.join(source_dir, 'models', 'manifests'), batches.put, debounce, poll_interval)
+    # Started before the first pass, so nothing pulled during it is missed
+    watcher.start()
+    if on_event:
+        on_event({"event": "watch_start", "manifests": watcher.manifests_dir, "mode": watcher.mode})
+    pending = list_models(source_dir) if initial_sync else []
+    retry_at = 0
+    backoff = RETRY_SECONDS
+    try:
+        while not stop.is_set():
+            if not pending or time.monotonic() < retry_at:
+                try:
+                    pending += batches.get(timeout=WAKE_SECONDS)
+                except queue.Empty:
+                    pass
+                if not pending or time.monotonic() < retry_at:
+                    continue
+            # Batches that arrived during the last run go into the next one together
+            while True:
+                try:
+                    pending += batches.get_nowait()
+                except queue.Empty:
+                    break
+            tasks = select_models(sorted(set(pending)), patterns)
+            pending = []
+            if not tasks:
+                continue
+            if on_event:
+                on_event({"event": "watch_batch", "models": [f"{m}:{v}" for m, v in tasks]})
+            try:
+                organize(tasks, source_dir, target_dir, on_event=on_event, **options)
+                backoff = RETRY_SECONDS
+            except Exception as e:
+                # An unreachable output directory should not end the watch or lose the batch; it is retried
+                # together with whatever is pulled meanwhile
+                pending = tasks
+                retry_at = time.monotonic() + backoff
+                if on_event:
+                    on_event({"event": "error", "error": f"{e} (retrying in {backoff:g} seconds)"})
+                backoff = min(backoff * 2, RETRY_MAX_SECONDS)
+    finally:
+        watcher.stop()
@@ -0,0 +1,26 @@
+import json
+import hashlib
+import pytest
+
+
+@pytest.fixture
+def add_blob():
+    # add_blob(store, data) writes a blob into store/models/blobs and returns its manifest descriptor
+    def add(store, data):
+        digest = hashlib.sha256(data).hexdigest()
+        path = store / 'models' / 'blobs' / f"sha256-{digest}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        return {"digest": f"sha256:{digest}", "size": len(data)}
+    return add
+
+
+@pytest.fixture
+def add_tag():
+    # add_tag(store, model, tag, config, layers) writes a manifest for the given descriptors and returns its path
+    def add(store, model, tag, config, layers):
+        path = store / 'models' / 'manifests' / 'registry.ollama.ai' / 'library' / model / tag
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"config": config, "layers": layers}))
+        return path
+    return add
@@ -0,0 +1,46 @@
+import os
+from ollama_organizer.analytics import analyze_store
+
+
+def entry(model, *blobs):
+    return {"model": model, "layers": [{"digest": b["digest"], "size": b["size"]} for b in blobs]}
+
+
+def test_shared_exclusive_and_freed_bytes(tmp_path, add_blob):
+    weights = add_blob(tmp_path, b'w' * 1000)
+    config_a = add_blob(tmp_path, b'a' * 10)
+    config_b = add_blob(tmp_path, b'b' * 20)
+    qwen = add_blob(tmp_path, b'q' * 300)
+    unused = add_blob(tmp_path, b'u' * 7)
+    entries = [entry('llama', config_a, weights), entry('llama', config_b, weights), entry('qwen', qwen)]
+
+    stats = analyze_store(entries, str(tmp_path / 'models' / 'blobs'))
+    assert [(e["exclusive_bytes"], e["shared_bytes"], e["freed_bytes"]) for e in entries] == [
+        (10, 1000, 10), (20, 1000, 20), (300, 0, 300)]
+    assert stats["logical_bytes"] == 10 + 20 + 300 + 2 * 1000
+    assert stats["stored_bytes"] == 10 + 20 + 300 + 1000
+    assert stats["dedup_ratio"] == stats["logical_bytes"] / stats["stored_bytes"]
+    # Deleting every llama tag frees the shared weights too
+    assert stats["models"]["llama"] == {"tags": 2, "freed_bytes": 1030}
+    assert (stats["unreferenced_blobs"], stats["unreferenced_bytes"]) == (1, unused["size"])
+
+
+def test_hard_linked_blobs_are_not_freed(tmp_path, add_blob):
+    weights = add_blob(tmp_path, b'w' * 1000)
+    name = weights["digest"].replace(':', '-')
+    os.link(tmp_path / 'models' / 'blobs' / name, tmp_path / 'pool-copy')
+    entries = [entry('llama', weights)]
+    stats = analyze_store(entries, str(tmp_path / 'models' / 'blobs'))
+    assert entries[0]["exclusive_bytes"] == 1000
+    assert entries[0]["freed_bytes"] == 0
+    assert stats["models"]["llama"]["freed_bytes"] == 0
+
+
+def test_missing_blobs_stay_out_of_the_ratio(tmp_path, add_blob):
+    weights = add_blob(tmp_path, b'w' * 1000)
+    missing = {"digest": "sha256:" + "0" * 64, "size": 500}
+    entries = [entry('llama', weights, missing), entry('mistral', weights)]
+    stats = analyze_store(entries, str(tmp_path / 'models' / 'blobs'))
+    assert (stats["missing_blobs"], stats["missing_bytes"]) == (1, 500)
+    assert stats["logical_bytes"] == 2000
+    assert stats["dedup_ratio"] == 2.0
@@ -0,0 +1,88 @@
+import os
+from ollama_organizer.blobgc import plan_gc, execute_gc
+
+
+def blob_names(plan):
+    return {os.path.basename(path) for path, _ in plan.blobs}
+
+
+def test_shared_blobs_are_kept(tmp_path, add_blob, add_tag):
+    weights = add_blob(tmp_path, b'weights' * 100)
+    config_a = add_blob(tmp_path, b'config a')
+    config_b = add_blob(tmp_path, b'config b')
+    add_tag(tmp_path, 'llama', '7b', config_a, [weights])
+    add_tag(tmp_path, 'llama', 'latest', config_b, [weights])
+
+    plan = plan_gc(str(tmp_path), [('llama', '7b')])
+    assert blob_names(plan) == {config_a['digest'].replace(':', '-')}
+    assert plan.reclaim_bytes == len(b'config a')
+
+    # Once the last tag using the weights goes, they are freed too
+    plan = plan_gc(str(tmp_path), [('llama', '7b'), ('llama', 'latest')])
+    assert blob_names(plan) == {d['digest'].replace(':', '-') for d in (weights, config_a, config_b)}
+
+
+def test_execute_removes_manifests_and_empty_dirs(tmp_path, add_blob, add_tag):
+    config = add_blob(tmp_path, b'config')
+    keep = add_blob(tmp_path, b'other config')
+    path = add_tag(tmp_path, 'qwen', '1b', config, [])
+    add_tag(tmp_path, 'llama', '7b', keep, [])
+
+    result = execute_gc(plan_gc(str(tmp_path), [('qwen', '1b'), ('qwen', 'missing')]))
+    assert result == {"manifests": 1, "blobs": 1, "bytes": len(b'config'), "failed": 0}
+    assert not path.parent.exists()
+    assert (tmp_path / 'models' / 'blobs' / keep['digest'].replace(':', '-')).exists()
+
+
+def test_missing_tags_are_reported(tmp_path, add_blob, add_tag):
+    add_tag(tmp_path, 'llama', '7b', add_blob(tmp_path, b'config'), [])
+    plan = plan_gc(str(tmp_path), [('llama', '70b')])
+    assert plan.missing == [('llama', '70b')]
+    assert plan.blobs == []
+
+
+def test_unreadable_manifest_blocks_the_sweep(tmp_path, add_blob, add_tag):
+    config = add_blob(tmp_path, b'config')
+    add_tag(tmp_path, 'llama', '7b', config, [])
+    broken = add_tag(tmp_path, 'qwen', '1b', config, [])
+    broken.write_text('{not json')
+    plan = plan_gc(str(tmp_path), [('llama', '7b')])
+    assert plan.errors
+    assert plan.blobs == []
+
+
+def test_orphans_respect_the_grace_period(tmp_path, add_blob, add_tag):
+    add_tag(tmp_path, 'llama', '7b', add_blob(tmp_path, b'config'), [])
+    old = add_blob(tmp_path, b'left by a deleted tag')['digest'].replace(':', '-')
+    new = add_blob(tmp_path, b'pull in progress')['digest'].replace(':', '-')
+    os.utime(tmp_path / 'models' / 'blobs' / old, (1, 1))
+    (tmp_path / 'models' / 'blobs' / 'sha256-tmp-partial').write_bytes(b'x')
+
+    assert plan_gc(str(tmp_path)).blobs == []
+    plan = plan_gc(str(tmp_path), sweep_orphans=True, grace_seconds=3600)
+    assert blob_names(plan) == {old}
+    assert new not in blob_names(plan)
+
+
+def test_blobs_of_a_manifest_that_cannot_be_removed_are_kept(tmp_path, add_blob, add_tag, monkeypatch):
+    weights = add_blob(tmp_path, b'weights')
+    add_tag(tmp_path, 'llama', '7b', add_blob(tmp_path, b'config a'), [weights])
+    config = add_blob(tmp_path, b'config q')
+    stuck = add_tag(tmp_path, 'qwen', '1b', config, [weights])
+    plan = plan_gc(str(tmp_path), [('llama', '7b'), ('qwen', '1b')])
+    assert len(plan.blobs) == 3
+
+    remove = os.remove
+
+    def failing_remove(path):
+        if os.path.normpath(path) == os.path.normpath(str(stuck)):
+            raise PermissionError(13, 'Permission denied', path)
+        remove(path)
+    monkeypatch.setattr(os, 'remove', failing_remove)
+
+    result = execute_gc(plan)
+    assert result["manifests"] == 1 and result["failed"] == 1
+    # Only the config of the removed tag goes; the remaining tag still has all its blobs
+    assert result["blobs"] == 1
+    assert sorted(os.listdir(tmp_path / 'models' / 'blobs')) == sorted(
+        d['digest'].replace(':', '-') for d in (weights, config))
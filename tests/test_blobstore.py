@@ -0,0 +1,42 @@
+import os
+import errno
+import pytest
+from ollama_organizer import blobstore
+from ollama_organizer.blobstore import link_blob, clone_blob
+
+
+@pytest.fixture
+def no_reflink(monkeypatch):
+    def reflink(src, dst):
+        raise OSError(errno.EOPNOTSUPP, 'Operation not supported')
+    monkeypatch.setattr(blobstore, 'reflink', reflink)
+
+
+def test_reflink_mode_falls_back_to_hardlink(tmp_path, no_reflink):
+    pool_path = tmp_path / 'pool-blob'
+    pool_path.write_bytes(b'weights')
+    dst = tmp_path / 'blob'
+    assert link_blob(str(pool_path), str(dst), 'reflink') == 'hardlink'
+    assert os.path.samefile(pool_path, dst)
+    # Already linked, nothing to redo
+    assert link_blob(str(pool_path), str(dst), 'reflink') == 'hardlink'
+
+
+def test_symlink_is_relative_to_the_published_dir(tmp_path):
+    pool_path = tmp_path / 'blob_pool' / 'blob'
+    pool_path.parent.mkdir()
+    pool_path.write_bytes(b'weights')
+    stage = tmp_path / '.staging' / 'key' / 'models' / 'blobs'
+    stage.mkdir(parents=True)
+    link_dir = tmp_path / 'llama' / '7b' / 'models' / 'blobs'
+    assert link_blob(str(pool_path), str(stage / 'blob'), 'symlink', str(link_dir)) == 'symlink'
+    assert os.readlink(stage / 'blob') == os.path.join('..', '..', '..', '..', 'blob_pool', 'blob')
+
+
+def test_clone_is_an_independent_copy(tmp_path, no_reflink):
+    src = tmp_path / 'a'
+    src.write_bytes(b'weights')
+    dst = tmp_path / 'b'
+    assert clone_blob(str(src), str(dst)) == 'copy'
+    assert dst.read_bytes() == b'weights'
+    assert not os.path.samefile(src, dst)
@@ -0,0 +1,102 @@
+import io
+import os
+import json
+import tarfile
+import pytest
+from ollama_organizer import bundle
+from ollama_organizer.bundle import export_version, import_bundle, read_index
+
+MODEL = 'application/vnd.ollama.image.model'
+
+
+def make_source(source, add_blob, add_tag):
+    weights = dict(add_blob(source, os.urandom(64 * 1024)), mediaType=MODEL)
+    template = dict(add_blob(source, b'{{ .Prompt }}' * 200), mediaType='application/vnd.ollama.image.template')
+    add_tag(source, 'llama', '7b', add_blob(source, b'{"model_family": "llama"}' * 20), [weights, template])
+    return weights, template
+
+
+def blob_files(store):
+    blobs_dir = store / 'models' / 'blobs'
+    return {name: (blobs_dir / name).read_bytes() for name in os.listdir(blobs_dir)}
+
+
+def bad_bundle(path, members):
+    with tarfile.open(path, 'w') as tar:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return path
+
+
+@pytest.mark.parametrize('codec', ['gzip', pytest.param('zstd', marks=pytest.mark.skipif(
+    bundle.zstandard is None, reason="zstandard is not installed"))])
+def test_round_trip(tmp_path, add_blob, add_tag, codec):
+    source = tmp_path / 'source'
+    weights, template = make_source(source, add_blob, add_tag)
+    path = str(tmp_path / 'llama-7b.tar')
+    index = export_version(str(source), 'llama', '7b', path, codec)
+
+    stored = {entry['digest']: entry for entry in index['blobs']}
+    assert stored[weights['digest']]['compression'] is None
+    assert stored[template['digest']]['compression'] == codec
+    assert read_index(path) == index
+    # Offsets point at the member data, so a single blob can be read by byte range
+    with open(path, 'rb') as f:
+        f.seek(stored[weights['digest']]['offset'])
+        assert f.read(weights['size']) == blob_files(source)[weights['digest'].replace(':', '-')]
+
+    store = tmp_path / 'store'
+    with open(path, 'rb') as f:
+        assert import_bundle(f, str(store)) == ('llama', '7b')
+    assert blob_files(store) == blob_files(source)
+    manifest = os.path.join('models', 'manifests', 'registry.ollama.ai', 'library', 'llama', '7b')
+    assert (store / manifest).read_bytes() == (source / manifest).read_bytes()
+
+
+def test_export_is_reproducible(tmp_path, add_blob, add_tag):
+    source = tmp_path / 'source'
+    make_source(source, add_blob, add_tag)
+    first, second = str(tmp_path / 'a.tar'), str(tmp_path / 'b.tar')
+    export_version(str(source), 'llama', '7b', first, 'gzip')
+    # Members do not carry the blob file times
+    for name in os.listdir(source / 'models' / 'blobs'):
+        os.utime(source / 'models' / 'blobs' / name, (1, 1))
+    export_version(str(source), 'llama', '7b', second, 'gzip')
+    assert open(first, 'rb').read() == open(second, 'rb').read()
+
+
+def test_manifest_path_outside_the_store_is_rejected(tmp_path):
+    path = bad_bundle(tmp_path / 'evil.tar', [('models/manifests/../../../evil/x/y', b'{}')])
+    with open(path, 'rb') as f, pytest.raises(RuntimeError, match="Unexpected manifest path"):
+        import_bundle(f, str(tmp_path / 'store'))
+    assert not (tmp_path / 'evil').exists()
+
+
+def test_unexpected_and_unreferenced_blobs_are_rejected(tmp_path, add_blob):
+    config = add_blob(tmp_path / 'source', b'config')
+    manifest = json.dumps({"config": config, "layers": []}).encode()
+    manifest_name = 'models/manifests/registry.ollama.ai/library/llama/7b'
+    other = 'sha256-' + '0' * 64
+
+    for members, message in (
+            ([(manifest_name, manifest), ('models/blobs/../../evil', b'x')], "Unexpected file"),
+            ([(manifest_name, manifest), (f'models/blobs/{other}', b'x')], "not referenced")):
+        path = bad_bundle(tmp_path / 'bad.tar', members)
+        with open(path, 'rb') as f, pytest.raises(RuntimeError, match=message):
+            import_bundle(f, str(tmp_path / 'store'))
+    assert not (tmp_path / 'store' / 'models' / 'manifests').exists()
+
+
+def test_corrupted_blob_leaves_no_manifest(tmp_path, add_blob):
+    config = add_blob(tmp_path / 'source', b'config')
+    manifest = json.dumps({"config": config, "layers": []}).encode()
+    path = bad_bundle(tmp_path / 'bad.tar', [
+        ('models/manifests/registry.ollama.ai/library/llama/7b', manifest),
+        ('models/blobs/' + config['digest'].replace(':', '-'), b'CONFIG'),
+    ])
+    with open(path, 'rb') as f, pytest.raises(RuntimeError, match="Digest mismatch"):
+        import_bundle(f, str(tmp_path / 'store'))
+    assert os.listdir(tmp_path / 'store' / 'models' / 'blobs') == []
+    assert not (tmp_path / 'store' / 'models' / 'manifests').exists()
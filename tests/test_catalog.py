@@ -0,0 +1,44 @@
+import json
+from ollama_organizer.catalog import ModelCatalog, GGUF_FIELDS
+
+
+def test_refresh_keeps_derived_fields_out_of_the_cache(tmp_path, add_blob, add_tag):
+    source = tmp_path / 'source'
+    weights = add_blob(source, b'weights')
+    add_tag(source, 'llama', '7b', add_blob(source, b'config a'), [weights])
+    add_tag(source, 'llama', 'latest', add_blob(source, b'config b'), [weights])
+    cache_file = tmp_path / 'catalog_cache.json'
+
+    catalog = ModelCatalog(str(cache_file))
+    entries = catalog.refresh(str(source))
+    assert [(e['model'], e['version']) for e in entries] == [('llama', '7b'), ('llama', 'latest')]
+    assert all(e['shared_bytes'] == len(b'weights') for e in entries)
+    assert all(field in e for e in entries for field in GGUF_FIELDS)
+
+    # A tag added later changes the cache, which must still hold only parsed manifest data
+    add_tag(source, 'qwen', '1b', add_blob(source, b'config q'), [])
+    catalog.refresh(str(source))
+    cached = json.loads(cache_file.read_text())["manifests"]
+    assert len(cached) == 3
+    for entry in cached.values():
+        assert not {'shared_bytes', 'freed_bytes', 'exclusive_bytes'} & set(entry)
+        assert not set(GGUF_FIELDS) & set(entry)
+    for entry in catalog.entries.values():
+        assert 'shared_bytes' not in entry
+
+
+def test_cache_is_reused_until_a_manifest_changes(tmp_path, add_blob, add_tag):
+    source = tmp_path / 'source'
+    path = add_tag(source, 'llama', '7b', add_blob(source, b'config'), [])
+    cache_file = tmp_path / 'catalog_cache.json'
+    ModelCatalog(str(cache_file)).refresh(str(source))
+
+    catalog = ModelCatalog(str(cache_file))
+    catalog.load()
+    cached = catalog.entries[str(path)]
+    assert catalog.refresh(str(source))[0]['config_digest'] == cached['config_digest']
+    assert catalog.entries[str(path)] is cached
+
+    path.write_text(json.dumps({"config": add_blob(source, b'new config'), "layers": []}))
+    entries = catalog.refresh(str(source))
+    assert entries[0]['config_digest'] != cached['config_digest']
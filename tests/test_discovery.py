@@ -0,0 +1,57 @@
+import os
+import pytest
+from ollama_organizer.discovery import (model_ref, parse_model_ref, manifest_rel_path, manifest_ref, split_ref,
+                                        scan_manifests)
+from ollama_organizer.engine import select_models
+
+REFS = [
+    ('llama3', ('registry.ollama.ai', 'library', 'llama3')),
+    ('jmorgan/llama3', ('registry.ollama.ai', 'jmorgan', 'llama3')),
+    ('hf.co/bartowski/Llama-3.2-1B-GGUF', ('hf.co', 'bartowski', 'Llama-3.2-1B-GGUF')),
+    ('localhost:5000/team/llama3', ('localhost:5000', 'team', 'llama3')),
+]
+
+
+@pytest.mark.parametrize('name, parts', REFS)
+def test_names_map_to_manifest_paths_and_back(tmp_path, name, parts):
+    assert parse_model_ref(name) == parts
+    assert model_ref(*parts) == name
+    rel_path = manifest_rel_path(name, 'latest')
+    assert rel_path == os.path.join('manifests', *parts, 'latest')
+    assert manifest_ref(str(tmp_path / 'manifests'), str(tmp_path / rel_path)) == (name, 'latest')
+
+
+def test_invalid_names_and_paths():
+    with pytest.raises(ValueError):
+        parse_model_ref('a/b/c/d')
+    assert manifest_ref('/m/manifests', '/m/manifests/registry.ollama.ai/library/llama3') is None
+    assert manifest_ref('/m/manifests', '/m/blobs/sha256-x') is None
+
+
+def test_split_ref():
+    assert split_ref('llama3:8b') == ('llama3', '8b')
+    assert split_ref('llama3') == ('llama3', '')
+    assert split_ref('hf.co/user/repo:Q4_K_M') == ('hf.co/user/repo', 'Q4_K_M')
+    # A port belongs to the host, not the tag
+    assert split_ref('localhost:5000/team/llama3') == ('localhost:5000/team/llama3', '')
+
+
+def test_scan_finds_every_registry_and_namespace(tmp_path):
+    manifests = tmp_path / 'manifests'
+    for name, parts in REFS:
+        path = manifests.joinpath(*parts, 'latest')
+        path.parent.mkdir(parents=True)
+        path.write_text('{}')
+    # Not a tag
+    (manifests / 'registry.ollama.ai' / 'library' / 'llama3' / 'nested').mkdir()
+    for workers in (1, 8):
+        found = sorted((name, tag) for name, tag, _, _ in scan_manifests(str(manifests), workers))
+        assert found == sorted((name, 'latest') for name, _ in REFS)
+    assert scan_manifests(str(tmp_path / 'missing')) == []
+
+
+def test_select_models():
+    models = [('llama3', '8b'), ('llama3', '70b'), ('qwen2', '7b'), ('hf.co/user/repo', 'Q4_K_M')]
+    assert select_models(models, ['llama3']) == [('llama3', '8b'), ('llama3', '70b')]
+    assert select_models(models, ['llama3:7*', 'qwen*']) == [('llama3', '70b'), ('qwen2', '7b')]
+    assert select_models(models, ['hf.co/*']) == [('hf.co/user/repo', 'Q4_K_M')]
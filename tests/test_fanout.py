@@ -0,0 +1,66 @@
+import os
+import hashlib
+from ollama_organizer.engine import organize
+from ollama_organizer.fanout import fanout_copy
+
+
+def test_fanout_copy_writes_every_target(tmp_path):
+    data = os.urandom(300 * 1024)
+    name = f"sha256-{hashlib.sha256(data).hexdigest()}"
+    src = tmp_path / name
+    src.write_bytes(data)
+    paths = [str(tmp_path / d / name) for d in ('a', 'b', 'c')]
+    for path in paths:
+        os.makedirs(os.path.dirname(path))
+    reported = []
+    errors = fanout_copy(str(src), paths, buffer_size=64 * 1024, queue_chunks=1,
+                         progress=lambda n, *times: reported.append(n))
+    assert errors == {}
+    assert all(open(path, 'rb').read() == data for path in paths)
+    assert sum(reported) == len(data) * 3
+
+
+def test_fanout_copy_digest_mismatch_fails_every_target(tmp_path):
+    src = tmp_path / 'src'
+    src.write_bytes(b'not what the name says')
+    paths = [str(tmp_path / f"{d}-sha256-{'0' * 64}") for d in ('a', 'b')]
+    errors = fanout_copy(str(src), paths, blob_name=f"sha256-{'0' * 64}")
+    assert set(errors) == set(paths)
+    assert os.listdir(tmp_path) == ['src']
+
+
+def test_mirrors_write_each_blob_once_per_directory(tmp_path, add_blob, add_tag):
+    source = tmp_path / 'source'
+    weights = add_blob(source, b'weights' * 1000)
+    add_tag(source, 'llama', '7b', add_blob(source, b'config a'), [weights])
+    add_tag(source, 'llama', 'latest', add_blob(source, b'config b'), [weights])
+    targets = [str(tmp_path / 'a'), str(tmp_path / 'b')]
+
+    summary = organize([('llama', '7b'), ('llama', 'latest')], str(source), targets)
+    assert summary["success"] == 4
+    unique = len(b'weights' * 1000) + len(b'config a') + len(b'config b')
+    assert summary["bytes_to_copy"] == summary["bytes_copied"] == unique * 2
+    name = weights['digest'].replace(':', '-')
+    for target in targets:
+        first = os.path.join(target, 'llama', '7b', 'models', 'blobs', name)
+        second = os.path.join(target, 'llama', 'latest', 'models', 'blobs', name)
+        assert open(first, 'rb').read() == open(second, 'rb').read() == b'weights' * 1000
+        # Copy mode keeps independent files
+        assert not os.path.samefile(first, second)
+
+
+def test_mirrors_with_blob_pools(tmp_path, add_blob, add_tag):
+    source = tmp_path / 'source'
+    weights = add_blob(source, b'weights' * 1000)
+    add_tag(source, 'llama', '7b', add_blob(source, b'config a'), [weights])
+    add_tag(source, 'llama', 'latest', add_blob(source, b'config b'), [weights])
+    targets = [str(tmp_path / 'a'), str(tmp_path / 'b')]
+
+    summary = organize([('llama', '7b'), ('llama', 'latest')], str(source), targets, link_mode='hardlink')
+    assert summary["success"] == 4
+    assert summary["bytes_to_copy"] == summary["bytes_copied"]
+    name = weights['digest'].replace(':', '-')
+    for target in targets:
+        pooled = os.path.join(target, 'blob_pool', name)
+        for version in ('7b', 'latest'):
+            assert os.path.samefile(pooled, os.path.join(target, 'llama', version, 'models', 'blobs', name))
@@ -0,0 +1,88 @@
+import struct
+import pytest
+from ollama_organizer.gguf import read_header, model_info
+
+
+def _string(value, count='<Q'):
+    data = value.encode('utf-8')
+    return struct.pack(count, len(data)) + data
+
+
+def _kv(key, value_type, payload, count='<Q'):
+    return _string(key, count) + struct.pack('<I', value_type) + payload
+
+
+def write_gguf(path, metadata, tensors, version=3):
+    # metadata: [(key, type, payload bytes)], tensors: [(dims, tensor_type)]
+    count = '<I' if version == 1 else '<Q'
+    data = b'GGUF' + struct.pack('<I', version) + struct.pack(count, len(tensors)) + struct.pack(count, len(metadata))
+    for key, value_type, payload in metadata:
+        data += _kv(key, value_type, payload, count)
+    for i, (dims, tensor_type) in enumerate(tensors):
+        data += _string(f"blk.{i}.weight", count) + struct.pack('<I', len(dims))
+        data += b''.join(struct.pack(count, d) for d in dims) + struct.pack('<IQ', tensor_type, 0)
+    path.write_bytes(data + b'\0' * 64)
+
+
+def llama_metadata(count='<Q'):
+    tokens = [f"tok{i}" for i in range(50)]
+    return [
+        ('general.architecture', 8, _string('llama', count)),
+        ('tokenizer.ggml.tokens', 9, struct.pack('<I', 8) + struct.pack(count, len(tokens))
+         + b''.join(_string(t, count) for t in tokens)),
+        ('tokenizer.ggml.scores', 9, struct.pack('<I', 6) + struct.pack(count, 3) + struct.pack('<3f', 0, 1, 2)),
+        ('llama.context_length', 4, struct.pack('<I', 8192)),
+        ('general.file_type', 4, struct.pack('<I', 15)),
+    ]
+
+
+def test_model_info(tmp_path):
+    path = tmp_path / 'model.gguf'
+    write_gguf(path, llama_metadata(), [((4096, 32000), 12), ((4096, 4096), 14)])
+    info = model_info(str(path))
+    assert info["architecture"] == 'llama'
+    assert info["quantization"] == 'Q4_K_M'
+    assert info["context_length"] == 8192
+    assert info["parameters"] == 4096 * 32000 + 4096 * 4096
+    assert info["gguf_version"] == 3
+
+
+def test_arrays_are_returned_as_length(tmp_path):
+    path = tmp_path / 'model.gguf'
+    write_gguf(path, llama_metadata(), [])
+    metadata, tensors = read_header(str(path))
+    assert metadata['tokenizer.ggml.tokens'] == 50
+    assert metadata['tokenizer.ggml.scores'] == 3
+    assert tensors == []
+
+
+def test_quantization_from_tensor_types(tmp_path):
+    path = tmp_path / 'model.gguf'
+    metadata = [kv for kv in llama_metadata() if kv[0] != 'general.file_type']
+    write_gguf(path, metadata, [((4096, 32000), 8), ((64,), 0)])
+    assert model_info(str(path))["quantization"] == 'Q8_0'
+
+
+def test_version_1_uses_32_bit_counts(tmp_path):
+    path = tmp_path / 'model.gguf'
+    write_gguf(path, llama_metadata('<I'), [((16, 16), 1)], version=1)
+    info = model_info(str(path))
+    assert info["gguf_version"] == 1
+    assert info["parameters"] == 256
+    assert info["quantization"] == 'Q4_K_M'
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'license'
+    path.write_bytes(b'MIT License\n' * 10)
+    with pytest.raises(ValueError):
+        read_header(str(path))
+
+
+def test_truncated_header(tmp_path):
+    path = tmp_path / 'model.gguf'
+    write_gguf(path, llama_metadata(), [((4096, 32000), 12)])
+    data = path.read_bytes()
+    path.write_bytes(data[:60])
+    with pytest.raises(ValueError):
+        read_header(str(path))
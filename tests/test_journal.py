@@ -0,0 +1,67 @@
+import json
+from ollama_organizer.journal import RecordStore, journal_path
+
+RECORD = {"config_digest": "sha256-c", "layers_digest": ["sha256:w"]}
+
+
+def test_records_are_replayed_from_the_journal(tmp_path):
+    record_file = tmp_path / 'processed_models.json'
+    store = RecordStore(str(record_file))
+    store.load()
+    store.record('llama', '7b', RECORD)
+    store.record('llama', 'latest', RECORD)
+    assert not record_file.exists()
+
+    assert RecordStore(str(record_file)).load() == {'llama': {'7b': RECORD, 'latest': RECORD}}
+
+    store.compact()
+    assert json.loads(record_file.read_text()) == {'llama': {'7b': RECORD, 'latest': RECORD}}
+    assert not (tmp_path / 'processed_models.journal.jsonl').exists()
+    assert RecordStore(str(record_file)).load() == {'llama': {'7b': RECORD, 'latest': RECORD}}
+
+
+def test_torn_tail_is_dropped(tmp_path):
+    record_file = str(tmp_path / 'processed_models.json')
+    store = RecordStore(record_file)
+    store.load()
+    store.record('llama', '7b', RECORD)
+    with open(journal_path(record_file), 'a', encoding='utf-8') as f:
+        f.write('{"op": "done", "model": "qwen", "vers')
+
+    store = RecordStore(record_file)
+    assert store.load() == {'llama': {'7b': RECORD}}
+    # The next line starts fresh instead of continuing the torn one
+    store.record('qwen', '1b', RECORD)
+    assert RecordStore(record_file).load() == {'llama': {'7b': RECORD}, 'qwen': {'1b': RECORD}}
+
+
+def test_unreadable_record_file_falls_back_to_the_journal(tmp_path):
+    record_file = tmp_path / 'processed_models.json'
+    record_file.write_text('{"llama": ')
+    store = RecordStore(str(record_file))
+    assert store.load() == {}
+    store.record('llama', '7b', RECORD)
+    assert RecordStore(str(record_file)).load() == {'llama': {'7b': RECORD}}
+
+
+def test_compaction_keeps_records_of_other_runs(tmp_path):
+    record_file = str(tmp_path / 'processed_models.json')
+    ours, theirs = RecordStore(record_file), RecordStore(record_file)
+    ours.load()
+    theirs.load()
+    ours.record('llama', '7b', RECORD)
+    theirs.record('qwen', '1b', RECORD)
+    ours.compact()
+    assert RecordStore(record_file).load() == {'llama': {'7b': RECORD}, 'qwen': {'1b': RECORD}}
+
+
+def test_compacts_after_compact_every_appends(tmp_path):
+    record_file = tmp_path / 'processed_models.json'
+    store = RecordStore(str(record_file), compact_every=3)
+    store.load()
+    for version in ('1b', '3b'):
+        store.record('qwen', version, RECORD)
+    assert not record_file.exists()
+    store.record('qwen', '7b', RECORD)
+    assert set(json.loads(record_file.read_text())['qwen']) == {'1b', '3b', '7b'}
+    assert not (tmp_path / 'processed_models.journal.jsonl').exists()
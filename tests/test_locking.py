@@ -0,0 +1,103 @@
+import os
+import sys
+import json
+import time
+import threading
+import subprocess
+from ollama_organizer import locking
+from ollama_organizer.locking import FileLock, BlobClaims, lock_path, claim_marker, CLAIMS_DIR_NAME
+from ollama_organizer.staging import HOST
+
+
+def write_claim(marker, host, pid):
+    os.makedirs(os.path.dirname(marker), exist_ok=True)
+    with open(marker, 'w', encoding='utf-8') as f:
+        json.dump({"host": host, "pid": pid, "time": 0}, f)
+
+
+def dead_pid():
+    proc = subprocess.Popen([sys.executable, '-c', 'pass'])
+    proc.wait()
+    return proc.pid
+
+
+def test_lock_path_is_hidden_next_to_the_file(tmp_path):
+    assert lock_path(str(tmp_path / 'processed_models.json')) == str(tmp_path / '.processed_models.json.lock')
+
+
+def test_file_lock_serializes_threads(tmp_path):
+    path = str(tmp_path / '.lock')
+    inside = []
+    overlaps = []
+
+    def work():
+        for _ in range(20):
+            with FileLock(path):
+                inside.append(1)
+                overlaps.append(len(inside))
+                time.sleep(0.001)
+                inside.pop()
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(overlaps) == 80 and max(overlaps) == 1
+
+
+def test_file_lock_waits_for_another_process(tmp_path):
+    path = str(tmp_path / '.lock')
+    holder = subprocess.Popen(
+        [sys.executable, '-c', 'import sys, time; from ollama_organizer.locking import FileLock\n'
+         'with FileLock(sys.argv[1]):\n    print("locked", flush=True)\n    time.sleep(0.5)', path],
+        stdout=subprocess.PIPE, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert holder.stdout.readline().strip() == b'locked'
+    started = time.monotonic()
+    with FileLock(path):
+        waited = time.monotonic() - started
+    holder.wait()
+    assert waited >= 0.2
+
+
+def test_claim_and_release(tmp_path):
+    marker = claim_marker(str(tmp_path), str(tmp_path / 'blob_pool' / 'sha256-x'))
+    assert os.path.dirname(marker) == str(tmp_path / CLAIMS_DIR_NAME)
+    claims = BlobClaims()
+    assert claims.acquire([marker, marker]) == [marker]
+    with open(marker, encoding='utf-8') as f:
+        assert json.load(f)["pid"] == os.getpid()
+    assert not claims._try_claim(marker)
+    claims.release([marker])
+    assert not os.path.exists(marker)
+
+
+def test_claims_of_live_runs_are_respected(tmp_path):
+    marker = claim_marker(str(tmp_path), str(tmp_path / 'blob'))
+    write_claim(marker, HOST, os.getppid())
+    assert not BlobClaims()._try_claim(marker)
+
+
+def test_claim_of_a_dead_local_run_is_taken_over(tmp_path):
+    marker = claim_marker(str(tmp_path), str(tmp_path / 'blob'))
+    write_claim(marker, HOST, dead_pid())
+    claims = BlobClaims()
+    assert claims._try_claim(marker)
+    assert marker in claims.held
+
+
+def test_other_hosts_claim_expires_only_without_heartbeat(tmp_path, monkeypatch):
+    monkeypatch.setattr(locking, 'CLAIM_TTL', 0.2)
+    marker = claim_marker(str(tmp_path), str(tmp_path / 'blob'))
+    write_claim(marker, HOST + '-other', 1)
+    # Far in the future by our clock: only changes of the mtime count
+    os.utime(marker, (time.time() + 86400, time.time() + 86400))
+    claims = BlobClaims()
+    assert not claims._try_claim(marker)
+    time.sleep(0.3)
+    # A heartbeat moved the mtime, so the claim is alive again
+    os.utime(marker, (time.time() + 90000, time.time() + 90000))
+    assert not claims._try_claim(marker)
+    time.sleep(0.1)
+    assert not claims._try_claim(marker)
+    time.sleep(0.2)
+    assert claims._try_claim(marker)
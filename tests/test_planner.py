@@ -0,0 +1,73 @@
+import os
+from ollama_organizer.planner import plan_sync
+from ollama_organizer.engine import organize
+from ollama_organizer.journal import RecordStore
+
+
+def output_blobs(target, model, tag):
+    return sorted(os.listdir(target / model / tag / 'models' / 'blobs'))
+
+
+def plan(source, target, tasks):
+    records = RecordStore(str(target / 'processed_models.json')).load()
+    return plan_sync(tasks, str(source), str(target), str(source / 'models' / 'blobs'), records)
+
+
+def test_new_versions_read_shared_blobs_once(tmp_path, add_blob, add_tag):
+    source, target = tmp_path / 'source', tmp_path / 'target'
+    weights = add_blob(source, b'weights' * 100)
+    add_tag(source, 'llama', '7b', add_blob(source, b'config a'), [weights])
+    add_tag(source, 'llama', 'latest', add_blob(source, b'config b'), [weights])
+
+    result = plan(source, target, [('llama', '7b'), ('llama', 'latest')])
+    assert len(result.jobs) == 2
+    assert all(job.stage_dir for job in result.jobs)
+    assert result.bytes_to_copy == len(b'weights' * 100) + len(b'config a') + len(b'config b')
+    assert not result.up_to_date and not result.stale
+
+
+def test_organized_versions_are_up_to_date(tmp_path, add_blob, add_tag):
+    source, target = tmp_path / 'source', tmp_path / 'target'
+    add_tag(source, 'qwen', '1b', add_blob(source, b'config'), [add_blob(source, b'weights')])
+    organize([('qwen', '1b')], str(source), str(target))
+
+    result = plan(source, target, [('qwen', '1b')])
+    assert [job.model_version for job in result.up_to_date] == ['1b']
+    assert result.jobs == [] and result.bytes_to_copy == 0
+
+
+def test_missing_output_blob_is_copied_again(tmp_path, add_blob, add_tag):
+    source, target = tmp_path / 'source', tmp_path / 'target'
+    weights = add_blob(source, b'weights')
+    add_tag(source, 'qwen', '1b', add_blob(source, b'config'), [weights])
+    organize([('qwen', '1b')], str(source), str(target))
+    os.remove(target / 'qwen' / '1b' / 'models' / 'blobs' / weights['digest'].replace(':', '-'))
+
+    result = plan(source, target, [('qwen', '1b')])
+    assert not result.up_to_date and not result.stale
+    assert [task.blob_name for task in result.blob_tasks] == [weights['digest'].replace(':', '-')]
+    # Already in the output, so updated in place rather than staged
+    assert result.jobs[0].stage_dir is None
+
+
+def test_changed_tag_is_stale_and_updated_in_place(tmp_path, add_blob, add_tag):
+    source, target = tmp_path / 'source', tmp_path / 'target'
+    config = add_blob(source, b'config')
+    old = add_blob(source, b'old weights')
+    add_tag(source, 'llama', 'latest', config, [old])
+    organize([('llama', 'latest')], str(source), str(target))
+
+    new = add_blob(source, b'new weights')
+    add_tag(source, 'llama', 'latest', config, [new])
+    result = plan(source, target, [('llama', 'latest')])
+    assert [job.model_version for job in result.stale] == ['latest']
+    assert result.bytes_to_copy == len(b'new weights')
+
+    events = []
+    summary = organize([('llama', 'latest')], str(source), str(target), on_event=events.append)
+    assert summary["stale"] == 1 and summary["success"] == 1
+    assert any(e["event"] == "stale" for e in events)
+    # The old weights are no longer referenced by the version and are removed
+    assert output_blobs(target, 'llama', 'latest') == sorted(
+        d['digest'].replace(':', '-') for d in (config, new))
+    assert plan(source, target, [('llama', 'latest')]).up_to_date
@@ -0,0 +1,56 @@
+import os
+import pytest
+from ollama_organizer.engine import organize
+from ollama_organizer.restore import restore, list_archive
+
+
+def organize_output(tmp_path, add_blob, add_tag, link_mode):
+    source, archive = tmp_path / 'source', tmp_path / 'archive'
+    weights = add_blob(source, b'weights' * 100)
+    add_tag(source, 'llama', '7b', add_blob(source, b'config a'), [weights])
+    add_tag(source, 'llama', 'latest', add_blob(source, b'config b'), [weights])
+    add_tag(source, 'qwen', '1b', add_blob(source, b'config q'), [add_blob(source, b'qwen weights')])
+    tasks = [('llama', '7b'), ('llama', 'latest'), ('qwen', '1b')]
+    summary = organize(tasks, str(source), str(archive), link_mode=link_mode)
+    assert summary["success"] == 3
+    return source, archive
+
+
+def store_files(store):
+    blobs_dir = store / 'models' / 'blobs'
+    return {name: (blobs_dir / name).read_bytes() for name in os.listdir(blobs_dir)}
+
+
+@pytest.mark.parametrize('link_mode', ['copy', 'hardlink', 'symlink'])
+def test_restore_from_every_output_mode(tmp_path, add_blob, add_tag, link_mode):
+    source, archive = organize_output(tmp_path, add_blob, add_tag, link_mode)
+    assert [entry[:2] for entry in list_archive(str(archive))] == [('llama', '7b'), ('llama', 'latest'), ('qwen', '1b')]
+
+    store = tmp_path / 'store'
+    summary = restore(str(archive), str(store))
+    assert summary["success"] == 3 and summary["failed"] == 0
+    assert store_files(store) == store_files(source)
+    for name in os.listdir(store / 'models' / 'blobs'):
+        assert not os.path.islink(store / 'models' / 'blobs' / name)
+    manifests = store / 'models' / 'manifests' / 'registry.ollama.ai' / 'library'
+    assert sorted(os.listdir(manifests / 'llama')) == ['7b', 'latest']
+
+    # Everything is in place now
+    summary = restore(str(archive), str(store))
+    assert summary["skipped"] == 3 and summary["bytes_to_copy"] == 0
+
+
+def test_failed_version_leaves_no_blobs_behind(tmp_path, add_blob, add_tag):
+    source, archive = organize_output(tmp_path, add_blob, add_tag, 'copy')
+    qwen_blobs = archive / 'qwen' / '1b' / 'models' / 'blobs'
+    # The larger weights are restored before the missing config is found
+    weights = add_blob(tmp_path / 'scratch', b'qwen weights')['digest'].replace(':', '-')
+    for name in os.listdir(qwen_blobs):
+        if name != weights:
+            os.remove(qwen_blobs / name)
+
+    store = tmp_path / 'store'
+    summary = restore(str(archive), str(store))
+    assert summary["success"] == 2 and summary["failed"] == 1
+    assert weights not in store_files(store)
+    assert not (store / 'models' / 'manifests' / 'registry.ollama.ai' / 'library' / 'qwen').exists()
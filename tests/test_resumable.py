@@ -0,0 +1,84 @@
+import os
+import json
+import hashlib
+import pytest
+from ollama_organizer.resumable import resumable_copy, PARTIAL_SUFFIX, STATE_SUFFIX
+
+CHUNK = 4096
+
+
+def make_blob(tmp_path, size=5 * CHUNK + 123):
+    data = os.urandom(size)
+    digest = hashlib.sha256(data).hexdigest()
+    src = tmp_path / f"sha256-{digest}"
+    src.write_bytes(data)
+    out = tmp_path / 'out'
+    out.mkdir()
+    return data, digest, str(src), str(out / src.name)
+
+
+def leave_partial(src, dst, digest, prefix):
+    # What an interrupted copy leaves behind: the verified prefix and its offset
+    with open(dst + PARTIAL_SUFFIX, 'wb') as f:
+        f.write(prefix)
+    st = os.stat(src)
+    with open(dst + STATE_SUFFIX, 'w') as f:
+        json.dump({'digest': digest, 'size': st.st_size, 'mtime': int(st.st_mtime), 'offset': len(prefix)}, f)
+
+
+def copy(src, dst):
+    copied = []
+    digest = resumable_copy(src, dst, chunk_size=CHUNK, buffer_size=1024, progress=lambda n, *_: copied.append(n))
+    return digest, sum(copied)
+
+
+def test_copy(tmp_path):
+    data, digest, src, dst = make_blob(tmp_path)
+    assert copy(src, dst)[0] == digest
+    with open(dst, 'rb') as f:
+        assert f.read() == data
+    assert not os.path.exists(dst + PARTIAL_SUFFIX)
+    assert not os.path.exists(dst + STATE_SUFFIX)
+
+
+def test_resume_copies_only_the_rest(tmp_path):
+    data, digest, src, dst = make_blob(tmp_path)
+    leave_partial(src, dst, digest, data[:2 * CHUNK])
+    result, copied = copy(src, dst)
+    assert result == digest
+    assert copied == len(data) - 2 * CHUNK
+    with open(dst, 'rb') as f:
+        assert f.read() == data
+
+
+def test_corrupt_prefix_fails_the_digest(tmp_path):
+    data, digest, src, dst = make_blob(tmp_path)
+    leave_partial(src, dst, digest, b'\0' * (2 * CHUNK))
+    with pytest.raises(RuntimeError):
+        copy(src, dst)
+    assert not os.path.exists(dst)
+    assert not os.path.exists(dst + PARTIAL_SUFFIX)
+    # The next attempt starts from scratch and succeeds
+    assert copy(src, dst)[0] == digest
+
+
+def test_changed_source_starts_over(tmp_path):
+    data, digest, src, dst = make_blob(tmp_path)
+    leave_partial(src, dst, digest, data[:2 * CHUNK])
+    with open(dst + STATE_SUFFIX) as f:
+        state = json.load(f)
+    state['size'] += 1
+    with open(dst + STATE_SUFFIX, 'w') as f:
+        json.dump(state, f)
+    result, copied = copy(src, dst)
+    assert result == digest
+    assert copied == len(data)
+
+
+def test_digest_mismatch(tmp_path):
+    data, digest, src, dst = make_blob(tmp_path)
+    wrong = os.path.join(os.path.dirname(dst), 'sha256-' + '0' * 64)
+    with pytest.raises(RuntimeError):
+        resumable_copy(src, wrong, chunk_size=CHUNK)
+    assert not os.path.exists(wrong)
+    assert not os.path.exists(wrong + PARTIAL_SUFFIX)
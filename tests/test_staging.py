@@ -0,0 +1,81 @@
+import os
+import sys
+import subprocess
+import pytest
+from ollama_organizer.discovery import manifest_rel_path
+from ollama_organizer.staging import (HOST, staging_root, stage_key, own_stage, abandoned_stages, clean_stages,
+                                      claim_stage, release_stage, publish_stage)
+
+
+def dead_pid():
+    proc = subprocess.Popen([sys.executable, '-c', 'pass'])
+    proc.wait()
+    return proc.pid
+
+
+def add_stage(target, model, tag, pid, host=HOST):
+    path = os.path.join(staging_root(str(target)), f"{stage_key(model, tag)}.{pid}.{host}")
+    os.makedirs(os.path.join(path, 'models', 'blobs'))
+    return path
+
+
+def write_manifest(version_dir, model, tag, data):
+    path = os.path.join(version_dir, 'models', manifest_rel_path(model, tag))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def test_publish_moves_stage_into_place(tmp_path):
+    stage = claim_stage(str(tmp_path), 'llama', '7b', str(tmp_path / 'llama' / '7b'), {})
+    write_manifest(stage, 'llama', '7b', b'{}')
+    publish_stage(stage, str(tmp_path / 'llama' / '7b'), 'llama', '7b')
+    assert not os.path.exists(stage)
+    assert (tmp_path / 'llama' / '7b' / 'models' / manifest_rel_path('llama', '7b')).read_bytes() == b'{}'
+
+
+def test_publish_after_parallel_run(tmp_path):
+    version_dir = str(tmp_path / 'llama' / '7b')
+    write_manifest(version_dir, 'llama', '7b', b'{"same": 1}')
+
+    # Same manifest published by the other run: ours is dropped
+    stage = add_stage(tmp_path, 'llama', '7b', os.getpid())
+    write_manifest(stage, 'llama', '7b', b'{"same": 1}')
+    publish_stage(stage, version_dir, 'llama', '7b')
+    assert not os.path.exists(stage)
+
+    # A different one is an error and leaves both in place
+    stage = add_stage(tmp_path, 'llama', '7b', os.getpid())
+    write_manifest(stage, 'llama', '7b', b'{"other": 1}')
+    with pytest.raises(RuntimeError):
+        publish_stage(stage, version_dir, 'llama', '7b')
+    assert os.path.isdir(stage)
+
+
+def test_clean_removes_only_abandoned_stages(tmp_path):
+    pid = dead_pid()
+    dead = add_stage(tmp_path, 'llama', '7b', pid)
+    resumed = add_stage(tmp_path, 'qwen', '1b', pid)
+    remote = add_stage(tmp_path, 'phi', '3b', pid, host=HOST + '-other')
+    live = add_stage(tmp_path, 'gemma', '2b', os.getppid())
+    running = claim_stage(str(tmp_path), 'mistral', '7b', str(tmp_path / 'mistral' / '7b'), {})
+    os.makedirs(running)
+
+    assert clean_stages(str(tmp_path), keep={stage_key('qwen', '1b')}) == 1
+    assert not os.path.exists(dead)
+    for path in (resumed, remote, live, running):
+        assert os.path.isdir(path)
+    release_stage(running)
+
+
+def test_claim_resumes_abandoned_stage(tmp_path):
+    stale = add_stage(tmp_path, 'llama', '7b', dead_pid())
+    with open(os.path.join(stale, 'models', 'blobs', 'sha256-partial'), 'wb') as f:
+        f.write(b'copied before the crash')
+
+    version_dir = str(tmp_path / 'llama' / '7b')
+    stage = claim_stage(str(tmp_path), 'llama', '7b', version_dir, abandoned_stages(str(tmp_path)))
+    assert stage == own_stage(str(tmp_path), 'llama', '7b')
+    assert not os.path.exists(stale)
+    assert os.listdir(os.path.join(stage, 'models', 'blobs')) == ['sha256-partial']
+    release_stage(stage)
@@ -0,0 +1,56 @@
+import os
+import time
+import threading
+from ollama_organizer.throttle import TokenBucket, background_io, background_io_enabled, drop_cache_enabled
+
+MB = 1024 * 1024
+
+
+def test_unlimited_never_waits():
+    bucket = TokenBucket()
+    assert bucket.consume(10 * 1024 * MB) == 0.0
+
+
+def test_rate_is_enforced_across_threads():
+    bucket = TokenBucket(20 * MB)
+    started = time.monotonic()
+    threads = [threading.Thread(target=bucket.consume, args=(2 * MB,)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 6 MB at 20 MB/s, starting from an empty bucket
+    assert 0.25 <= time.monotonic() - started < 2
+
+
+def test_lifting_the_limit_releases_waiting_copies():
+    bucket = TokenBucket(1)
+    waited = []
+    thread = threading.Thread(target=lambda: waited.append(bucket.consume(MB)))
+    thread.start()
+    time.sleep(0.1)
+    bucket.set_rate(0)
+    thread.join(5)
+    assert not thread.is_alive()
+    assert waited[0] < 2
+
+
+def test_unused_allowance_is_capped_at_one_second():
+    bucket = TokenBucket(10 * MB)
+    # Ten idle seconds
+    bucket._stamp -= 10
+    assert bucket.consume(10 * MB) < 0.05
+    assert bucket.consume(MB) >= 0.05
+
+
+def test_background_io_is_per_thread():
+    seen = []
+
+    def worker():
+        background_io()
+        seen.append((background_io_enabled(), drop_cache_enabled()))
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    assert seen == [(True, hasattr(os, 'posix_fadvise'))]
+    assert not background_io_enabled()
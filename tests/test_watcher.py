@@ -0,0 +1,72 @@
+import time
+import threading
+import pytest
+from ollama_organizer import engine, watcher
+from ollama_organizer.watcher import ManifestWatcher, watch_and_organize
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+@pytest.fixture(params=['inotify', 'poll'])
+def mode(request, monkeypatch):
+    if request.param == 'poll':
+        def no_inotify():
+            raise OSError('inotify disabled for this test')
+        monkeypatch.setattr(watcher, '_Inotify', no_inotify)
+    monkeypatch.setattr(watcher, 'WAKE_SECONDS', 0.05)
+    return request.param
+
+
+def test_changes_are_handed_over_after_a_quiet_period(tmp_path, add_blob, add_tag, mode):
+    manifests = tmp_path / 'models' / 'manifests'
+    manifests.mkdir(parents=True)
+    batches = []
+    w = ManifestWatcher(str(manifests), batches.append, debounce=0.5, poll_interval=0.1)
+    w.start()
+    try:
+        if mode == 'inotify' and w.mode != 'inotify':
+            pytest.skip("inotify is not available")
+        assert w.mode == mode
+        config = add_blob(tmp_path, b'config')
+        add_tag(tmp_path, 'llama', '7b', config, [])
+        time.sleep(0.2)
+        add_tag(tmp_path, 'llama', 'latest', config, [])
+        wait_for(lambda: batches)
+        time.sleep(0.6)
+    finally:
+        w.stop()
+    # Both pulls arrive together, once
+    assert batches == [[('llama', '7b'), ('llama', 'latest')]]
+
+
+def test_failed_batch_is_retried(tmp_path, add_blob, add_tag, monkeypatch):
+    add_tag(tmp_path, 'llama', '7b', add_blob(tmp_path, b'config'), [])
+    monkeypatch.setattr(watcher, 'WAKE_SECONDS', 0.05)
+    monkeypatch.setattr(watcher, 'RETRY_SECONDS', 0.2)
+    calls = []
+
+    def organize(tasks, source_dir, target_dir, **options):
+        calls.append((time.monotonic(), tasks))
+        if len(calls) == 1:
+            raise OSError('output directory unreachable')
+    monkeypatch.setattr(engine, 'organize', organize)
+
+    events = []
+    stop = threading.Event()
+    thread = threading.Thread(target=watch_and_organize, args=(str(tmp_path), str(tmp_path / 'out')),
+                              kwargs={"stop": stop, "on_event": events.append, "debounce": 0.1})
+    thread.start()
+    try:
+        wait_for(lambda: len(calls) >= 2)
+    finally:
+        stop.set()
+        thread.join(5)
+    assert [tasks for _, tasks in calls] == [[('llama', '7b')]] * 2
+    assert calls[1][0] - calls[0][0] >= 0.2
+    errors = [e["error"] for e in events if e["event"] == "error"]
+    assert errors == ['output directory unreachable (retrying in 0.2 seconds)']